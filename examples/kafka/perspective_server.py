@@ -10,6 +10,8 @@
 #  ┃ of the [Apache License 2.0](https://www.apache.org/licenses/LICENSE-2.0). ┃
 #  ┗━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┛
 
+import os
+import sys
 import logging
 import tornado.websocket
 import tornado.web
@@ -20,6 +22,10 @@ import perspective.handlers.tornado
 import json
 from confluent_kafka import Consumer, KafkaException
 
+# decode the messages of any KafkaWriter serializer (row JSON, Arrow IPC, msgpack, Avro)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../'))
+from perspective_data.writers.kafka_serializers import JsonRowSerializer, decode_message, message_content_type
+
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('main')
@@ -50,21 +56,30 @@ json.JSONEncoder.default = CustomJSONEncoder().default
 
 def read_kafka(consumer: Consumer, timeout: float = 0.250):
     """
-    Read latest records from a Kafka topic and return them as an array of dict objects.
+    Read latest records from a Kafka topic and return them as a list of table updates.
+
+    Row JSON messages are collected into one list of dict objects. Batch messages (Arrow IPC, msgpack, Avro) are
+    returned as they are decoded, one update per message: Arrow IPC bytes go to Perspective without any parsing.
     """
-    messages = []
+    updates, rows = [], []
     try:
         while True:
             msg = consumer.poll(timeout)
             if msg is None or (msg.error() and msg.error().code() == KafkaException._PARTITION_EOF):
                 break
-            messages.append(json.loads(msg.value().decode('utf-8')))
+            content_type = message_content_type(msg.headers())
+            payload = decode_message(msg.value(), content_type)
+            if content_type == JsonRowSerializer.content_type:
+                rows.append(payload)
+            else:
+                updates.append(payload)
     except KafkaException as e:
         logger.warning(f"KafkaException: {e}")
     except Exception as e:
         logger.warning(f"Exception: {e}")
-    # print(messages)
-    return messages
+    if rows:
+        updates.append(rows)
+    return updates
 
 
 def perspective_thread(perspective_server):
@@ -104,7 +119,8 @@ def perspective_thread(perspective_server):
 
     # update with new data every 50ms
     def updater():
-        table.update(read_kafka(consumer, timeout=.1))
+        for update in read_kafka(consumer, timeout=.1):
+            table.update(update)
 
     logger.info("Starting tornado ioloop update loop every 50ms")
     # start the periodic callback to update the table data
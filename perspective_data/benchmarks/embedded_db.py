@@ -0,0 +1,54 @@
+"""
+embedded_db.py
+
+End-to-end benchmark of a generator -> writer pipeline on one machine: smart grid batches are generated and appended
+to a local DuckDB and SQLite database file by the DuckDBWriter. Generation and insert times are reported separately,
+so the numbers are comparable between runs and machines without any database server. DuckDB is skipped when it is
+not installed.
+
+Usage:
+    python -m perspective_data.benchmarks.embedded_db --stations 1000 --batches 200
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from perspective_data.generators.smart_grid import NewYorkSmartGridStreamGenerator
+from perspective_data.writers.duckdb_writer import DuckDBWriter
+
+
+def run(database: str, engine: str, stations: int, batches: int) -> None:
+    generator = NewYorkSmartGridStreamGenerator(num_stations=stations)
+    writer = DuckDBWriter(database, "smart_grid", schema=generator.schema, engine=engine, checkpoint_interval=1.0)
+    generate_time = 0.0
+    start_time = timeit.default_timer()
+    for _ in range(batches):
+        batch_start = timeit.default_timer()
+        batch = generator.get_batch()
+        generate_time += timeit.default_timer() - batch_start
+        writer.write(batch)
+    writer.close()
+    elapsed = timeit.default_timer() - start_time
+    stats = writer.stats()
+    print(f"{engine:<7} batches={batches:>6,}  rows={stats['rows']:>9,}  generate={generate_time * 1000:9.1f} ms  "
+          f"insert={stats['insert_time'] * 1000:9.1f} ms  total={elapsed * 1000:9.1f} ms  "
+          f"insert rows/sec={stats['rows_per_second']:>12,.0f}  pipeline rows/sec={stats['rows'] / elapsed:>12,.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark generator -> embedded database pipelines")
+    parser.add_argument("--stations", type=int, default=1000, help="rows per batch (one per station)")
+    parser.add_argument("--batches", type=int, default=200, help="number of batches written")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for engine in ("duckdb", "sqlite"):
+            try:
+                run(os.path.join(tmp_dir, f"bench.{engine}"), engine, args.stations, args.batches)
+            except ImportError:
+                print(f"{engine:<7} skipped: {engine} is not installed")
+
+
+if __name__ == "__main__":
+    main()
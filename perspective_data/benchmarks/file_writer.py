@@ -0,0 +1,49 @@
+"""
+file_writer.py
+
+Benchmark of the FileWriter text formats on small, high-frequency batches: reopening the file through pandas every
+batch versus the buffered mode that keeps one open handle and encodes each batch at once, fed with either pandas
+frames or the generator's columnar batches (which skip the pandas to Arrow conversion).
+
+Usage:
+    python -m perspective_data.benchmarks.file_writer --stations 32 --batches 2000
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from perspective_data.columnar import DataBatch
+from perspective_data.generators.smart_grid import NewYorkSmartGridStreamGenerator
+from perspective_data.writers.file_writer import FileWriter
+
+
+def run(file_path: str, frames: list[DataBatch], buffered: bool) -> float:
+    start_time = timeit.default_timer()
+    writer = FileWriter(file_path, buffered=buffered)
+    for df in frames:
+        writer.write(df)
+    writer.close()
+    return timeit.default_timer() - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the FileWriter text formats")
+    parser.add_argument("--stations", type=int, default=32, help="rows per batch (one per station)")
+    parser.add_argument("--batches", type=int, default=2000, help="number of batches written")
+    args = parser.parse_args()
+    generator = NewYorkSmartGridStreamGenerator(num_stations=args.stations)
+    batches = [generator.get_batch() for _ in range(args.batches)]
+    frames = [batch.to_pandas() for batch in batches]
+    num_rows = sum(len(batch) for batch in batches)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for type in ("csv", "ndjson"):
+            for mode, inputs, buffered in [("reopen", frames, False), ("buffered", frames, True), ("buffered", batches, True)]:
+                elapsed = run(os.path.join(tmp_dir, f"bench.{type}"), inputs, buffered)
+                input_type = "pandas" if inputs is frames else "columnar"
+                print(f"{type:<7} {mode:<9} {input_type:<9} batches={args.batches:>6,}  rows={num_rows:>9,}  time={elapsed * 1000:10.1f} ms  rows/sec={num_rows / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
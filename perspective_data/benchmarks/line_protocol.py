@@ -0,0 +1,61 @@
+"""
+line_protocol.py
+
+Benchmark of the InfluxDB serialization paths on smart grid batches: the vectorized line protocol serializer versus
+one influxdb_client Point per row (skipped when influxdb_client is not installed). Nothing is sent to InfluxDB.
+
+Usage:
+    python -m perspective_data.benchmarks.line_protocol --stations 10000 --repeat 5
+"""
+
+import argparse
+import timeit
+import pandas as pd
+
+from perspective_data.generators.smart_grid import NewYorkSmartGridStreamGenerator
+from perspective_data.writers.line_protocol import to_line_protocol
+from perspective_data.writers.timestamps import to_epochs
+
+
+TAG_COLS: list[str] = ["station_name", "status"]
+FIELD_COLS: list[str] = ["latitude", "longitude", "energy_consumption", "voltage", "current", "power_factor", "battery_soc",
+                         "battery_charge_rate", "renewable_power_generation", "transformer_temperature"]
+
+
+def serialize_points(df: pd.DataFrame) -> list:
+    from influxdb_client import Point, WritePrecision
+    df = df.assign(timestamp=to_epochs(df["timestamp"]))
+    return [Point.from_dict({
+        "measurement": "smart_grid",
+        "tags": {col: row[col] for col in TAG_COLS},
+        "fields": {col: row[col] for col in FIELD_COLS},
+        "time": row["timestamp"]
+    }, WritePrecision.NS).to_line_protocol() for _, row in df.iterrows()]
+
+
+def serialize_line_protocol(df: pd.DataFrame) -> bytes:
+    return to_line_protocol(df, "smart_grid", TAG_COLS, FIELD_COLS, "timestamp")
+
+
+def benchmark(name: str, func: callable, df: pd.DataFrame, repeat: int) -> None:
+    best = min(timeit.repeat(lambda: func(df), number=1, repeat=repeat))
+    print(f"{name:<14} rows={len(df):>9,}  best={best * 1000:10.1f} ms  rows/sec={len(df) / best:>14,.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the InfluxDB serialization paths")
+    parser.add_argument("--stations", type=int, default=10_000, help="rows per batch (one per station)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs, the best one is reported")
+    args = parser.parse_args()
+    df = NewYorkSmartGridStreamGenerator(num_stations=args.stations).get_data()
+    benchmark("line_protocol", serialize_line_protocol, df, args.repeat)
+    try:
+        import influxdb_client  # noqa: F401
+    except ImportError:
+        print("point          skipped: influxdb_client is not installed")
+        return
+    benchmark("point", serialize_points, df, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
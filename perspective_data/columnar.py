@@ -0,0 +1,208 @@
+"""
+columnar.py
+
+This module defines the columnar batch protocol shared by generators and writers. Besides a pandas DataFrame, a
+generator may publish a ColumnarBatch (a dict of equally sized NumPy arrays plus the generator schema) or a pyarrow
+RecordBatch. Writers normalize whatever they receive with the helpers below, which avoid copies wherever the
+column types allow it (numeric and datetime columns are shared between NumPy, pandas and Arrow buffers).
+
+Functions:
+    numpy_dtype(type_name: str) -> np.dtype:
+        Map a Generator.schema type name to a NumPy dtype.
+
+    arrow_type(type_name: str) -> pa.DataType:
+        Map a Generator.schema type name to an Arrow data type.
+
+    arrow_schema(schema: dict) -> pa.Schema:
+        Map a Generator.schema dict to an Arrow schema.
+
+    to_dataframe(data: DataBatch) -> pd.DataFrame:
+
+    to_columnar(data: DataBatch, schema: dict = None) -> ColumnarBatch:
+
+    to_record_batch(data: DataBatch, schema: dict = None) -> pa.RecordBatch:
+        Convert a batch to a RecordBatch. With a schema, the batch holds exactly the schema's columns and Arrow types.
+
+    concat_batches(batches: list[DataBatch]) -> DataBatch:
+        Concatenate batches of the same kind, skipping empty ones. Empty input keeps its batch type.
+"""
+
+from typing import Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+__all__ = [
+    "ColumnarBatch",
+    "DataBatch",
+    "numpy_dtype",
+    "arrow_type",
+    "arrow_schema",
+    "to_dataframe",
+    "to_columnar",
+    "to_record_batch",
+    "concat_batches",
+    ]
+
+
+# Generator.schema type names mapped to (NumPy dtype, Arrow type)
+SCHEMA_TYPES: dict[str, tuple[np.dtype, pa.DataType]] = {
+    "float": (np.dtype("float64"), pa.float64()),
+    "float32": (np.dtype("float32"), pa.float32()),
+    "int": (np.dtype("int64"), pa.int64()),
+    "integer": (np.dtype("int64"), pa.int64()),
+    "bool": (np.dtype("bool"), pa.bool_()),
+    "boolean": (np.dtype("bool"), pa.bool_()),
+    "str": (np.dtype("object"), pa.string()),
+    "string": (np.dtype("object"), pa.string()),
+    "datetime": (np.dtype("datetime64[ns]"), pa.timestamp("ns")),
+    "datetime64[ns]": (np.dtype("datetime64[ns]"), pa.timestamp("ns")),
+    "date": (np.dtype("datetime64[D]"), pa.date32()),
+}
+
+
+def numpy_dtype(type_name: str) -> np.dtype:
+    if type_name not in SCHEMA_TYPES:
+        raise ValueError(f"Unknown schema type: {type_name}")
+    return SCHEMA_TYPES[type_name][0]
+
+
+def arrow_type(type_name: str) -> pa.DataType:
+    if type_name not in SCHEMA_TYPES:
+        raise ValueError(f"Unknown schema type: {type_name}")
+    return SCHEMA_TYPES[type_name][1]
+
+
+def arrow_schema(schema: dict) -> pa.Schema:
+    return pa.schema([(name, arrow_type(type_name)) for name, type_name in schema.items()])
+
+
+class ColumnarBatch:
+    """
+    A batch of rows stored column-wise as a dict of equally sized NumPy arrays.
+
+    Args:
+        columns (dict[str, np.ndarray]): The column arrays, in column order.
+        schema (dict): Optional Generator.schema describing the column types. Used when converting to Arrow.
+    """
+    __slots__ = ("columns", "schema")
+
+    def __init__(self, columns: dict[str, np.ndarray], schema: dict = None) -> None:
+        self.columns: dict[str, np.ndarray] = {name: np.asarray(values) for name, values in columns.items()}
+        self.schema: dict = schema
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns of a ColumnarBatch must have the same length. Got lengths: {sorted(lengths)}")
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __repr__(self) -> str:
+        return f"ColumnarBatch(num_rows={self.num_rows}, columns={self.column_names})"
+
+    @property
+    def num_rows(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self.columns.keys())
+
+    @property
+    def empty(self) -> bool:
+        return self.num_rows == 0
+
+    @staticmethod
+    def from_pandas(df: pd.DataFrame, schema: dict = None) -> 'ColumnarBatch':
+        return ColumnarBatch({name: df[name].to_numpy() for name in df.columns}, schema=schema)
+
+    @staticmethod
+    def from_arrow(batch: pa.RecordBatch | pa.Table, schema: dict = None) -> 'ColumnarBatch':
+        return ColumnarBatch({name: batch.column(name).to_numpy(zero_copy_only=False) for name in batch.schema.names}, schema=schema)
+
+    def to_pandas(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns, copy=False)
+
+    def to_arrow(self) -> pa.RecordBatch:
+        arrays, names = [], []
+        for name, values in self.columns.items():
+            type_name = self.schema.get(name) if self.schema else None
+            dtype = arrow_type(type_name) if type_name in SCHEMA_TYPES else None
+            # primitive NumPy arrays are wrapped without copying, object arrays are converted
+            arrays.append(pa.array(values, type=dtype, from_pandas=True))
+            names.append(name)
+        return pa.RecordBatch.from_arrays(arrays, names=names)
+
+    @staticmethod
+    def concat(batches: list['ColumnarBatch']) -> 'ColumnarBatch':
+        batches = [batch for batch in batches if not batch.empty]
+        if not batches:
+            return ColumnarBatch({})
+        if len(batches) == 1:
+            return batches[0]
+        names = batches[0].column_names
+        return ColumnarBatch({name: np.concatenate([batch[name] for batch in batches]) for name in names}, schema=batches[0].schema)
+
+
+# Any of the batch types a generator may publish to its subscribers
+DataBatch = Union[pd.DataFrame, ColumnarBatch, pa.RecordBatch, pa.Table]
+
+
+def to_dataframe(data: DataBatch) -> pd.DataFrame:
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, ColumnarBatch):
+        return data.to_pandas()
+    if isinstance(data, (pa.RecordBatch, pa.Table)):
+        return data.to_pandas()
+    raise ValueError(f"Unsupported batch type: {type(data)}")
+
+
+def to_columnar(data: DataBatch, schema: dict = None) -> ColumnarBatch:
+    if isinstance(data, ColumnarBatch):
+        return data
+    if isinstance(data, pd.DataFrame):
+        return ColumnarBatch.from_pandas(data, schema=schema)
+    if isinstance(data, (pa.RecordBatch, pa.Table)):
+        return ColumnarBatch.from_arrow(data, schema=schema)
+    raise ValueError(f"Unsupported batch type: {type(data)}")
+
+
+def to_record_batch(data: DataBatch, schema: dict = None) -> pa.RecordBatch:
+    target = arrow_schema(schema) if schema else None
+    if isinstance(data, pd.DataFrame):
+        # the schema is applied while converting: columns are selected and typed in one pass
+        return pa.RecordBatch.from_pandas(data, schema=target, preserve_index=False)
+    if isinstance(data, pa.RecordBatch):
+        batch = data
+    elif isinstance(data, pa.Table):
+        batch = data.combine_chunks().to_batches()[0] if data.num_rows else pa.RecordBatch.from_pylist([], schema=data.schema)
+    elif isinstance(data, ColumnarBatch):
+        if schema is not None and data.schema is None:
+            data = ColumnarBatch(data.columns, schema=schema)
+        batch = data.to_arrow()
+    else:
+        raise ValueError(f"Unsupported batch type: {type(data)}")
+    if target is not None and not batch.schema.equals(target):
+        # unsafe cast: datetimes are truncated to 'date' columns instead of raising
+        batch = batch.select(target.names).cast(target, safe=False)
+    return batch
+
+
+def concat_batches(batches: list[DataBatch]) -> DataBatch:
+    non_empty = [batch for batch in batches if len(batch) > 0]
+    if not non_empty:
+        # an empty batch of the input type, which keeps the schema of the input where it has one
+        return batches[0] if batches else pd.DataFrame()
+    batches = non_empty
+    if len(batches) == 1:
+        return batches[0]
+    if isinstance(batches[0], ColumnarBatch):
+        return ColumnarBatch.concat([to_columnar(batch) for batch in batches])
+    if isinstance(batches[0], (pa.RecordBatch, pa.Table)):
+        return pa.Table.from_batches([to_record_batch(batch) for batch in batches]).combine_chunks().to_batches()[0]
+    return pd.concat([to_dataframe(batch) for batch in batches], ignore_index=True)
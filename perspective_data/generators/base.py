@@ -1,4 +1,6 @@
 import time
+import asyncio
+import inspect
 from datetime import datetime, timedelta
 import threading
 import pandas as pd
@@ -7,12 +9,16 @@ from typing import Union, List, Tuple, Callable
 import codetiming
 
 from ..utils import logger
-from ..writers.base import DataWriter
+from ..columnar import ColumnarBatch, DataBatch, to_dataframe, to_columnar, to_record_batch, concat_batches
+from ..writers.base import DataWriter, AsyncDataWriter
+from .scheduler import CatchupPolicy, DeadlineScheduler, SchedulerTick
+from .fanout import OverflowPolicy, SubscriberQueue
 
 
 __all__ = [
     "Generator",
     "StreamGenerator",
+    "AsyncStreamGenerator",
     "BatchGenerator",
     ]
 
@@ -28,9 +34,13 @@ class Generator(ABC):
             setattr(self, key, value)
 
     @abstractmethod
-    def get_data(self) -> pd.DataFrame:
+    def get_data(self) -> pd.DataFrame | ColumnarBatch:
         pass
 
+    def get_batch(self) -> ColumnarBatch:
+        # Columnar output of the generator. Vectorized generators can override this method to skip pandas completely
+        return to_columnar(self.get_data(), schema=self.schema)
+
     @property
     @abstractmethod
     def schema(self) -> dict:
@@ -57,6 +67,11 @@ class StreamGenerator(Generator):
                  end_time: str | datetime = None,                           # end_time: The end time for the data generator. Timestamp of the last row. Set to None if generator should run indefinitely. Sample date format: "2021-01-01 00:00:00"
                  loopback: bool = False,                                    # loopback: If True, the generator will loop back to the start time after reaching the end time.
                  callback_subscribers: Union[Callable, List[Callable]] = None,    # callback_subscribers: A list of callback functions to call with the generated data batch.
+                 catchup_policy: CatchupPolicy | str = CatchupPolicy.BURST, # catchup_policy: How to recover from missed ticks when a batch takes longer than interval. Options are 'burst', 'skip', 'coalesce'.
+                 subscriber_queue_size: int = 0,                            # subscriber_queue_size: Size of the bounded queue in front of each subscriber. Set to 0 to call subscribers synchronously on the generator thread.
+                 overflow_policy: OverflowPolicy | str = OverflowPolicy.BLOCK,  # overflow_policy: What to do when a subscriber queue is full. Options are 'block', 'drop_oldest', 'drop_newest', 'merge'.
+                 speed: float = 1.0,                                        # speed: Time-acceleration factor. Simulated time advances by interval every interval / speed wall-clock seconds. Set to None to run as fast as possible (backfill).
+                 output_format: str = "pandas",                             # output_format: The batch type published to subscribers. Options are 'pandas' (DataFrame), 'columnar' (ColumnarBatch), 'arrow' (pyarrow RecordBatch).
                  **kwargs) -> None:
         # Initialize the stream data generator
         super().__init__(**kwargs)
@@ -98,14 +113,29 @@ class StreamGenerator(Generator):
         self.current_time: datetime = self.start_time
         # setting loopback parameter. loopback is used to reset the current_time to start_time after reaching end_time. If end_time is None, loopback is ignored.
         self.loopback: bool = loopback
+        # setting the batch type published to subscribers
+        if output_format not in ("pandas", "columnar", "arrow"):
+            raise ValueError(f"Invalid output_format: {output_format}. Valid values are 'pandas', 'columnar' or 'arrow'.")
+        self.output_format: str = output_format
         # setting data generator callback function. The callback function is called with the generated data batch.
         self.running: bool = False
         self.data_generator_thread: threading.Thread = None
+        self._stop_event: threading.Event = threading.Event()
+        # setting the deadline scheduler. Ticks are scheduled on a monotonic clock so the generation and callback time doesn't add up to the interval
+        self.scheduler: DeadlineScheduler = DeadlineScheduler(interval=self.interval, catchup_policy=catchup_policy)
+        # setting the replay speed and the throughput counters. row_count and batch_count are reset every time the generator runs
+        self.speed: float = speed
+        self.batch_count: int = 0
+        self._run_started: float = None
+        self._run_finished: float = None
+        # setting the subscriber fan-out. With a queue size > 0 each subscriber gets its own bounded queue and worker thread
+        self.subscriber_queue_size: int = subscriber_queue_size
+        self.overflow_policy: OverflowPolicy = OverflowPolicy(overflow_policy)
         if callback_subscribers is not None:
             if isinstance(callback_subscribers, list):
-                self._callback_subscribers: list[callable] = callback_subscribers
+                self._callback_subscribers: list[callable] = [self._wrap_subscriber(callback) for callback in callback_subscribers]
             elif callable(callback_subscribers):
-                self._callback_subscribers: list[callable] = [callback_subscribers]
+                self._callback_subscribers: list[callable] = [self._wrap_subscriber(callback_subscribers)]
             else:
                 raise ValueError("Invalid type for callback_subscribers")
         else:
@@ -118,8 +148,11 @@ class StreamGenerator(Generator):
                 logger.warning("Stream-Generator::ThreadIsRunning: Stream generator thread was already running. Stopping existing stream data generator")
                 self.stop()  # Stop the existing thread
             logger.debug("Stream-Generator::StartGenThread")
-            logger.info(f"Stream-Generator: start_time={self.start_time}, end_time={self.end_time}, interval={self.interval}, nrows={self.nrows}")
+            logger.info(f"Stream-Generator: start_time={self.start_time}, end_time={self.end_time}, interval={self.interval}, nrows={self.nrows}, catchup_policy={self.scheduler.catchup_policy.value}, speed={self.speed}")
             self.running = True
+            self._stop_event.clear()
+            for subscriber in self._subscriber_queues():
+                subscriber.start()
             self.data_generator_thread = threading.Thread(target=self._data_generator_runner)
             self.data_generator_thread.daemon = True   # Make thread a daemon so it will exit when the main program exits
             self.data_generator_thread.start()
@@ -130,51 +163,329 @@ class StreamGenerator(Generator):
         if self.running or (self.data_generator_thread is not None and self.data_generator_thread.is_alive()):
             logger.debug("Stream-Generator::StopGenThread")
             self.running = False
+            self._stop_event.set()
             if self.data_generator_thread is not None:
                 try:
                     self.data_generator_thread.join()
                 except Exception as e:
                     pass
+            # deliver the batches still queued for the subscribers and stop their workers
+            for subscriber in self._subscriber_queues():
+                subscriber.stop(drain=True)
         self.running = False
 
     def _data_generator_runner(self) -> None:
+        self._prepare_run()
         while self.running:
-            # take note of the current time before the call to get new data and other inherited methods
-            tmp_time = self.current_time
-            # Generate data for a single interval
+            if self._unbounded():
+                # backfill mode: no wall-clock pacing, generate the next tick right away
+                tick = SchedulerTick(count=1, skipped=0, lag=0.0)
+            else:
+                # wait for the next deadline. The stop event wakes the thread up early when the generator is stopped
+                wait_time = self.scheduler.wait_time()
+                if wait_time > 0 and self._stop_event.wait(wait_time):
+                    break
+                tick = self.scheduler.tick()
+            # advance the simulated time over the skipped ticks so timestamps stay aligned with the wall clock
+            if tick.skipped:
+                self.current_time += timedelta(seconds=self.interval * tick.skipped)
+            # Generate data for the tick. Coalesced ticks are generated back to back and published as one batch
             with codetiming.Timer(text="Stream-Generator::DataGen: run_time={milliseconds:.3f} ms", logger=logger.debug):
-                df: pd.DataFrame = self.get_data()
+                frames = []
+                for _ in range(tick.count):
+                    frames.append(self._generate_frame())
+                    if self._end_time_reached():
+                        break
+                df: DataBatch = frames[0] if len(frames) == 1 else self._concat_frames(frames)
             # Push data to callback
-            if self._callback_subscribers:
-                # Call the callback function with the generated data
-                with codetiming.Timer(text="Stream-Generator::DataSubscriberCallback: run_time={milliseconds:.3f} ms", logger=logger.debug):
-                    for callback in self._callback_subscribers:
-                        callback(df)
-            # adnvance the current time by the interval if implemented methods haven't yet
-            if tmp_time == self.current_time:
-                self.current_time += timedelta(seconds=self.interval)
+            self._publish(df)
+            logger.debug(f"Stream-Generator::TickLag: lag={tick.lag * 1000:.3f} ms, frames={tick.count}, skipped={tick.skipped}")
             logger.debug(f"Stream-Generator::CurrentFrameTime: current_time={self.current_time}, end_time={self.end_time}")
             # check the current time and end time to decide whether to stop the generator
-            if self.end_time is not None and self.current_time >= self.end_time:
+            if self._end_time_reached():
                 logger.info("Stream-Generator::EndTimeReached: Stopping stream data generator.")
                 self.stop()
-            # Sleep for interval
-            time.sleep(self.interval)
+        self._finish_run()
 
-    def add_subscriber(self, subscriber_callback: Union[Callable, DataWriter]) -> None:
-        if isinstance(subscriber_callback, DataWriter):
-            self._callback_subscribers.append(subscriber_callback.write)
-        elif callable(subscriber_callback):
-            self._callback_subscribers.append(subscriber_callback)
+    def backfill(self, speed: float = None) -> dict:
+        """
+        Replay the stream from current_time to end_time on the calling thread and publish every batch to the subscribers.
+
+        Simulated timestamps advance by interval per tick exactly like a live stream; only the wall-clock pacing changes.
+
+        Args:
+            speed (float): Time-acceleration factor, e.g. 1000 replays 1000 simulated seconds per wall-clock second. Default is None (as fast as possible).
+
+        Returns:
+            dict: The throughput statistics of the run. See throughput_stats().
+        """
+        if self.end_time is None:
+            raise ValueError("backfill requires an end_time")
+        if self.running:
+            raise RuntimeError("Stream generator is already running")
+        # the backfill speed only applies to this run; a later start() paces at the configured speed again
+        configured_speed, self.speed = self.speed, speed
+        logger.info(f"Stream-Generator::Backfill: start_time={self.current_time}, end_time={self.end_time}, interval={self.interval}, speed={self.speed}")
+        self.running = True
+        self._stop_event.clear()
+        for subscriber in self._subscriber_queues():
+            subscriber.start()
+        try:
+            self._data_generator_runner()
+        finally:
+            self.stop()
+            self.speed = configured_speed
+        return self.throughput_stats()
+
+    def _unbounded(self) -> bool:
+        return not self.speed or self.speed == float("inf")
+
+    def _prepare_run(self) -> None:
+        self.scheduler.interval = 0.0 if self._unbounded() else self.interval / self.speed
+        self.scheduler.reset()
+        self.row_count = 0
+        self.batch_count = 0
+        self._run_started = time.monotonic()
+        self._run_finished = None
+
+    def _finish_run(self) -> None:
+        self._run_finished = time.monotonic()
+        stats = self.throughput_stats()
+        logger.info(f"Stream-Generator::Throughput: rows={stats['rows']}, batches={stats['batches']}, elapsed={stats['elapsed']:.3f} s, rows_per_sec={stats['rows_per_sec']:.1f}")
+
+    def throughput_stats(self) -> dict:
+        """Return the number of rows and batches published by the current (or last) run and the achieved rows/sec."""
+        if self._run_started is None:
+            elapsed = 0.0
         else:
+            elapsed = (self._run_finished or time.monotonic()) - self._run_started
+        return {
+            "rows": self.row_count,
+            "batches": self.batch_count,
+            "elapsed": elapsed,
+            "rows_per_sec": self.row_count / elapsed if elapsed > 0 else 0.0,
+            "simulated_time": self.current_time,
+        }
+
+    def _generate_frame(self) -> DataBatch:
+        # take note of the current time before the call to get new data and other inherited methods
+        tmp_time = self.current_time
+        df: DataBatch = self._convert_output(self.get_data() if self.output_format == "pandas" else self.get_batch())
+        # adnvance the current time by the interval if implemented methods haven't yet
+        if tmp_time == self.current_time:
+            self.current_time += timedelta(seconds=self.interval)
+        return df
+
+    def _end_time_reached(self) -> bool:
+        return self.end_time is not None and self.current_time >= self.end_time
+
+    def _convert_output(self, data: DataBatch) -> DataBatch:
+        if self.output_format == "columnar":
+            return to_columnar(data, schema=self.schema)
+        if self.output_format == "arrow":
+            return to_record_batch(data, schema=self.schema)
+        return to_dataframe(data)
+
+    @staticmethod
+    def _concat_frames(frames: list[DataBatch]) -> DataBatch:
+        return concat_batches(frames)
+
+    def _publish(self, df: DataBatch) -> None:
+        self.row_count += len(df)
+        self.batch_count += 1
+        if self._callback_subscribers:
+            # Call the callback function with the generated data
+            with codetiming.Timer(text="Stream-Generator::DataSubscriberCallback: run_time={milliseconds:.3f} ms", logger=logger.debug):
+                for callback in self._callback_subscribers:
+                    callback(df)
+
+    def scheduler_stats(self) -> dict:
+        """Return the tick statistics of the deadline scheduler. Lags are reported in seconds."""
+        return self.scheduler.stats()
+
+    def add_subscriber(self, 
+                       subscriber_callback: Union[Callable, DataWriter], 
+                       queue_size: int = None,                              # queue_size: Overrides subscriber_queue_size for this subscriber.
+                       overflow_policy: OverflowPolicy | str = None,        # overflow_policy: Overrides overflow_policy for this subscriber.
+                       ) -> None:
+        if isinstance(subscriber_callback, DataWriter):
+            subscriber_callback = subscriber_callback.write
+        elif not callable(subscriber_callback):
             logger.error("Stream-Generator::InvalidSubscriberCallback: Subscriber callback must be a callable or an instance of DataWriter")
             raise ValueError("Invalid type for subscriber_callback")
+        subscriber = self._wrap_subscriber(subscriber_callback, queue_size=queue_size, overflow_policy=overflow_policy)
+        self._callback_subscribers.append(subscriber)
+        # subscribers added to a running generator need their worker started right away
+        if self.running and isinstance(subscriber, SubscriberQueue):
+            subscriber.start()
+
+    def _wrap_subscriber(self, callback: Callable, queue_size: int = None, overflow_policy: OverflowPolicy | str = None) -> Callable:
+        queue_size = self.subscriber_queue_size if queue_size is None else queue_size
+        if not queue_size or isinstance(callback, SubscriberQueue):
+            return callback
+        return SubscriberQueue(callback, max_size=queue_size, overflow_policy=overflow_policy or self.overflow_policy)
+
+    def _subscriber_queues(self) -> list[SubscriberQueue]:
+        return [subscriber for subscriber in self._callback_subscribers if isinstance(subscriber, SubscriberQueue)]
+
+    def subscriber_stats(self) -> list[dict]:
+        """Return the queue depth, delivery and drop counters of every queued subscriber."""
+        return [subscriber.stats() for subscriber in self._subscriber_queues()]
 
     def is_running(self) -> bool:
         return self.running
 
 
 
+class AsyncStreamGenerator(StreamGenerator):
+    """
+    A StreamGenerator that runs as a task on an asyncio event loop instead of a dedicated thread.
+
+    Implementations provide an `async get_data()`. Subscribers can be coroutine functions, AsyncDataWriter instances,
+    plain callables (called inline on the loop) or DataWriter instances (run in the loop's default executor so they
+    don't block it). The subscribers of a tick are awaited concurrently, so network writers overlap their I/O.
+    Ticks are scheduled with the same DeadlineScheduler and catch-up policies as StreamGenerator.
+    """
+    namespace: str = "async_stream"
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        if self.subscriber_queue_size:
+            raise ValueError("AsyncStreamGenerator does not queue its subscribers: subscriber_queue_size is not supported")
+        self.data_generator_task: asyncio.Task = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._wakeup: asyncio.Event = None
+
+    @abstractmethod
+    async def get_data(self) -> pd.DataFrame:
+        pass
+
+    def start(self) -> asyncio.Task:
+        """Schedule the generator on the running event loop and return its task. Must be called from within the loop."""
+        if self.running:
+            logger.warning("Async-Stream-Generator::TaskIsRunning: Stream data generator is already running. Not doing anything.")
+            return self.data_generator_task
+        logger.info(f"Async-Stream-Generator: start_time={self.start_time}, end_time={self.end_time}, interval={self.interval}, nrows={self.nrows}, catchup_policy={self.scheduler.catchup_policy.value}, speed={self.speed}")
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.running = True
+        self.data_generator_task = self._loop.create_task(self._data_generator_runner())
+        return self.data_generator_task
+
+    def stop(self) -> None:
+        """Ask the generator task to exit. Safe to call from any thread; await wait_closed() to wait for the task."""
+        if self.running:
+            logger.debug("Async-Stream-Generator::StopGenTask")
+        self.running = False
+        if self._wakeup is not None and self._loop is not None and not self._loop.is_closed():
+            try:
+                if asyncio.get_running_loop() is self._loop:
+                    self._wakeup.set()
+                    return
+            except RuntimeError:
+                pass
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def wait_closed(self) -> None:
+        if self.data_generator_task is not None:
+            await self.data_generator_task
+
+    async def run(self) -> None:
+        """Run the generator on the current event loop until it is stopped or reaches end_time."""
+        self.start()
+        await self.wait_closed()
+
+    async def backfill(self, speed: float = None) -> dict:
+        """Replay the stream from current_time to end_time at the given speed (None: as fast as possible) and return the throughput statistics."""
+        if self.end_time is None:
+            raise ValueError("backfill requires an end_time")
+        if self.running:
+            raise RuntimeError("Stream generator is already running")
+        configured_speed, self.speed = self.speed, speed
+        try:
+            await self.run()
+        finally:
+            self.speed = configured_speed
+        return self.throughput_stats()
+
+    async def _data_generator_runner(self) -> None:
+        self._prepare_run()
+        while self.running:
+            if self._unbounded():
+                # backfill mode: yield to the loop between ticks but don't wait for a deadline
+                await asyncio.sleep(0)
+                tick = SchedulerTick(count=1, skipped=0, lag=0.0)
+            else:
+                # wait for the next deadline. stop() sets the wakeup event to exit early
+                wait_time = self.scheduler.wait_time()
+                if wait_time > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait_time)
+                        break
+                    except asyncio.TimeoutError:
+                        pass
+                tick = self.scheduler.tick()
+            if tick.skipped:
+                self.current_time += timedelta(seconds=self.interval * tick.skipped)
+            with codetiming.Timer(text="Async-Stream-Generator::DataGen: run_time={milliseconds:.3f} ms", logger=logger.debug):
+                frames = []
+                for _ in range(tick.count):
+                    frames.append(await self._generate_frame())
+                    if self._end_time_reached():
+                        break
+                df: DataBatch = frames[0] if len(frames) == 1 else self._concat_frames(frames)
+            await self._publish(df)
+            logger.debug(f"Async-Stream-Generator::TickLag: lag={tick.lag * 1000:.3f} ms, frames={tick.count}, skipped={tick.skipped}")
+            if self._end_time_reached():
+                logger.info("Async-Stream-Generator::EndTimeReached: Stopping stream data generator.")
+                self.stop()
+        self._finish_run()
+
+    async def _generate_frame(self) -> DataBatch:
+        tmp_time = self.current_time
+        df: DataBatch = self._convert_output(await self.get_data())
+        if tmp_time == self.current_time:
+            self.current_time += timedelta(seconds=self.interval)
+        return df
+
+    async def _publish(self, df: DataBatch) -> None:
+        self.row_count += len(df)
+        self.batch_count += 1
+        if not self._callback_subscribers:
+            return
+        with codetiming.Timer(text="Async-Stream-Generator::DataSubscriberCallback: run_time={milliseconds:.3f} ms", logger=logger.debug):
+            results = await asyncio.gather(*(self._call_subscriber(callback, df) for callback in self._callback_subscribers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Async-Stream-Generator::SubscriberError: {result}")
+
+    async def _call_subscriber(self, callback: Callable, df: DataBatch) -> None:
+        if isinstance(getattr(callback, "__self__", None), DataWriter):
+            # blocking writers run in the default executor so they don't stall the event loop
+            await asyncio.get_running_loop().run_in_executor(None, callback, df)
+            return
+        result = callback(df)
+        if inspect.isawaitable(result):
+            await result
+
+    def add_subscriber(self,
+                       subscriber_callback: Union[Callable, DataWriter, AsyncDataWriter],
+                       queue_size: int = None,
+                       overflow_policy: OverflowPolicy | str = None,
+                       ) -> None:
+        # the subscribers are awaited concurrently on the loop, there is no per-subscriber queue to size
+        if queue_size is not None or overflow_policy is not None:
+            raise ValueError("AsyncStreamGenerator does not queue its subscribers: queue_size and overflow_policy are not supported")
+        if isinstance(subscriber_callback, AsyncDataWriter):
+            self._callback_subscribers.append(subscriber_callback.write)
+        else:
+            super().add_subscriber(subscriber_callback)
+
+    def _wrap_subscriber(self, callback: Callable, queue_size: int = None, overflow_policy: OverflowPolicy | str = None) -> Callable:
+        # subscribers are awaited concurrently on the event loop, so there is no per-subscriber worker thread
+        return callback
+
+
 class BatchGenerator(Generator):
     namespace: str = "batch"
 
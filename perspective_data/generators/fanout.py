@@ -0,0 +1,171 @@
+import threading
+from collections import deque
+from enum import Enum
+from typing import Callable
+
+from ..utils import logger
+from ..columnar import DataBatch, concat_batches
+
+
+__all__ = [
+    "OverflowPolicy",
+    "SubscriberQueue",
+    ]
+
+
+class OverflowPolicy(Enum):
+    """
+    Enum representing what a SubscriberQueue does with a new batch when its queue is full.
+
+    Attributes:
+        BLOCK (str): Block the publisher until the subscriber has made room in the queue.
+        DROP_OLDEST (str): Discard the oldest queued batch to make room for the new one.
+        DROP_NEWEST (str): Discard the new batch and keep the queued ones.
+        MERGE (str): Concatenate all the queued batches and the new one into a single batch.
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    MERGE = "merge"
+
+
+class SubscriberQueue:
+    """
+    A bounded queue and worker thread in front of a single stream subscriber.
+
+    Calling the queue enqueues the batch and returns immediately (unless the policy is 'block' and the queue is full),
+    while the worker thread delivers the queued batches to the subscriber. This decouples a slow subscriber from the
+    generator thread and from the other subscribers.
+
+    Args:
+        callback (Callable[[DataBatch], None]): The subscriber to deliver batches to.
+        max_size (int): The maximum number of batches waiting in the queue. Default is 16.
+        overflow_policy (OverflowPolicy | str): What to do when the queue is full. Default is 'block'.
+        name (str): A name used in logs and statistics. Defaults to the callback's qualified name.
+    """
+
+    def __init__(self,
+                 callback: Callable[[DataBatch], None],
+                 max_size: int = 16,
+                 overflow_policy: OverflowPolicy | str = OverflowPolicy.BLOCK,
+                 name: str = None,
+                 ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self.callback: Callable[[DataBatch], None] = callback
+        self.max_size: int = max_size
+        self.overflow_policy: OverflowPolicy = OverflowPolicy(overflow_policy)
+        self.name: str = name or getattr(callback, "__qualname__", repr(callback))
+        self._queue: deque[DataBatch] = deque()
+        self._cond: threading.Condition = threading.Condition()
+        self._busy: bool = False
+        self._closing: bool = False
+        self._worker: threading.Thread = None
+        # queue statistics
+        self.enqueued: int = 0
+        self.delivered: int = 0
+        self.dropped: int = 0
+        self.merged: int = 0
+        self.errors: int = 0
+        self.max_depth: int = 0
+
+    def __call__(self, df: DataBatch) -> None:
+        self.put(df)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._closing = False
+            self._worker = threading.Thread(target=self._worker_runner, name=f"SubscriberQueue-{self.name}")
+            self._worker.daemon = True
+            self._worker.start()
+
+    def stop(self, drain: bool = True, timeout: float = None) -> None:
+        """
+        Stop the worker thread.
+
+        Args:
+            drain (bool): If True, deliver the batches still in the queue before stopping. Otherwise discard them.
+            timeout (float): The maximum number of seconds to wait for the worker to finish. Default is None (wait forever).
+        """
+        with self._cond:
+            self._closing = True
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._cond.notify_all()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout)
+
+    def put(self, df: DataBatch) -> None:
+        with self._cond:
+            if len(self._queue) >= self.max_size:
+                if self.overflow_policy == OverflowPolicy.BLOCK:
+                    # only block while a worker is around to make room; otherwise the publisher would dead-lock
+                    while len(self._queue) >= self.max_size and self._worker_alive():
+                        self._cond.wait()
+                    if len(self._queue) >= self.max_size:
+                        self.dropped += 1
+                        logger.warning(f"SubscriberQueue::Dropped: subscriber={self.name}, reason=no running worker")
+                        return
+                elif self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                elif self.overflow_policy == OverflowPolicy.MERGE:
+                    frames = list(self._queue) + [df]
+                    self.merged += len(self._queue)
+                    self._queue.clear()
+                    df = concat_batches(frames)
+            self._queue.append(df)
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait until every queued batch has been delivered. Returns False if the timeout expired first."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "errors": self.errors,
+        }
+
+    def _worker_alive(self) -> bool:
+        return self._worker is not None and self._worker.is_alive() and not self._closing
+
+    def _worker_runner(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                df = self._queue.popleft()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                self.callback(df)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"SubscriberQueue::CallbackError: subscriber={self.name}, error={e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,120 @@
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, NamedTuple
+
+
+__all__ = [
+    "CatchupPolicy",
+    "SchedulerTick",
+    "DeadlineScheduler",
+    ]
+
+
+class CatchupPolicy(Enum):
+    """
+    Enum representing how a stream generator recovers when one or more ticks were missed, i.e. when
+    generating and publishing a batch took longer than the configured interval.
+
+    Attributes:
+        BURST (str): Run the missed ticks back to back, without sleeping, until the schedule has caught up.
+        SKIP (str): Drop the missed ticks and resume on the next future deadline. The simulated clock still advances over the skipped ticks.
+        COALESCE (str): Generate all the missed ticks at once and publish them as one larger batch.
+    """
+    BURST = "burst"
+    SKIP = "skip"
+    COALESCE = "coalesce"
+
+
+class SchedulerTick(NamedTuple):
+    count: int              # count: The number of frames to generate for this tick (> 1 only when coalescing).
+    skipped: int            # skipped: The number of frames that were skipped and won't be generated.
+    lag: float              # lag: The number of seconds the tick fired after its deadline.
+
+
+class DeadlineScheduler:
+    """
+    A drift-free tick scheduler driven by a monotonic clock.
+
+    Deadlines are computed as `start + n * period` rather than `now + period`, so the time spent generating and
+    publishing a batch does not accumulate into the effective period. When a tick fires late by more than one
+    period the configured CatchupPolicy decides how the missed ticks are handled.
+
+    Args:
+        interval (float): The number of seconds between two consecutive deadlines.
+        catchup_policy (CatchupPolicy | str): How to handle missed ticks. Default is 'burst'.
+        clock (Callable[[], float]): Monotonic clock returning seconds. Default is time.monotonic.
+        lag_history (int): Number of recent per-tick lag samples to keep. Default is 1000.
+    """
+
+    def __init__(self,
+                 interval: float,
+                 catchup_policy: CatchupPolicy | str = CatchupPolicy.BURST,
+                 clock: Callable[[], float] = time.monotonic,
+                 lag_history: int = 1000,
+                 ) -> None:
+        self.interval: float = interval
+        self.catchup_policy: CatchupPolicy = CatchupPolicy(catchup_policy)
+        self.clock: Callable[[], float] = clock
+        self.next_deadline: float = None
+        # tick statistics
+        self.ticks: int = 0
+        self.missed_ticks: int = 0
+        self.last_lag: float = 0.0
+        self.max_lag: float = 0.0
+        self.lags: deque[float] = deque(maxlen=lag_history)
+
+    def reset(self) -> None:
+        """Schedule the first deadline at the current clock time and clear the statistics."""
+        self.next_deadline = self.clock()
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.lags.clear()
+
+    def wait_time(self) -> float:
+        """Return the number of seconds left until the next deadline (0 if it has already passed)."""
+        if self.next_deadline is None:
+            self.reset()
+        return max(0.0, self.next_deadline - self.clock())
+
+    def tick(self) -> SchedulerTick:
+        """
+        Consume the current deadline and schedule the next one according to the catch-up policy.
+
+        Returns:
+            SchedulerTick: The number of frames to generate now, the number of skipped frames and the tick lag.
+        """
+        if self.next_deadline is None:
+            self.reset()
+        lag = max(0.0, self.clock() - self.next_deadline)
+        # number of whole periods that have elapsed past the current deadline
+        missed = int(lag // self.interval) if self.interval > 0 else 0
+        count, skipped = 1, 0
+        if self.catchup_policy == CatchupPolicy.BURST or missed == 0:
+            # the next deadline is already due when behind, so the caller runs it immediately
+            self.next_deadline += self.interval
+        elif self.catchup_policy == CatchupPolicy.SKIP:
+            skipped = missed
+            self.next_deadline += self.interval * (missed + 1)
+        elif self.catchup_policy == CatchupPolicy.COALESCE:
+            count = missed + 1
+            self.next_deadline += self.interval * (missed + 1)
+        # update statistics
+        self.ticks += 1
+        self.missed_ticks += missed if self.catchup_policy != CatchupPolicy.BURST else 0
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.lags.append(lag)
+        return SchedulerTick(count=count, skipped=skipped, lag=lag)
+
+    def stats(self) -> dict:
+        """Return a snapshot of the scheduler statistics. Lags are reported in seconds."""
+        return {
+            "ticks": self.ticks,
+            "missed_ticks": self.missed_ticks,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "avg_lag": (sum(self.lags) / len(self.lags)) if self.lags else 0.0,
+        }
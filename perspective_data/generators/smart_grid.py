@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-import random
 from datetime import datetime, timedelta
 
 from perspective_data.utils import logger
+from perspective_data.columnar import ColumnarBatch
 from perspective_data.generators.base import StreamGenerator
 from perspective_data.generators.utils import RandomWaveGenerator as rwg
+from perspective_data.generators.stations import NEW_YORK_BBOX, procedural_stations, random_wave_parameters
 
 
 POWER_STATIONS: list[dict] = [
@@ -129,15 +130,25 @@ class NewYorkSmartGridStreamGenerator(StreamGenerator):
                  end_time: str | datetime = None,
                  loopback: bool = True,
                  data_callback_function: callable = None,
+                 topology: str = "auto",                                    # station topology: 'subway' (real subway stops), 'procedural' (synthetic stations) or 'auto' (subway stops, procedural past their count)
+                 station_seed: int = 42,                                    # seed of the procedural topology
+                 bbox: tuple[float, float, float, float] = NEW_YORK_BBOX,   # (min_lat, min_lon, max_lat, max_lon) of the procedural topology
                  **kwargs
                  ) -> None:
         # call the parent class constructor passing the required present parameters
         super().__init__(interval=interval, nrows=nrows, start_time=start_time, end_time=end_time, loopback=loopback, callback_subscribers=data_callback_function, **kwargs)
-        # check the number of stations
-        if num_stations > len(POWER_STATIONS):
-            logger.warning(f"NewYorkSmartGridStreamGenerator: Number of stations cannot be greater than {len(POWER_STATIONS)}. Setting to {len(POWER_STATIONS)}")
+        # check the station topology and the number of stations
+        if topology not in ("auto", "subway", "procedural"):
+            raise ValueError(f"Invalid topology: {topology}. Valid values are 'auto', 'subway' or 'procedural'.")
+        if topology == "auto":
+            topology = "subway" if num_stations <= len(POWER_STATIONS) else "procedural"
+        if topology == "subway" and num_stations > len(POWER_STATIONS):
+            logger.warning(f"NewYorkSmartGridStreamGenerator: Number of stations cannot be greater than {len(POWER_STATIONS)} with the subway topology. Setting to {len(POWER_STATIONS)}")
             num_stations = len(POWER_STATIONS)
         self.num_stations = num_stations
+        self.topology = topology
+        self.station_seed = station_seed
+        self.bbox = bbox
         # Initialize the New York Smart Grid data generator
         self._cache = {}
         self._cur_frame = 0
@@ -146,86 +157,99 @@ class NewYorkSmartGridStreamGenerator(StreamGenerator):
     def _init_generator(self) -> None:
         # Initialize the generator
         self.current_time = self.start_time if self.start_time is not None else datetime.now()
-        # initialize the cache with for each station. Generate a random wave for each station that will be used to generate the data
-        self._cache = {}
-        for i in range(self.num_stations):
-            station = {
-                "name": POWER_STATIONS[i]["name"],
-                "lat": POWER_STATIONS[i]["lat"],
-                "lon": POWER_STATIONS[i]["lon"],
-                "power_wave": rwg.sinusoidal_wave(wave_mode='full', varying_mode='both', num_points=self.nrows, periods=random.randint(2, 7), amplitude=(2.0, 10.0), phase=np.random.uniform(0.5, 2*np.pi), noise=0.05).tolist(),
-                "battery_wave": rwg.sinusoidal_wave(wave_mode='full', varying_mode='both', num_points=self.nrows, periods=random.randint(1, 5), amplitude=(1.0, 10.0), phase=np.random.uniform(0, 2*np.pi)).tolist(),
-                "temperature_wave": (55 + rwg.sinusoidal_wave(wave_mode='full', varying_mode='amp', num_points=self.nrows, periods=random.randint(1, 10), amplitude=(10.0, 30.0), phase=np.random.uniform(0, 2*np.pi))).tolist(),
-                "fault": 0,
-                "power_seed": random.randint(10_000, 15_000),
-                "battery_seed": random.randint(8_000, 12_000),
-            }
-            self._cache[station["name"]] = station
+        # initialize the station state as a struct of arrays, one entry per station. Generate random waves for each station that will be used to generate the data
+        n = self.num_stations
+        stations = self._build_topology()
+        self._cache = {
+            "name": stations["name"],
+            "lat": stations["lat"],
+            "lon": stations["lon"],
+            # wave banks evaluated on demand for the current frame. Only the wave segments are stored, so memory and startup time don't depend on nrows
+            "power_wave": rwg.sinusoidal_wave_bank(n, wave_mode='full', varying_mode='both', num_points=self.nrows, periods=stations["power_periods"], amplitude=(2.0, 10.0), phase=stations["power_phase"], noise=0.05),
+            "battery_wave": rwg.sinusoidal_wave_bank(n, wave_mode='full', varying_mode='both', num_points=self.nrows, periods=stations["battery_periods"], amplitude=(1.0, 10.0), phase=stations["battery_phase"]),
+            "temperature_wave": rwg.sinusoidal_wave_bank(n, wave_mode='full', varying_mode='amp', num_points=self.nrows, periods=stations["temperature_periods"], amplitude=(10.0, 30.0), phase=stations["temperature_phase"], offset=55),
+            "fault": np.zeros(n, dtype=np.int32),                                   # number of frames left in fault mode
+            "power_seed": stations["power_seed"],
+            "battery_seed": stations["battery_seed"],
+        }
         logger.debug(f"NewYorkSmartGridStreamGenerator: status=initialized, stations={self.num_stations}, nrows={self.nrows}, loopback={self.loopback}")
 
+    def _build_topology(self) -> dict[str, np.ndarray]:
+        n = self.num_stations
+        if self.topology == "procedural":
+            # synthetic stations clustered around the real subway stops
+            anchors = (np.array([station["lat"] for station in POWER_STATIONS]), np.array([station["lon"] for station in POWER_STATIONS]))
+            return procedural_stations(n, seed=self.station_seed, bbox=self.bbox, anchors=anchors)
+        return {
+            "name": np.array([station["name"] for station in POWER_STATIONS[:n]], dtype=object),
+            "lat": np.array([station["lat"] for station in POWER_STATIONS[:n]], dtype=np.float64),
+            "lon": np.array([station["lon"] for station in POWER_STATIONS[:n]], dtype=np.float64),
+            **random_wave_parameters(n),
+        }
+
     def get_data(self) -> pd.DataFrame:
+        return self.get_batch().to_pandas()
+
+    def get_batch(self) -> ColumnarBatch:
         # check current frame
         if self._cur_frame >= self.nrows:
             if self.loopback:
                 self._cur_frame = 0
             else:
                 logger.warning("NewYorkSmartGridStreamGenerator: Reached the end of the data stream and loopback is set to False. Returning an empty DataFrame.")
-                return pd.DataFrame()
+                return ColumnarBatch({})
         # check the current time
         if self.end_time and self.current_time >= self.end_time:
             logger.warning("NewYorkSmartGridStreamGenerator: Reached the end time. Returning an empty DataFrame.")
-            return pd.DataFrame()
-        
-        # Generate a DataFrame with random data for the New York Smart Grid
-        data = []
-        for i, station in enumerate(self._cache.values()):
-            timestamp = self.current_time + timedelta(seconds=(self.interval / self.num_stations) * i)
-            power_level = (station["power_seed"] + station["power_wave"][self._cur_frame]) * 10000           # power in mega watts
-            battery_level = station["battery_wave"][self._cur_frame]               # battery level in kilo watts
-            voltage = random.uniform(110, 120)
-            current = power_level / voltage
-            power_factor = random.uniform(0.8, 1.0)
-            battery_soc = 60 + battery_level
-            batter_charge_rate = random.uniform(-10, 10)
-            renewable_power_generation = station["battery_seed"] + (battery_level * 1000)  # renewable power in watts
-            transformer_temperature = station["temperature_wave"][self._cur_frame]
-            # check if station is in fault mode. fault duration is random between 10 and 100 frames
-            if station["fault"] > 0:
-                power_level = 0
-                voltage = 0
-                current = 0
-                power_factor = 0
-                # battery_level = 0
-                batter_charge_rate = 0
-                # renewable_power_generation = 0
-                # transformer_temperature = 0
-                station["fault"] -= 1
-            else:
-                # introduce a fault randomly for a duration of 10 to 100 frames
-                if random.random() < 0.01:
-                    station["fault"] = random.randint(10, 100)
-            # create a row of data
-            row = {
-                "timestamp": timestamp,
-                "station_name": station["name"],
-                "latitude": station["lat"],
-                "longitude": station["lon"],
-                "status": "fault" if station["fault"] > 0 else "normal",
-                "energy_consumption": power_level,
-                "voltage": voltage,
-                "current": current,
-                "power_factor": power_factor,
-                "battery_soc": battery_soc,  # State of Charge
-                "battery_charge_rate": batter_charge_rate,  # Charge rate
-                "renewable_power_generation": renewable_power_generation,  # Renewable power
-                "transformer_temperature": transformer_temperature,  # Transformer temperature
-            }
-            data.append(row)
+            return ColumnarBatch({})
+
+        # Generate the frame for all stations in a single vectorized pass
+        cache = self._cache
+        n = self.num_stations
+        frame = self._cur_frame
+        # station timestamps are staggered evenly across the interval
+        offsets = (np.arange(n) * (self.interval / n * 1e9)).astype("timedelta64[ns]")
+        timestamp = pd.Timestamp(self.current_time).to_datetime64().astype("datetime64[ns]") + offsets
+        power_level = (cache["power_seed"] + cache["power_wave"].at(frame)) * 10000       # power in mega watts
+        battery_level = cache["battery_wave"].at(frame)                                   # battery level in kilo watts
+        voltage = np.random.uniform(110, 120, size=n)
+        current = power_level / voltage
+        power_factor = np.random.uniform(0.8, 1.0, size=n)
+        battery_soc = 60 + battery_level
+        battery_charge_rate = np.random.uniform(-10, 10, size=n)
+        renewable_power_generation = cache["battery_seed"] + (battery_level * 1000)      # renewable power in watts
+        transformer_temperature = cache["temperature_wave"].at(frame)
+        # stations in fault mode report zero power. fault duration is random between 10 and 100 frames
+        fault = cache["fault"]
+        in_fault = fault > 0
+        power_level[in_fault] = 0
+        voltage[in_fault] = 0
+        current[in_fault] = 0
+        power_factor[in_fault] = 0
+        battery_charge_rate[in_fault] = 0
+        fault[in_fault] -= 1
+        # introduce a fault randomly for a duration of 10 to 100 frames
+        new_fault = ~in_fault & (np.random.random(size=n) < 0.01)
+        fault[new_fault] = np.random.randint(10, 101, size=int(new_fault.sum()))
+        status = np.where(fault > 0, "fault", "normal").astype(object)
         # advance the time and frame
         self.current_time += timedelta(seconds=self.interval)
         self._cur_frame += 1
-        # return the data as a DataFrame
-        return pd.DataFrame(data)
+        return ColumnarBatch({
+            "timestamp": timestamp,
+            "station_name": cache["name"],
+            "latitude": cache["lat"],
+            "longitude": cache["lon"],
+            "status": status,
+            "energy_consumption": power_level,
+            "voltage": voltage,
+            "current": current,
+            "power_factor": power_factor,
+            "battery_soc": battery_soc,                                 # State of Charge
+            "battery_charge_rate": battery_charge_rate,                 # Charge rate
+            "renewable_power_generation": renewable_power_generation,   # Renewable power
+            "transformer_temperature": transformer_temperature,         # Transformer temperature
+        }, schema=self.schema)
 
     @property
     def schema(self) -> dict:
@@ -0,0 +1,111 @@
+"""
+stations.py
+
+This module generates synthetic station topologies for the smart grid generators. A topology is a struct of arrays
+(one entry per station) holding the station names, coordinates and the per-station wave parameters used to simulate
+the station readings. Topologies are deterministic for a given seed and are stored compactly (float32 coordinates and
+phases, small integer period counts and one interned string per name) so they scale to millions of stations.
+
+Functions:
+    procedural_stations(num_stations: int, seed: int = 42, bbox: tuple = NEW_YORK_BBOX, anchors: tuple = None, jitter: float = 0.01) -> dict[str, np.ndarray]:
+        Generate a deterministic synthetic topology of `num_stations` stations.
+
+    random_wave_parameters(num_stations: int, rng: np.random.Generator = None) -> dict[str, np.ndarray]:
+        Draw the per-station wave parameters of a topology.
+"""
+
+import sys
+import numpy as np
+
+
+__all__ = [
+    "NEW_YORK_BBOX",
+    "procedural_stations",
+    "random_wave_parameters",
+    ]
+
+
+# bounding box of New York City: (min_lat, min_lon, max_lat, max_lon)
+NEW_YORK_BBOX: tuple[float, float, float, float] = (40.4774, -74.2591, 40.9176, -73.7004)
+
+STREET_NAMES: list[str] = [
+    "Broadway", "Amsterdam", "Lexington", "Madison", "Park", "Columbus", "Canal", "Houston", "Delancey", "Bowery",
+    "Fulton", "Chambers", "Atlantic", "Flatbush", "Myrtle", "Nostrand", "Utica", "Jamaica", "Queens", "Steinway",
+    "Ditmars", "Astoria", "Roosevelt", "Junction", "Fordham", "Tremont", "Jerome", "Pelham", "Westchester", "Gun Hill",
+    "Court", "Hoyt", "Bergen", "Church", "Cortelyou", "Kings", "Ocean", "Coney Island", "Rockaway", "Hillside",
+]
+
+STATION_KINDS: list[str] = ["Substation", "Feeder", "Transformer", "Switchyard", "Microgrid", "Terminal"]
+
+
+def random_wave_parameters(num_stations: int, rng: np.random.Generator = None) -> dict[str, np.ndarray]:
+    """
+    Draw the per-station wave parameters of a smart grid topology.
+
+    Args:
+        num_stations (int): The number of stations.
+        rng (np.random.Generator): The random generator to draw from. Defaults to the global NumPy random state, so `seed()` applies.
+
+    Returns:
+        dict[str, np.ndarray]: Period counts, phases and base levels of the power, battery and temperature waves.
+    """
+    if rng is None:
+        integers, uniform = np.random.randint, np.random.uniform
+    else:
+        integers, uniform = rng.integers, rng.uniform
+    return {
+        "power_periods": integers(2, 8, size=num_stations).astype(np.uint8),
+        "power_phase": uniform(0.5, 2 * np.pi, size=num_stations).astype(np.float32),
+        "battery_periods": integers(1, 6, size=num_stations).astype(np.uint8),
+        "battery_phase": uniform(0, 2 * np.pi, size=num_stations).astype(np.float32),
+        "temperature_periods": integers(1, 11, size=num_stations).astype(np.uint8),
+        "temperature_phase": uniform(0, 2 * np.pi, size=num_stations).astype(np.float32),
+        "power_seed": integers(10_000, 15_001, size=num_stations).astype(np.int32),
+        "battery_seed": integers(8_000, 12_001, size=num_stations).astype(np.int32),
+    }
+
+
+def procedural_stations(
+        num_stations: int,
+        seed: int = 42,                                                     # seed: The topology seed. The same seed always produces the same stations.
+        bbox: tuple[float, float, float, float] = NEW_YORK_BBOX,            # bbox: (min_lat, min_lon, max_lat, max_lon) the stations are clipped to.
+        anchors: tuple[np.ndarray, np.ndarray] = None,                      # anchors: Optional (lat, lon) arrays the stations are clustered around. Defaults to uniform placement in bbox.
+        jitter: float = 0.01,                                               # jitter: Standard deviation in degrees of the offset from the anchor.
+        ) -> dict[str, np.ndarray]:
+    """
+    Generate a deterministic synthetic station topology.
+
+    Each station is placed at a jittered offset from a randomly picked anchor (e.g. a real subway stop) and clipped to
+    the bounding box, so high-cardinality topologies keep a realistic spatial distribution. Names are composed from a
+    small vocabulary plus the station number, e.g. "Canal Feeder 000123".
+
+    Returns:
+        dict[str, np.ndarray]: 'name' (object), 'lat' and 'lon' (float32) plus the wave parameters of random_wave_parameters().
+    """
+    rng = np.random.default_rng(seed)
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if anchors is None:
+        lat = rng.uniform(min_lat, max_lat, size=num_stations)
+        lon = rng.uniform(min_lon, max_lon, size=num_stations)
+    else:
+        anchor_lat, anchor_lon = (np.asarray(a, dtype=np.float64) for a in anchors)
+        anchor_idx = rng.integers(0, len(anchor_lat), size=num_stations)
+        lat = anchor_lat[anchor_idx] + rng.normal(0, jitter, size=num_stations)
+        lon = anchor_lon[anchor_idx] + rng.normal(0, jitter, size=num_stations)
+    lat = np.clip(lat, min_lat, max_lat).astype(np.float32)
+    lon = np.clip(lon, min_lon, max_lon).astype(np.float32)
+    # compose the names from small street and kind vocabularies. Every name is a new string, since the station number
+    # makes it unique; it is interned so topologies built again with the same seed reuse the same name objects
+    streets = rng.integers(0, len(STREET_NAMES), size=num_stations)
+    kinds = rng.integers(0, len(STATION_KINDS), size=num_stations)
+    prefixes = [f"{street} {kind}" for street in STREET_NAMES for kind in STATION_KINDS]
+    prefix_idx = (streets * len(STATION_KINDS) + kinds).tolist()
+    width = max(6, len(str(num_stations)))
+    names = np.empty(num_stations, dtype=object)
+    names[:] = [sys.intern(f"{prefixes[p]} {i:0{width}d}") for i, p in enumerate(prefix_idx)]
+    return {
+        "name": names,
+        "lat": lat,
+        "lon": lon,
+        **random_wave_parameters(num_stations, rng=rng),
+    }
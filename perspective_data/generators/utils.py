@@ -106,8 +106,8 @@ class RandomWaveGenerator:
         parts = np.random.rand(periods)
         parts /= parts.sum()
         parts *= num_points
-        parts = np.round(parts).astype(int)
-        # Adjust the last element to ensure the sum is exactly num_points
+        parts = np.floor(parts).astype(int)
+        # Adjust the last element to ensure the sum is exactly num_points. Flooring keeps the remainder non-negative
         parts[-1] += num_points - parts.sum()
         return parts.tolist()
 
@@ -384,3 +384,448 @@ class RandomWaveGenerator:
         fn = function_map[wave_mode][varying_mode]
         y = fn(num_points=num_points, periods=periods, amplitude=amplitude, phase=phase, smooth=smooth, noise=noise)
         return y
+
+    @staticmethod
+    def sinusoidal_wave_bank(
+        num_waves: int,                                     # Number of waves in the bank
+        num_points: int = 1000,                             # Number of data points of each wave before it repeats
+        periods: int | np.ndarray = 1,                      # Number of periods of each wave. An int or an array of num_waves ints
+        amplitude: float | tuple[float, float] | np.ndarray = 1.0,  # Amplitude of the waves. A float, a (low, high) tuple, or an array of per-wave (num_waves,) amplitudes / (num_waves, 2) ranges
+        wave_mode: str = "full",                            # Wave mode (default is "full"). Values: "full", "half"
+        varying_mode: str = "both",                         # Varying mode for amplitude and frequency (default is "both"). Values: "fixed", "amp", "freq", "both"
+        phase: float | np.ndarray = 0.0,                    # Phase shift of each wave. A float or an array of num_waves floats
+        smooth: int = None,                                 # Smoothing factor for the waves (default is None)
+        noise: float = None,                                # Noise level to add to the waves (default is None)
+        offset: float = 0.0,                                # Constant offset added to the waves (default is 0.0)
+        ) -> 'SegmentedWaveBank':
+        """
+        Generate a bank of sinusoidal waves that are evaluated on demand instead of materialized.
+
+        The waves follow the same shape rules as sinusoidal_wave(), but only their segment boundaries, amplitudes and
+        phases are stored, so memory is O(num_waves * periods) regardless of num_points.
+
+        Returns:
+        SegmentedWaveBank: The wave bank. Use bank.at(index) or bank.evaluate(indices) to read values.
+        """
+        if wave_mode not in ["full", "half"]:
+            logger.warning("Invalid wave_mode. Valid values are 'full' or 'half'. Set to 'full'.")
+            wave_mode = "full"
+        amplitude = RandomWaveGenerator._amplitude_ranges(num_waves, amplitude, varying_mode)
+        return SegmentedWaveBank.random(
+            num_waves=num_waves,
+            num_points=num_points,
+            periods=periods,
+            amplitude=amplitude,
+            wave_mode=wave_mode,
+            random_lengths=varying_mode in ["freq", "both"],
+            phase=phase,
+            smooth=smooth,
+            noise=noise,
+            offset=offset,
+            )
+
+    @staticmethod
+    def sinusoidal_waves(
+        num_waves: int,                                     # Number of waves (rows of the output matrix)
+        num_points: int = 1000,                             # Number of data points of each wave (columns of the output matrix)
+        periods: int | np.ndarray = 1,                      # Number of periods of each wave. An int or an array of num_waves ints
+        amplitude: float | tuple[float, float] | np.ndarray = 1.0,  # Amplitude of the waves. A float, a (low, high) tuple, or an array of per-wave (num_waves,) amplitudes / (num_waves, 2) ranges
+        wave_mode: str = "full",                            # Wave mode (default is "full"). Values: "full", "half"
+        varying_mode: str = "both",                         # Varying mode for amplitude and frequency (default is "both"). Values: "fixed", "amp", "freq", "both"
+        phase: float | np.ndarray = 0.0,                    # Phase shift of each wave. A float or an array of num_waves floats
+        smooth: int = None,                                 # Smoothing factor for the waves (default is None)
+        noise: float = None,                                # Noise level to add to the waves (default is None)
+        offset: float = 0.0,                                # Constant offset added to the waves (default is 0.0)
+        dtype: np.dtype = np.float64,                       # Output dtype, e.g. np.float32 (default is np.float64)
+        out: np.ndarray = None,                             # Optional (num_waves, num_points) buffer to write the waves into
+        ) -> np.ndarray:
+        """
+        Generate a (num_waves, num_points) matrix of sinusoidal waves in one vectorized pass.
+
+        Each row follows the same rules as sinusoidal_wave() with its own periods, amplitude range and phase, but all
+        rows are synthesized together with NumPy instead of one pandas Series per period.
+
+        Returns:
+        np.ndarray: The wave matrix (out, if it was given).
+        """
+        bank = RandomWaveGenerator.sinusoidal_wave_bank(
+            num_waves, num_points=num_points, periods=periods, amplitude=amplitude, wave_mode=wave_mode, varying_mode=varying_mode,
+            phase=phase, smooth=smooth, noise=noise, offset=offset,
+            )
+        return bank.materialize(dtype=dtype, out=out)
+
+    @staticmethod
+    def sinusoidal_wave_stream(
+        num_waves: int = 1,                                 # Number of waves generated side by side
+        period_length: int | tuple[int, int] = 100,         # Number of points of each segment. An int (fixed frequency) or a (min, max) range (varying frequency)
+        amplitude: float | tuple[float, float] = 1.0,       # Amplitude of the segments. A float or a (low, high) range
+        wave_mode: str = "full",                            # Wave mode (default is "full"). Values: "full", "half"
+        phase: float | np.ndarray = 0.0,                    # Phase shift of the envelope of each wave
+        envelope_period: int = None,                        # Number of points of the phase envelope (default is None: no envelope)
+        smooth: int = None,                                 # Smoothing factor for the waves (default is None)
+        noise: float = None,                                # Noise level to add to the waves (default is None)
+        offset: float = 0.0,                                # Constant offset added to the waves (default is 0.0)
+        seed: int = None,                                   # Seed of the stream. Defaults to a seed drawn from the global NumPy random state
+        ) -> 'WaveStream':
+        """
+        Create an incremental wave source that emits the next chunk of samples on every call. See WaveStream.
+        """
+        if wave_mode not in ["full", "half"]:
+            logger.warning("Invalid wave_mode. Valid values are 'full' or 'half'. Set to 'full'.")
+            wave_mode = "full"
+        return WaveStream(num_waves=num_waves, period_length=period_length, amplitude=amplitude, wave_mode=wave_mode, phase=phase,
+                          envelope_period=envelope_period, smooth=smooth, noise=noise, offset=offset, seed=seed)
+
+    @staticmethod
+    def _amplitude_ranges(num_waves: int, amplitude: float | tuple[float, float] | np.ndarray, varying_mode: str) -> np.ndarray:
+        # normalize the amplitude argument to a (num_waves, 2) array of (low, high) ranges. The kind of argument is
+        # decided by its type, not its shape: a tuple is one range for all waves, an array holds one entry per wave
+        if isinstance(amplitude, np.ndarray):
+            amplitude = amplitude.astype(np.float64)
+            if amplitude.shape == (num_waves,):
+                amplitude = np.stack([amplitude, amplitude], axis=1)
+            elif amplitude.shape != (num_waves, 2):
+                raise ValueError(f"Invalid amplitude shape: {amplitude.shape}. Per-wave amplitudes are ({num_waves},) and per-wave ranges ({num_waves}, 2)")
+        else:
+            amplitude = np.asarray(amplitude, dtype=np.float64)
+            if amplitude.ndim == 0:
+                amplitude = np.array([amplitude, amplitude])
+            elif amplitude.shape != (2,):
+                raise ValueError(f"Invalid amplitude: {amplitude.tolist()}. Use a float, a (low, high) tuple or a NumPy array of per-wave amplitudes")
+            amplitude = np.broadcast_to(amplitude, (num_waves, 2))
+        if varying_mode in ["fixed", "freq"]:
+            # the amplitude is fixed to the lower bound of the range
+            amplitude = np.stack([amplitude[:, 0], amplitude[:, 0]], axis=1)
+        return amplitude
+
+
+class SegmentedWaveBank:
+    """
+    An analytic representation of a bank of segmented sinusoidal waves.
+
+    Every wave is a sequence of segments. Segment k of wave w starts at starts[w, k], spans lengths[w, k] points and
+    holds one full sine period ("full" mode) or one half period with alternating sign ("half" mode) of amplitude
+    amplitudes[w, k]. Values are computed on demand for any frame index, so the memory is independent of the number
+    of points and long (or effectively infinite) streams start instantly. Indices past num_points wrap around.
+
+    Args:
+        starts (np.ndarray): (num_waves, num_segments) segment start indices. Unused segments start at num_points.
+        lengths (np.ndarray): (num_waves, num_segments) segment lengths. Unused segments have length 0.
+        amplitudes (np.ndarray): (num_waves, num_segments) segment amplitudes.
+        num_points (int): The number of points of each wave before it repeats.
+        wave_mode (str): "full" or "half". Default is "full".
+        phase (np.ndarray): Optional (num_waves,) phase shifts. A wave with a non-zero phase is modulated by sin(2*pi*i/(num_points-1) + phase).
+        smooth (int): Optional rolling-mean window applied to the waves.
+        noise (float): Optional standard deviation of the Gaussian noise added on every evaluation.
+        offset (float): Constant offset added to the waves. Default is 0.0.
+    """
+
+    def __init__(self,
+                 starts: np.ndarray,
+                 lengths: np.ndarray,
+                 amplitudes: np.ndarray,
+                 num_points: int,
+                 wave_mode: str = "full",
+                 phase: np.ndarray = None,
+                 smooth: int = None,
+                 noise: float = None,
+                 offset: float = 0.0,
+                 ) -> None:
+        # segment positions are below num_points, so they fit in int32 unless a wave is longer than 2**31 points
+        index_dtype = np.int32 if num_points <= np.iinfo(np.int32).max else np.int64
+        self.starts: np.ndarray = np.asarray(starts, dtype=index_dtype)
+        self.lengths: np.ndarray = np.asarray(lengths, dtype=index_dtype)
+        self.amplitudes: np.ndarray = np.asarray(amplitudes, dtype=np.float32)
+        self.num_points: int = int(num_points)
+        self.wave_mode: str = wave_mode
+        self.phase: np.ndarray = None if phase is None else np.asarray(phase, dtype=np.float64)
+        self.smooth: int = smooth
+        self.noise: float = noise
+        self.offset: float = offset
+
+    @property
+    def num_waves(self) -> int:
+        return self.starts.shape[0]
+
+    @staticmethod
+    def random(
+        num_waves: int,
+        num_points: int,
+        periods: int | np.ndarray = 1,
+        amplitude: tuple[float, float] | np.ndarray = (1.0, 1.0),
+        wave_mode: str = "full",
+        random_lengths: bool = True,
+        phase: float | np.ndarray = 0.0,
+        smooth: int = None,
+        noise: float = None,
+        offset: float = 0.0,
+        ) -> 'SegmentedWaveBank':
+        """
+        Draw the segments of num_waves random waves. Segment lengths are random (random_lengths=True) or equal, and
+        segment amplitudes are drawn uniformly from the amplitude range (shared, or one (low, high) row per wave).
+        Uses the global NumPy random state.
+        """
+        periods = np.broadcast_to(np.asarray(periods, dtype=np.int64), (num_waves,))
+        periods = np.clip(periods, 1, None)
+        num_segments = int(periods.max()) if num_waves else 1
+        used = np.arange(num_segments)[None, :] < periods[:, None]
+        last = (np.arange(num_waves), periods - 1)
+        if random_lengths:
+            # random parts that sum up to num_points, see RandomWaveGenerator._random_parts
+            weights = np.random.rand(num_waves, num_segments) * used
+            weights /= weights.sum(axis=1, keepdims=True)
+            lengths = np.floor(weights * num_points).astype(np.int64)
+        else:
+            # equal parts, see RandomWaveGenerator._equals_parts
+            lengths = np.where(used, num_points // periods[:, None], 0).astype(np.int64)
+        # the last used segment takes the remainder so every wave spans exactly num_points
+        lengths[last] += num_points - lengths.sum(axis=1)
+        starts = np.cumsum(lengths, axis=1) - lengths
+        # amplitude is a (low, high) range shared by all waves, or a (num_waves, 2) array of per-wave ranges
+        amplitude = np.broadcast_to(np.asarray(amplitude, dtype=np.float64), (num_waves, 2))
+        amplitudes = np.random.uniform(amplitude[:, :1], amplitude[:, 1:], size=(num_waves, num_segments)) * used
+        phase = np.broadcast_to(np.asarray(phase, dtype=np.float64), (num_waves,))
+        return SegmentedWaveBank(starts, lengths, amplitudes, num_points, wave_mode=wave_mode, phase=phase if phase.any() else None, smooth=smooth, noise=noise, offset=offset)
+
+    def at(self, index: int, dtype: np.dtype = np.float64) -> np.ndarray:
+        """Return the (num_waves,) values of every wave at frame `index`."""
+        return self.evaluate(np.array([index]), dtype=dtype)[:, 0]
+
+    def evaluate(self, indices: np.ndarray, dtype: np.dtype = np.float64, out: np.ndarray = None) -> np.ndarray:
+        """
+        Return the (num_waves, len(indices)) values of every wave at the given frame indices.
+
+        Args:
+            indices (np.ndarray): The frame indices. Indices past num_points wrap around.
+            dtype (np.dtype): The output dtype. Default is float64.
+            out (np.ndarray): Optional (num_waves, len(indices)) buffer to write the values into.
+        """
+        indices = np.asarray(indices, dtype=np.int64) % self.num_points
+        if self.smooth and self.smooth > 1:
+            # rolling mean over the previous `smooth` points; the first smooth-1 points of a wave are 0, like rolling().mean().fillna(0)
+            values = sum(self._raw(indices - k) for k in range(self.smooth)) / self.smooth
+            values[:, indices < self.smooth - 1] = 0
+        else:
+            values = self._raw(indices)
+        if self.noise:
+            values += np.random.normal(0, self.noise, size=values.shape)
+        if self.offset:
+            values += self.offset
+        if out is None:
+            return values.astype(dtype, copy=False)
+        out[...] = values
+        return out
+
+    def materialize(self, dtype: np.dtype = np.float64, out: np.ndarray = None, block_points: int = 1 << 22) -> np.ndarray:
+        """
+        Return the full (num_waves, num_points) matrix of the bank.
+
+        Rows are synthesized in blocks of about block_points values: every point is mapped to its segment with
+        np.repeat over the segment lengths, so no (waves x points x segments) temporaries are needed.
+
+        Args:
+            dtype (np.dtype): The output dtype. Default is float64.
+            out (np.ndarray): Optional (num_waves, num_points) buffer to write the matrix into.
+            block_points (int): The approximate number of values synthesized per block.
+        """
+        num_waves, num_segments, num_points = self.num_waves, self.starts.shape[1], self.num_points
+        if out is None:
+            out = np.empty((num_waves, num_points), dtype=dtype)
+        elif out.shape != (num_waves, num_points):
+            raise ValueError(f"out must have shape {(num_waves, num_points)}, got {out.shape}")
+        # synthesize in the precision of the output: float32 output is computed in float32
+        work = np.float32 if np.dtype(out.dtype) == np.float32 else np.float64
+        cycles = np.pi if self.wave_mode == "half" else 2 * np.pi
+        signs = np.where(np.arange(num_segments) % 2 == 0, 1.0, -1.0) if self.wave_mode == "half" else np.ones(num_segments)
+        rows_per_block = max(1, block_points // max(num_points, 1))
+        for first in range(0, num_waves, rows_per_block):
+            rows = slice(first, min(first + rows_per_block, num_waves))
+            nrows = rows.stop - rows.start
+            lengths = self.lengths[rows].ravel()
+            # per-segment constants are expanded to every point of the segment with np.repeat; segments are contiguous
+            segment_start = (self.starts[rows] + (np.arange(nrows) * num_points)[:, None]).ravel()
+            angle = (np.arange(nrows * num_points) - np.repeat(segment_start, lengths)).astype(work)
+            angle *= np.repeat((cycles / np.maximum(lengths - 1, 1)).astype(work), lengths)
+            values = np.sin(angle, out=angle)
+            values *= np.repeat((self.amplitudes[rows] * signs).ravel().astype(work), lengths)
+            values = values.reshape(nrows, num_points)
+            if self.phase is not None:
+                phase = self.phase[rows, None]
+                envelope = np.sin(2 * np.pi * np.arange(num_points)[None, :] / max(num_points - 1, 1) + phase)
+                values *= np.where(phase != 0, envelope, 1.0).astype(work)
+            if self.smooth and self.smooth > 1:
+                # rolling mean with a zero-padded head, like rolling().mean().fillna(0)
+                window = self.smooth
+                cumsum = np.cumsum(values, axis=1, dtype=np.float64)
+                smoothed = np.zeros(values.shape, dtype=work)
+                smoothed[:, window - 1:] = cumsum[:, window - 1:]
+                smoothed[:, window:] -= cumsum[:, :-window]
+                smoothed /= window
+                values = smoothed
+            if self.noise:
+                values += np.random.normal(0, self.noise, size=values.shape).astype(work)
+            if self.offset:
+                values += work(self.offset)
+            out[rows] = values
+        return out
+
+    def _raw(self, indices: np.ndarray) -> np.ndarray:
+        # segment of every (wave, index): the last segment starting at or before the index
+        segment = (self.starts[:, None, :] <= indices[None, :, None]).sum(axis=2) - 1
+        segment = np.clip(segment, 0, None)
+        starts = np.take_along_axis(self.starts, segment, axis=1)
+        lengths = np.take_along_axis(self.lengths, segment, axis=1)
+        amplitudes = np.take_along_axis(self.amplitudes, segment, axis=1).astype(np.float64)
+        # position within the segment, mapped like np.linspace(0, period, length)
+        x = (indices[None, :] - starts) / np.maximum(lengths - 1, 1)
+        if self.wave_mode == "half":
+            values = np.where(segment % 2 == 0, 1.0, -1.0) * amplitudes * np.sin(np.pi * x)
+        else:
+            values = amplitudes * np.sin(2 * np.pi * x)
+        if self.phase is not None:
+            # phase modulation like RandomWaveGenerator._apply_phase; waves without a phase are left untouched
+            envelope = np.sin(2 * np.pi * indices[None, :] / max(self.num_points - 1, 1) + self.phase[:, None])
+            values *= np.where(self.phase[:, None] != 0, envelope, 1.0)
+        # indices before the first point (smoothing look-back) have no value
+        values[:, indices < 0] = 0
+        return values
+
+
+class WaveStream:
+    """
+    A stateful, incremental source of segmented sinusoidal waves.
+
+    Every call to next(n) returns the next n samples of each of the num_waves waves. All the state that shapes the
+    waves is carried across calls: the position within the current segment, the segment amplitudes and signs, the
+    phase envelope, the noise generator and the smoothing window. Concatenating the chunks therefore gives exactly the
+    same samples as a single call of the total size, with no seams at chunk boundaries and no full-length buffers.
+
+    Segments never repeat: the length and amplitude of segment k of wave w are derived from a hash of
+    (seed, w, k), so the stream is deterministic for a seed and can run indefinitely in constant memory.
+
+    Args:
+        num_waves (int): Number of waves generated side by side. Default is 1.
+        period_length (int | tuple[int, int]): Points per segment, fixed or drawn from a (min, max) range. Default is 100.
+        amplitude (float | tuple[float, float]): Segment amplitude, fixed or drawn from a (low, high) range. Default is 1.0.
+        wave_mode (str): "full" (one sine period per segment) or "half" (half periods with alternating sign). Default is "full".
+        phase (float | np.ndarray): Phase of the envelope sin(2*pi*t/envelope_period + phase), per wave. Default is 0.0.
+        envelope_period (int): Points per envelope period. Default is None (no envelope).
+        smooth (int): Rolling-mean window. The first smooth-1 samples of the stream are 0. Default is None.
+        noise (float): Standard deviation of the Gaussian noise. Default is None.
+        offset (float): Constant offset added to the waves. Default is 0.0.
+        seed (int): Seed of the stream. Defaults to a seed drawn from the global NumPy random state.
+    """
+
+    def __init__(self,
+                 num_waves: int = 1,
+                 period_length: int | tuple[int, int] = 100,
+                 amplitude: float | tuple[float, float] = 1.0,
+                 wave_mode: str = "full",
+                 phase: float | np.ndarray = 0.0,
+                 envelope_period: int = None,
+                 smooth: int = None,
+                 noise: float = None,
+                 offset: float = 0.0,
+                 seed: int = None,
+                 ) -> None:
+        self.num_waves: int = num_waves
+        self.period_length: tuple[int, int] = period_length if isinstance(period_length, tuple) else (period_length, period_length)
+        self.amplitude: tuple[float, float] = amplitude if isinstance(amplitude, tuple) else (amplitude, amplitude)
+        self.wave_mode: str = wave_mode
+        self.phase: np.ndarray = np.broadcast_to(np.asarray(phase, dtype=np.float64), (num_waves,))
+        self.envelope_period: int = envelope_period
+        self.smooth: int = smooth if smooth and smooth > 1 else None
+        self.noise: float = noise
+        self.offset: float = offset
+        self.seed: int = int(np.random.randint(0, 2**31)) if seed is None else seed
+        self.reset()
+
+    def reset(self) -> None:
+        """Rewind the stream to its first sample."""
+        waves = np.arange(self.num_waves)
+        self.position: int = 0                                                      # number of samples emitted so far
+        self._segment: np.ndarray = np.zeros(self.num_waves, dtype=np.int64)       # segment counter of every wave
+        self._segment_pos: np.ndarray = np.zeros(self.num_waves, dtype=np.int64)   # position within the current segment
+        self._segment_len, self._segment_amp = self._draw_segments(waves, self._segment)
+        self._noise_rng: np.random.Generator = np.random.default_rng(self.seed)
+        self._smooth_tail: np.ndarray = np.zeros((self.num_waves, (self.smooth or 1) - 1))
+
+    def next(self, n: int, dtype: np.dtype = np.float64) -> np.ndarray:
+        """Return the next (num_waves, n) samples of the stream."""
+        values = self._next_raw(n)
+        # phase envelope over the absolute sample position
+        if self.envelope_period:
+            t = self.position + np.arange(n)
+            values *= np.sin(2 * np.pi * t[None, :] / self.envelope_period + self.phase[:, None])
+        if self.smooth:
+            values = self._apply_smooth(values)
+        if self.noise:
+            # noise is drawn time-major, so the draws don't depend on how the stream is chunked
+            values += self._noise_rng.normal(0, self.noise, size=(n, self.num_waves)).T
+        if self.offset:
+            values += self.offset
+        self.position += n
+        return values.astype(dtype, copy=False)
+
+    def _next_raw(self, n: int) -> np.ndarray:
+        out = np.empty((self.num_waves, n))
+        filled = np.zeros(self.num_waves, dtype=np.int64)
+        cycles = np.pi if self.wave_mode == "half" else 2 * np.pi
+        # every round fills each wave up to the end of its current segment (or of the chunk), then starts new segments
+        while True:
+            active = np.flatnonzero(filled < n)
+            if active.size == 0:
+                break
+            take = np.minimum(n - filled[active], self._segment_len[active] - self._segment_pos[active])
+            rows = np.repeat(active, take)
+            offsets = np.arange(take.sum()) - np.repeat(np.cumsum(take) - take, take)
+            segment_pos = np.repeat(self._segment_pos[active], take) + offsets
+            segment_len = np.repeat(self._segment_len[active], take)
+            amplitude = np.repeat(self._segment_amp[active], take)
+            if self.wave_mode == "half":
+                amplitude = amplitude * np.where(np.repeat(self._segment[active], take) % 2 == 0, 1.0, -1.0)
+            out[rows, np.repeat(filled[active], take) + offsets] = amplitude * np.sin(cycles * segment_pos / np.maximum(segment_len - 1, 1))
+            filled[active] += take
+            self._segment_pos[active] += take
+            # waves that reached the end of their segment move on to the next one
+            ended = active[self._segment_pos[active] >= self._segment_len[active]]
+            if ended.size:
+                self._segment[ended] += 1
+                self._segment_pos[ended] = 0
+                self._segment_len[ended], self._segment_amp[ended] = self._draw_segments(ended, self._segment[ended])
+        return out
+
+    def _apply_smooth(self, values: np.ndarray) -> np.ndarray:
+        # rolling mean over the carried tail of the previous chunk plus the new samples
+        window = self.smooth
+        extended = np.concatenate([self._smooth_tail, values], axis=1)
+        cumsum = np.concatenate([np.zeros((self.num_waves, 1)), np.cumsum(extended, axis=1)], axis=1)
+        smoothed = (cumsum[:, window:] - cumsum[:, :-window]) / window
+        self._smooth_tail = extended[:, extended.shape[1] - (window - 1):]
+        # the first window-1 samples of the stream have an incomplete window, like rolling().mean().fillna(0)
+        head = window - 1 - self.position
+        if head > 0:
+            smoothed[:, :head] = 0
+        return smoothed
+
+    def _draw_segments(self, waves: np.ndarray, segments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        low, high = self.period_length
+        length = low + np.floor(self._hash_uniform(waves, segments, 0) * (high - low + 1)).astype(np.int64)
+        amplitude = self.amplitude[0] + self._hash_uniform(waves, segments, 1) * (self.amplitude[1] - self.amplitude[0])
+        return np.maximum(length, 1), amplitude
+
+    def _hash_uniform(self, waves: np.ndarray, segments: np.ndarray, stream: int) -> np.ndarray:
+        # counter-based uniform numbers in [0, 1): splitmix64 of (seed, stream, wave, segment)
+        with np.errstate(over="ignore"):
+            x = np.uint64(self.seed) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(stream)
+            x = _splitmix64(x ^ (np.asarray(waves, dtype=np.uint64) * np.uint64(0xD1B54A32D192ED03)))
+            x = _splitmix64(x ^ np.asarray(segments, dtype=np.uint64))
+        return (x >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
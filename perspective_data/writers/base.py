@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-import pandas as pd
+from ..columnar import DataBatch
 
 
 class DataWriter(ABC):
@@ -8,7 +8,7 @@ class DataWriter(ABC):
             setattr(self, key, value)
 
     @abstractmethod
-    def write(self, data: pd.DataFrame) -> None:
+    def write(self, data: DataBatch) -> None:
         pass
 
     @abstractmethod
@@ -24,3 +24,28 @@ class DataWriter(ABC):
     @abstractmethod
     def from_config(config: dict) -> 'DataWriter':
         pass
+
+
+
+class AsyncDataWriter(ABC):
+    def __init__(self, **kwargs) -> None:
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    @abstractmethod
+    async def write(self, data: DataBatch) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def required_parameters() -> dict[str, str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def from_config(config: dict) -> 'AsyncDataWriter':
+        pass
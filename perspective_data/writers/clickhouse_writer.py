@@ -0,0 +1,198 @@
+import clickhouse_connect
+import pyarrow as pa
+import timeit
+from .base import DataWriter
+from ..columnar import DataBatch, to_dataframe, to_record_batch
+from .timestamps import NAIVE_TIMEZONE, to_epochs
+from ..utils import logger
+
+
+# Generator.schema type names mapped to ClickHouse column types
+CLICKHOUSE_TYPES: dict[str, str] = {
+    "float": "Float64",
+    "float32": "Float32",
+    "int": "Int64",
+    "integer": "Int64",
+    "bool": "Bool",
+    "boolean": "Bool",
+    "str": "String",
+    "string": "String",
+    "datetime": "DateTime64(9)",
+    "datetime64[ns]": "DateTime64(9)",
+    "date": "Date32",
+}
+
+
+def _quote(name: str) -> str:
+    return "`" + name.replace("\\", "\\\\").replace("`", "\\`") + "`"
+
+
+def clickhouse_ddl(table: str,
+                   schema: dict,
+                   engine: str = "MergeTree()",
+                   order_by: list[str] = None,
+                   partition_by: str = None,
+                   low_cardinality_cols: list[str] = None,
+                   ) -> str:
+    """
+    Map a Generator.schema dict to a CREATE TABLE statement.
+
+    Args:
+        table (str): The table name, optionally qualified with the database ('db.table').
+        schema (dict): The Generator.schema of the batches.
+        engine (str): The table engine. Default is 'MergeTree()'.
+        order_by (list[str]): The sorting key. Default is None (the first datetime column, or no key).
+        partition_by (str): Optional partition expression, e.g. 'toYYYYMM(timestamp)'.
+        low_cardinality_cols (list[str]): String columns stored as LowCardinality(String), e.g. tickers or station names.
+
+    Returns:
+        str: The DDL statement. The table is only created if it does not exist.
+    """
+    low_cardinality_cols = low_cardinality_cols or []
+    columns = []
+    for col, type_name in schema.items():
+        if type_name not in CLICKHOUSE_TYPES:
+            raise ValueError(f"Unknown schema type: {type_name}")
+        column_type = CLICKHOUSE_TYPES[type_name]
+        if col in low_cardinality_cols:
+            if column_type != "String":
+                raise ValueError(f"LowCardinality column {col} must be a string column. Got: {type_name}")
+            column_type = "LowCardinality(String)"
+        columns.append(f"{_quote(col)} {column_type}")
+    if order_by is None:
+        order_by = [col for col, type_name in schema.items() if CLICKHOUSE_TYPES[type_name].startswith("DateTime")][:1]
+    table = ".".join(_quote(part) for part in table.split("."))
+    sql = f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)}) ENGINE = {engine}"
+    if partition_by:
+        sql += f" PARTITION BY {partition_by}"
+    sql += f" ORDER BY ({', '.join(_quote(col) for col in order_by)})"
+    return sql
+
+
+class ClickHouseWriter(DataWriter):
+    def __init__(self,
+                 table: str,
+                 host: str = "localhost",
+                 port: int = 8123,
+                 username: str = "default",
+                 password: str = "",
+                 database: str = "default",
+                 schema: dict = None,                           # schema: The Generator.schema of the batches. Used to create the table and to type the Arrow columns. Without it, the table must exist.
+                 create_table: bool = True,                     # create_table: Create the database and table if they don't exist.
+                 drop_table: bool = False,                      # drop_table: Drop the table before creating it.
+                 engine: str = "MergeTree()",                   # engine: The table engine of the created table.
+                 order_by: list[str] = None,                    # order_by: The sorting key of the created table. Default is the first datetime column.
+                 partition_by: str = None,                      # partition_by: Partition expression of the created table, e.g. 'toYYYYMM(timestamp)'.
+                 low_cardinality_cols: list[str] = None,        # low_cardinality_cols: String columns stored as LowCardinality(String).
+                 insert_format: str = "arrow",                  # insert_format: How batches are sent. 'arrow' (Arrow stream, default) or 'native' (clickhouse-connect's insert_df).
+                 async_insert: bool = False,                    # async_insert: Let the server buffer small inserts (async_insert=1) instead of creating one part per insert.
+                 wait_for_async_insert: bool = True,            # wait_for_async_insert: Async inserts. Wait until the server flushed the insert to the table.
+                 batch_rows: int = 0,                           # batch_rows: Buffer batches client-side and insert once this many rows are buffered. 0 inserts every batch.
+                 batch_bytes: int = 0,                          # batch_bytes: Buffer batches client-side and insert once they hold this many bytes. 0 disables the limit.
+                 settings: dict = None,                         # settings: Extra ClickHouse settings sent with every insert.
+                 client_options: dict = None,                   # client_options: Extra clickhouse_connect.get_client() arguments, e.g. {'compress': 'lz4'}.
+                 naive_timezone: str = NAIVE_TIMEZONE,          # naive_timezone: The timezone of naive datetimes: 'UTC', 'local' or a timezone name.
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        if insert_format not in ("arrow", "native"):
+            raise ValueError(f"Invalid insert_format: {insert_format}. Valid values are 'arrow' or 'native'.")
+        self.table = table
+        self.database = database
+        self.schema = schema
+        self.insert_format = insert_format
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.naive_timezone = naive_timezone
+        self.settings = dict(settings or {})
+        if async_insert:
+            self.settings.update({"async_insert": 1, "wait_for_async_insert": int(wait_for_async_insert)})
+        self._buffer: list[pa.RecordBatch] = []
+        self._buffered_rows = 0
+        self._buffered_bytes = 0
+        # insert statistics
+        self.inserts = 0
+        self.rows_inserted = 0
+        self.bytes_inserted = 0
+        self.insert_time = 0.0
+
+        # the database may not exist yet, so the client connects to the default one and every statement names the database
+        self.client = clickhouse_connect.get_client(host=host, port=port, username=username, password=password, **(client_options or {}))
+        if create_table:
+            if schema is None:
+                logger.warning(f"ClickHouseWriter::init - No schema given. Table {self.database}.{self.table} must already exist")
+            else:
+                self.client.command(f"CREATE DATABASE IF NOT EXISTS {_quote(self.database)}")
+                if drop_table:
+                    self.client.command(f"DROP TABLE IF EXISTS {_quote(self.database)}.{_quote(self.table)}")
+                self.client.command(clickhouse_ddl(f"{self.database}.{self.table}", schema, engine, order_by, partition_by, low_cardinality_cols))
+        logger.info(f"ClickHouseWriter::WriterInitiated: host={host}, port={port}, table={self.database}.{self.table}, format={self.insert_format}, async_insert={async_insert}")
+
+    def write(self, data: DataBatch) -> None:
+        if len(data) == 0:
+            return
+        batch = self._normalize_timestamps(to_record_batch(data, schema=self.schema))
+        self._buffer.append(batch)
+        self._buffered_rows += batch.num_rows
+        self._buffered_bytes += batch.nbytes
+        if self._buffered_rows >= self.batch_rows or (self.batch_bytes and self._buffered_bytes >= self.batch_bytes):
+            self.flush()
+
+    def _normalize_timestamps(self, batch: pa.RecordBatch) -> pa.RecordBatch:
+        # ClickHouse reads the values of naive Arrow timestamps as UTC instants: shift them from naive_timezone
+        if self.naive_timezone == "UTC":
+            return batch
+        for i, field in enumerate(batch.schema):
+            if pa.types.is_timestamp(field.type) and field.type.tz is None:
+                column = batch.column(i)
+                epochs = to_epochs(column.to_pandas(), field.type.unit, self.naive_timezone)
+                mask = column.is_null().to_numpy(zero_copy_only=False) if column.null_count else None
+                batch = batch.set_column(i, field, pa.array(epochs, type=field.type, mask=mask))
+        return batch
+
+    def flush(self) -> None:
+        """Insert the buffered batches as one columnar insert."""
+        if not self._buffer:
+            return
+        table = pa.Table.from_batches(self._buffer)
+        start_time = timeit.default_timer()
+        if self.insert_format == "arrow":
+            summary = self.client.insert_arrow(self.table, table, database=self.database, settings=self.settings)
+        else:
+            summary = self.client.insert_df(self.table, to_dataframe(table), database=self.database, settings=self.settings)
+        # the buffer is kept when the insert raises, so the next flush() or close() retries it
+        self._buffer, self._buffered_rows, self._buffered_bytes = [], 0, 0
+        duration = timeit.default_timer() - start_time
+        self.inserts += 1
+        self.rows_inserted += table.num_rows
+        self.bytes_inserted += table.nbytes
+        self.insert_time += duration
+        logger.debug(f"ClickHouseWriter::WriteBatch: rows={table.num_rows}, written_rows={summary.written_rows}, bytes={table.nbytes}, table={self.database}.{self.table}, time={duration * 1000:.3f} ms")
+
+    def stats(self) -> dict:
+        return {
+            "inserts": self.inserts,
+            "rows": self.rows_inserted,
+            "bytes": self.bytes_inserted,
+            "buffered_rows": self._buffered_rows,
+            "insert_time": self.insert_time,
+            "rows_per_second": self.rows_inserted / self.insert_time if self.insert_time else 0.0,
+        }
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            stats = self.stats()
+            logger.info(f"ClickHouseWriter::WriterClosed: table={self.database}.{self.table}, inserts={stats['inserts']}, rows={stats['rows']}, buffered_rows={stats['buffered_rows']}, rows_per_second={stats['rows_per_second']:.0f}")
+            self.client.close()
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "table": "str",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return ClickHouseWriter(**config)
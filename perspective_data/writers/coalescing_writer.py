@@ -0,0 +1,205 @@
+import bisect
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from .base import DataWriter
+from ..columnar import ColumnarBatch, DataBatch, concat_batches
+from ..utils import logger
+
+
+# default histogram bucket upper bounds: batch sizes in rows and added latencies in milliseconds
+ROW_BUCKETS: tuple[float, ...] = tuple(float(2 ** i) for i in range(21))
+LATENCY_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram. Every bucket counts the values up to its upper bound, the last one everything above.
+
+    Args:
+        bounds (tuple[float, ...]): The sorted bucket upper bounds.
+    """
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds: tuple[float, ...] = tuple(bounds)
+        self.counts: list[int] = [0] * (len(self.bounds) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = None
+        self.max: float = None
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding the q-th percentile (0-100), capped by the maximum seen."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+def batch_nbytes(data: DataBatch) -> int:
+    """Estimate the in-memory size of a batch. String columns of pandas frames count their pointers only."""
+    if isinstance(data, (pa.RecordBatch, pa.Table)):
+        return data.nbytes
+    if isinstance(data, ColumnarBatch):
+        return sum(values.nbytes for values in data.columns.values())
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=False).sum())
+    raise ValueError(f"Unsupported batch type: {type(data)}")
+
+
+class CoalescingWriter(DataWriter):
+    def __init__(self,
+                 writer: DataWriter,                            # writer: The writer the coalesced batches are handed to.
+                 max_rows: int = 10_000,                        # max_rows: Hand over the buffered frames once they hold this many rows.
+                 max_bytes: int = None,                         # max_bytes: Hand over the buffered frames once they hold this many bytes (estimated). Default is None (no limit).
+                 max_latency: float = 0.1,                      # max_latency: Hand over the buffered frames at the latest this many seconds after the oldest one arrived. None waits for max_rows/max_bytes.
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        if not max_rows and not max_bytes and not max_latency:
+            raise ValueError("At least one of max_rows, max_bytes or max_latency is required")
+        self.writer = writer
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        # the lock also serializes the hand-overs of write() and the latency timer, so batches keep their order
+        self._cond = threading.Condition()
+        self._frames: list[DataBatch] = []
+        self._arrivals: list[float] = []
+        self._rows = 0
+        self._bytes = 0
+        self._closing = False
+        # coalescing statistics
+        self.frames = 0
+        self.batches = 0
+        self.rows = 0
+        self.flush_reasons: dict[str, int] = {"rows": 0, "bytes": 0, "latency": 0, "flush": 0, "close": 0}
+        self.batch_rows = Histogram(ROW_BUCKETS)
+        self.frames_per_batch = Histogram(ROW_BUCKETS)
+        self.added_latency_ms = Histogram(LATENCY_BUCKETS)
+        self._timer = None
+        if self.max_latency:
+            self._timer = threading.Thread(target=self._timer_runner, name=f"CoalescingWriter-{type(writer).__name__}")
+            self._timer.daemon = True
+            self._timer.start()
+
+    def write(self, data: DataBatch) -> None:
+        if len(data) == 0:
+            return
+        with self._cond:
+            if not self._frames:
+                # wake the timer up for the new deadline
+                self._cond.notify_all()
+            self._frames.append(data)
+            self._arrivals.append(time.monotonic())
+            self._rows += len(data)
+            if self.max_bytes:
+                self._bytes += batch_nbytes(data)
+            self.frames += 1
+            if self.max_rows and self._rows >= self.max_rows:
+                self._flush("rows")
+            elif self.max_bytes and self._bytes >= self.max_bytes:
+                self._flush("bytes")
+
+    def flush(self) -> None:
+        """Hand the buffered frames over now."""
+        with self._cond:
+            self._flush("flush")
+
+    def _flush(self, reason: str) -> None:
+        # called with the lock held
+        if not self._frames:
+            return
+        frames, arrivals, rows = self._frames, self._arrivals, self._rows
+        self._frames, self._arrivals, self._rows, self._bytes = [], [], 0, 0
+        batch = concat_batches(frames)
+        now = time.monotonic()
+        latencies = (now - np.asarray(arrivals)) * 1000
+        try:
+            self.writer.write(batch)
+        finally:
+            self.batches += 1
+            self.rows += rows
+            self.flush_reasons[reason] += 1
+            self.batch_rows.add(rows)
+            self.frames_per_batch.add(len(frames))
+            for latency in latencies.tolist():
+                self.added_latency_ms.add(latency)
+            logger.debug(f"CoalescingWriter::WriteBatch: rows={rows}, frames={len(frames)}, reason={reason}, max_added_latency={latencies.max():.3f} ms, time={(time.monotonic() - now) * 1000:.3f} ms")
+
+    def _timer_runner(self) -> None:
+        with self._cond:
+            while not self._closing:
+                if not self._frames:
+                    self._cond.wait()
+                    continue
+                remaining = self._arrivals[0] + self.max_latency - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                try:
+                    self._flush("latency")
+                except Exception as e:
+                    # the batch is lost like a failed write() would lose it; the timer keeps running
+                    logger.error(f"CoalescingWriter::WriteFailed: writer={type(self.writer).__name__}, error={e}")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "frames": self.frames,
+                "batches": self.batches,
+                "rows": self.rows,
+                "buffered_frames": len(self._frames),
+                "buffered_rows": self._rows,
+                "flush_reasons": dict(self.flush_reasons),
+                "batch_rows": self.batch_rows.to_dict(),
+                "frames_per_batch": self.frames_per_batch.to_dict(),
+                "added_latency_ms": self.added_latency_ms.to_dict(),
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            self._flush("close")
+        if self._timer is not None:
+            self._timer.join()
+        logger.info(f"CoalescingWriter::WriterClosed: writer={type(self.writer).__name__}, frames={self.frames}, batches={self.batches}, rows={self.rows}, p99_added_latency={self.added_latency_ms.percentile(99):.3f} ms")
+        self.writer.close()
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "writer": "DataWriter",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return CoalescingWriter(**config)
@@ -0,0 +1,183 @@
+import sqlite3
+import time
+import timeit
+import pyarrow as pa
+import pyarrow.compute as pc
+from .base import DataWriter
+from ..columnar import DataBatch, to_record_batch
+from ..utils import logger
+
+
+# Generator.schema type names mapped to (DuckDB, SQLite) column types. SQLite stores datetimes as ISO 8601 text
+SQL_TYPES: dict[str, tuple[str, str]] = {
+    "float": ("DOUBLE", "REAL"),
+    "float32": ("FLOAT", "REAL"),
+    "int": ("BIGINT", "INTEGER"),
+    "integer": ("BIGINT", "INTEGER"),
+    "bool": ("BOOLEAN", "INTEGER"),
+    "boolean": ("BOOLEAN", "INTEGER"),
+    "str": ("VARCHAR", "TEXT"),
+    "string": ("VARCHAR", "TEXT"),
+    "datetime": ("TIMESTAMP", "TEXT"),
+    "datetime64[ns]": ("TIMESTAMP", "TEXT"),
+    "date": ("DATE", "TEXT"),
+}
+
+ENGINES: tuple[str, ...] = ("auto", "duckdb", "sqlite")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def create_table_sql(table: str, schema: dict, engine: str) -> str:
+    """Map a Generator.schema dict to a CREATE TABLE statement for DuckDB or SQLite."""
+    if engine not in ("duckdb", "sqlite"):
+        raise ValueError(f"Invalid engine: {engine}. Valid values are 'duckdb' or 'sqlite'.")
+    columns = []
+    for col, type_name in schema.items():
+        if type_name not in SQL_TYPES:
+            raise ValueError(f"Unknown schema type: {type_name}")
+        columns.append(f"{_quote(col)} {SQL_TYPES[type_name][0 if engine == 'duckdb' else 1]}")
+    return f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({', '.join(columns)})"
+
+
+def _sqlite_column(values: pa.ChunkedArray | pa.Array) -> list:
+    # one Python list per column. Datetimes become ISO 8601 text, which SQLite's date functions understand
+    if pa.types.is_timestamp(values.type):
+        values = pc.strftime(values, "%Y-%m-%dT%H:%M:%S")
+    elif pa.types.is_date(values.type):
+        values = pc.strftime(values, "%Y-%m-%d")
+    if values.null_count == 0 and (pa.types.is_integer(values.type) or pa.types.is_floating(values.type) or pa.types.is_boolean(values.type)):
+        # NumPy's tolist() is far cheaper than Arrow's to_pylist() for primitive columns
+        return values.to_numpy(zero_copy_only=False).tolist()
+    return values.to_pylist()
+
+
+class DuckDBWriter(DataWriter):
+    def __init__(self,
+                 database: str,                                 # database: The database file, or ':memory:'.
+                 table: str,
+                 schema: dict = None,                           # schema: The Generator.schema of the batches. Without it, the table is created from the first batch.
+                 engine: str = "auto",                          # engine: 'duckdb', 'sqlite' or 'auto' (DuckDB if it is installed, SQLite otherwise).
+                 create_table: bool = True,                     # create_table: Create the table if it does not exist.
+                 drop_table: bool = False,                      # drop_table: Drop the table before creating it.
+                 checkpoint_interval: float = None,             # checkpoint_interval: Checkpoint the write-ahead log into the database file every this many seconds.
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine: {engine}. Valid values are: {list(ENGINES)}")
+        if engine != "sqlite":
+            try:
+                import duckdb
+            except ImportError as e:
+                if engine == "duckdb":
+                    raise ImportError("The duckdb engine requires the duckdb package: pip install duckdb") from e
+                logger.warning("DuckDBWriter::init - duckdb is not installed. Falling back to sqlite3")
+                engine = "sqlite"
+            else:
+                engine = "duckdb"
+        self.database = database
+        self.table = table
+        self.schema = schema
+        self.engine = engine
+        self.create_table = create_table
+        self.checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = time.monotonic()
+        self._table_ready = not create_table
+        # insert statistics
+        self.inserts = 0
+        self.rows_inserted = 0
+        self.insert_time = 0.0
+        self.checkpoints = 0
+
+        if self.engine == "duckdb":
+            self.conn = duckdb.connect(database)
+        else:
+            # autocommit off: every batch is one transaction. WAL lets readers query the file while it is written
+            self.conn = sqlite3.connect(database, check_same_thread=False)
+            if database != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")
+        if drop_table:
+            self.conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        if create_table and schema is not None:
+            self.conn.execute(create_table_sql(table, schema, self.engine))
+            self._table_ready = True
+        logger.info(f"DuckDBWriter::WriterInitiated: engine={self.engine}, database={database}, table={table}")
+
+    def write(self, data: DataBatch) -> None:
+        if len(data) == 0:
+            return
+        start_time = timeit.default_timer()
+        batch = to_record_batch(data, schema=self.schema)
+        if self.engine == "duckdb":
+            self._write_duckdb(batch)
+        else:
+            self._write_sqlite(batch)
+        duration = timeit.default_timer() - start_time
+        self.inserts += 1
+        self.rows_inserted += batch.num_rows
+        self.insert_time += duration
+        logger.debug(f"DuckDBWriter::WriteBatch: rows={batch.num_rows}, engine={self.engine}, table={self.table}, time={duration * 1000:.3f} ms")
+        if self.checkpoint_interval and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def _write_duckdb(self, batch: pa.RecordBatch) -> None:
+        # DuckDB scans the registered Arrow batch in place: one bulk append, no per-row work
+        self.conn.register("_batch", pa.Table.from_batches([batch]))
+        try:
+            if not self._table_ready:
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(self.table)} AS SELECT * FROM _batch LIMIT 0")
+                self._table_ready = True
+            self.conn.execute(f"INSERT INTO {_quote(self.table)} BY NAME SELECT * FROM _batch")
+        finally:
+            self.conn.unregister("_batch")
+
+    def _write_sqlite(self, batch: pa.RecordBatch) -> None:
+        if not self._table_ready:
+            # no schema given: plain SQLite columns typed by affinity
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(self.table)} ({', '.join(map(_quote, batch.schema.names))})")
+            self._table_ready = True
+        columns = [_sqlite_column(batch.column(i)) for i in range(batch.num_columns)]
+        sql = f"INSERT INTO {_quote(self.table)} ({', '.join(map(_quote, batch.schema.names))}) VALUES ({', '.join('?' * batch.num_columns)})"
+        with self.conn:
+            self.conn.executemany(sql, zip(*columns))
+
+    def checkpoint(self) -> None:
+        """Write the write-ahead log into the database file."""
+        if self.engine == "duckdb":
+            self.conn.execute("CHECKPOINT")
+        else:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.checkpoints += 1
+        self._last_checkpoint = time.monotonic()
+        logger.debug(f"DuckDBWriter::Checkpoint: engine={self.engine}, database={self.database}")
+
+    def stats(self) -> dict:
+        return {
+            "inserts": self.inserts,
+            "rows": self.rows_inserted,
+            "checkpoints": self.checkpoints,
+            "insert_time": self.insert_time,
+            "rows_per_second": self.rows_inserted / self.insert_time if self.insert_time else 0.0,
+        }
+
+    def close(self) -> None:
+        if self.checkpoint_interval:
+            self.checkpoint()
+        stats = self.stats()
+        logger.info(f"DuckDBWriter::WriterClosed: engine={self.engine}, table={self.table}, inserts={stats['inserts']}, rows={stats['rows']}, rows_per_second={stats['rows_per_second']:.0f}")
+        self.conn.close()
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "database": "str",
+            "table": "str",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return DuckDBWriter(**config)
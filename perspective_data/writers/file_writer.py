@@ -1,6 +1,268 @@
+import io
 import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from .base import DataWriter
+from ..columnar import DataBatch, to_dataframe, to_record_batch
+from ..utils import logger
+
+
+class _ParquetSink:
+    """
+    A Parquet file kept open for the writer's lifetime. Incoming batches are buffered and written as row groups of
+    `row_group_size` rows; the footer is written on close().
+    """
+
+    def __init__(self, file_path: str, row_group_size: int, compression: str, use_dictionary: bool) -> None:
+        self.file_path = file_path
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.use_dictionary = use_dictionary
+        self.schema: pa.Schema = None
+        self._file: pa.OSFile = None
+        self._writer: pq.ParquetWriter = None
+        self._buffer: list[pa.RecordBatch] = []
+        self._buffered_rows = 0
+        self.row_groups = 0
+
+    def write(self, data: DataBatch) -> None:
+        batch = to_record_batch(data)
+        if self.schema is None:
+            # the first batch fixes the file schema. Later batches are cast to it
+            self.schema = batch.schema.remove_metadata()
+            self._file = pa.OSFile(self.file_path, "wb")
+            self._writer = pq.ParquetWriter(self._file, self.schema, compression=self.compression, use_dictionary=self.use_dictionary)
+        elif not batch.schema.equals(self.schema):
+            batch = batch.cast(self.schema)
+        self._buffer.append(batch)
+        self._buffered_rows += batch.num_rows
+        while self._buffered_rows >= self.row_group_size:
+            self._write_row_group(self.row_group_size)
+
+    def _write_row_group(self, num_rows: int) -> None:
+        table = pa.Table.from_batches(self._buffer, schema=self.schema)
+        self._writer.write_table(table.slice(0, num_rows), row_group_size=num_rows)
+        rest = table.slice(num_rows)
+        self._buffer = rest.to_batches() if rest.num_rows else []
+        self._buffered_rows = rest.num_rows
+        self.row_groups += 1
+
+    def flush(self) -> None:
+        if self._buffered_rows:
+            self._write_row_group(self._buffered_rows)
+
+    @property
+    def size(self) -> int:
+        """Bytes written so far, including the uncompressed size of the buffered rows."""
+        if self._file is None:
+            return 0
+        return self._file.tell() + sum(batch.nbytes for batch in self._buffer)
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._file.close()
+        self._writer = None
+
+
+class _ArrowSink:
+    """
+    An Arrow IPC file or stream kept open for the writer's lifetime. Every batch is appended as a record batch. An
+    uncompressed IPC file can be opened with pa.memory_map() and read without copying.
+    """
+
+    def __init__(self, file_path: str, ipc_format: str, compression: str) -> None:
+        self.file_path = file_path
+        self.ipc_format = ipc_format
+        self.compression = compression
+        self.schema: pa.Schema = None
+        self._sink: pa.OSFile = None
+        self._writer: pa.ipc.RecordBatchFileWriter | pa.ipc.RecordBatchStreamWriter = None
+
+    def write(self, data: DataBatch) -> None:
+        batch = to_record_batch(data)
+        if self.schema is None:
+            # the first batch fixes the file schema. Later batches are cast to it
+            self.schema = batch.schema.remove_metadata()
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._sink = pa.OSFile(self.file_path, "wb")
+            new_writer = pa.ipc.new_file if self.ipc_format == "file" else pa.ipc.new_stream
+            self._writer = new_writer(self._sink, self.schema, options=options)
+        elif not batch.schema.equals(self.schema):
+            batch = batch.cast(self.schema)
+        self._writer.write_batch(batch)
+
+    def flush(self) -> None:
+        if self._sink is not None:
+            self._sink.flush()
+
+    @property
+    def size(self) -> int:
+        return self._sink.tell() if self._writer is not None else 0
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        # closing the writer writes the end-of-stream marker (and the footer of the file format)
+        self._writer.close()
+        self._sink.close()
+        self._writer = None
+
+
+def _format_datetimes(values: pa.Array, date_format: str) -> pa.Array:
+    # Arrow's %S already prints the fractional seconds of the timestamp unit, so Python's '%S.%f' maps to '%S' in microseconds
+    if "%S.%f" in date_format and date_format.count("%f") == 1:
+        return pc.strftime(pc.cast(values, pa.timestamp("us", values.type.tz)), format=date_format.replace("%S.%f", "%S"))
+    if "%f" in date_format:
+        return pa.array(pd.Series(values.to_pandas()).dt.strftime(date_format), type=pa.string())
+    if "%S" in date_format:
+        values = pc.cast(values, pa.timestamp("s", values.type.tz), safe=False)
+    return pc.strftime(values, format=date_format)
+
+
+class _TextSink:
+    """
+    A CSV or NDJSON file kept open for the writer's lifetime. The header is built once, every batch is encoded at once
+    into an in-memory buffer, and the buffer is written to the file when it reaches `flush_bytes` or at the latest
+    `flush_interval` seconds after the last flush. A timer thread flushes while the producer is idle.
+    """
+
+    def __init__(self, file_path: str, type: str, mode: str, date_format: str, sep: str, lineterminator: str, encoding: str,
+                 flush_bytes: int, flush_interval: float) -> None:
+        self.file_path = file_path
+        self.type = type
+        self.mode = mode
+        self.date_format = date_format
+        self.sep = sep
+        self.lineterminator = lineterminator
+        self.encoding = encoding
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self._file = None
+        self._header: bytes = None
+        self._buffer: list[bytes] = []
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+        self._csv_options = pa_csv.WriteOptions(include_header=False, delimiter=sep, eol=lineterminator)
+        self._utf8 = encoding.lower().replace("-", "") == "utf8"
+        # the lock serializes the buffer and file access of write() and the flush timer
+        self._cond = threading.Condition()
+        self._closing = False
+        self._timer = None
+
+    def _open(self, columns: list[str]) -> None:
+        self._file = open(self.file_path, "ab" if self.mode == "a" else "wb")
+        # the CSV header is written only at the start of the file
+        if self.type == "csv" and self._file.tell() == 0:
+            self._header = (self.sep.join(columns) + self.lineterminator).encode(self.encoding)
+            self._append(self._header)
+        if self.flush_interval:
+            self._timer = threading.Thread(target=self._timer_runner, name=f"FileWriter-{os.path.basename(self.file_path)}")
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_runner(self) -> None:
+        with self._cond:
+            while not self._closing:
+                if not self._buffer:
+                    self._cond.wait()
+                    continue
+                remaining = self._last_flush + self.flush_interval - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                try:
+                    self._flush()
+                except Exception as e:
+                    # the rows stay buffered for the next flush; wait a full interval before retrying
+                    self._last_flush = time.monotonic()
+                    logger.error(f"FileWriter::FlushFailed: file={self.file_path}, error={e}")
+
+    def _append(self, chunk: bytes) -> None:
+        self._buffer.append(chunk)
+        self._buffered_bytes += len(chunk)
+
+    def _encode(self, data: DataBatch) -> bytes:
+        if self.type == "ndjson":
+            return to_dataframe(data).to_json(orient="records", lines=True, date_format="iso").encode(self.encoding)
+        # pandas frames are encoded by pandas, which is cheaper than converting them to Arrow first. Columnar and Arrow
+        # batches are encoded by Arrow's CSV writer
+        if isinstance(data, pd.DataFrame):
+            return data.to_csv(None, index=False, header=False, sep=self.sep, lineterminator=self.lineterminator, date_format=self.date_format).encode(self.encoding)
+        batch = to_record_batch(data)
+        # datetimes are formatted with date_format in one pass per column
+        for i, field in enumerate(batch.schema):
+            if pa.types.is_timestamp(field.type):
+                batch = batch.set_column(i, field.name, _format_datetimes(batch.column(i), self.date_format))
+        output = io.BytesIO()
+        pa_csv.write_csv(batch, output, write_options=self._csv_options)
+        encoded = output.getvalue()
+        return encoded if self._utf8 else encoded.decode("utf-8").encode(self.encoding)
+
+    def write(self, data: DataBatch) -> None:
+        encoded = self._encode(data)
+        with self._cond:
+            if self._file is None:
+                self._open(list(data.columns) if isinstance(data, pd.DataFrame) else to_record_batch(data).schema.names)
+            if not self._buffer:
+                # wake the timer up for the new deadline
+                self._cond.notify_all()
+            self._append(encoded)
+            if self._buffered_bytes >= self.flush_bytes or (self.flush_interval and time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self) -> None:
+        with self._cond:
+            self._flush()
+
+    def _flush(self) -> None:
+        # called with the lock held
+        if self._file is None:
+            return
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer.clear()
+            self._buffered_bytes = 0
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        with self._cond:
+            return self._file.tell() + self._buffered_bytes if self._file is not None else 0
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        with self._cond:
+            if self._file is None:
+                return
+            self._flush()
+            self._file.close()
+            self._file = None
+
+
+# characters escaped in Hive partition values
+_HIVE_ESCAPES: str = '"#%\'*/:=?\\\x7f{[]^'
+# the partition directory of rows with a missing partition value, as Hive names it
+HIVE_DEFAULT_PARTITION: str = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _hive_escape(value: str) -> str:
+    return "".join(f"%{ord(c):02X}" if c in _HIVE_ESCAPES or ord(c) < 0x20 else c for c in value)
 
 
 class FileWriter(DataWriter):
@@ -12,6 +274,19 @@ class FileWriter(DataWriter):
                  sep: str = ",",
                  lineterminator: str = "\n",
                  encoding: str = "utf-8",
+                 row_group_size: int = 100_000,                 # row_group_size: Number of rows buffered into each Parquet row group.
+                 compression: str = "snappy",                   # compression: Parquet compression codec ('snappy', 'zstd', 'gzip', 'lz4', 'none').
+                 use_dictionary: bool = True,                   # use_dictionary: Dictionary-encode the Parquet columns.
+                 ipc_format: str = None,                        # ipc_format: Arrow IPC format. 'file' (random access, memory-mappable) or 'stream'. Default is 'stream' for '.arrows' paths, 'file' otherwise.
+                 ipc_compression: str = None,                   # ipc_compression: Arrow IPC buffer compression ('lz4', 'zstd'). Default is None, which keeps the file memory-mappable.
+                 buffered: bool = False,                        # buffered: Keep one open, buffered handle for CSV/NDJSON instead of reopening the file every batch.
+                 flush_bytes: int = 1 << 20,                    # flush_bytes: Buffered mode. Write the buffer to the file once it holds this many bytes.
+                 flush_interval: float = 1.0,                   # flush_interval: Buffered mode. Write the buffer to the file at the latest this many seconds after the last flush, also while no batches arrive. None flushes by flush_bytes only.
+                 partition_cols: list[str] = None,              # partition_cols: Write rows into Hive partitions, e.g. ['station_name', 'date'] -> station_name=.../date=.../. 'date' and 'hour' are derived from partition_time_col unless they are columns.
+                 partition_time_col: str = "timestamp",         # partition_time_col: The datetime column the 'date' and 'hour' partitions are derived from.
+                 roll_interval: float = None,                   # roll_interval: Start a new file every this many seconds (aligned to the clock, e.g. 3600 for hourly files).
+                 roll_size: int = None,                         # roll_size: Start a new file once the current one holds this many bytes.
+                 max_open_files: int = 64,                      # max_open_files: Rolling/partitioned mode. Maximum number of files kept open; the least recently used one is closed first.
                  **kwargs
                  ) -> None:
         super().__init__(**kwargs)
@@ -27,33 +302,150 @@ class FileWriter(DataWriter):
                 type = "csv"
             elif file_path.endswith(".parquet"):
                 type = "parquet"
-            elif file_path.endswith(".arrow"):
+            elif file_path.endswith(".arrow") or file_path.endswith(".arrows"):
                 type = "arrow"
             elif file_path.endswith(".ndjson"):
                 type = "ndjson"
             else:
                 raise ValueError(f"Unknown file type for file: {self.file_path}")
         self.type = type
+        # rolling/partitioned mode: file_path is the template of the files written under each partition directory
+        self.rolling = bool(partition_cols or roll_interval or roll_size)
+        if self.type in ("parquet", "arrow") and self.mode == "a" and not self.rolling:
+            raise ValueError(f"{self.type} files can't be appended to. Use mode='w': the file stays open and grows batch by batch until close().")
+        if ipc_format is None:
+            # '.arrows' is the usual extension of the IPC stream format
+            ipc_format = "stream" if file_path.endswith(".arrows") else "file"
+        if ipc_format not in ("file", "stream"):
+            raise ValueError(f"Invalid ipc_format: {ipc_format}. Valid values are 'file' or 'stream'.")
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.use_dictionary = use_dictionary
+        self.ipc_format = ipc_format
+        self.ipc_compression = ipc_compression
+        self.buffered = buffered
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.partition_cols = partition_cols or []
+        self.partition_time_col = partition_time_col
+        self.roll_interval = roll_interval
+        self.roll_size = roll_size
+        self.max_open_files = max_open_files
+        self._sinks: OrderedDict[str, tuple] = OrderedDict()       # open sinks by partition: (sink, time window)
+        self._sequence: dict[str, int] = {}                         # number of files started per partition and time window
+        self.files_written: list[str] = []
+        self._sink = None
+        if not self.rolling and (self.type in ("parquet", "arrow") or self.buffered):
+            self._sink = self._new_sink(self.file_path, self.mode)
         # Remove the file if it already exists and the mode is 'w'
-        if self.mode == 'w' and os.path.exists(self.file_path):
+        if self.mode == 'w' and not self.rolling and os.path.exists(self.file_path):
             os.remove(self.file_path)
 
-    def write(self, data: pd.DataFrame) -> None:
+    def _new_sink(self, file_path: str, mode: str) -> '_ParquetSink | _ArrowSink | _TextSink':
+        if self.type == "parquet":
+            return _ParquetSink(file_path, self.row_group_size, self.compression, self.use_dictionary)
+        if self.type == "arrow":
+            return _ArrowSink(file_path, self.ipc_format, self.ipc_compression)
+        return _TextSink(file_path, self.type, mode, self.date_format, self.sep, self.lineterminator, self.encoding, self.flush_bytes, self.flush_interval)
+
+    def write(self, data: DataBatch) -> None:
+        if self.rolling:
+            if len(data) > 0:
+                self._write_partitioned(data)
+            return
+        # Arrow-native formats and buffered text files go through their open sink, the other formats through pandas
+        if self._sink is not None:
+            if len(data) > 0:
+                self._sink.write(data)
+            return
+        data = to_dataframe(data)
         # write data to file. Pick the correct method based on the file type
         if self.type == "csv":
             header = not os.path.exists(self.file_path)
             data.to_csv(self.file_path, index=False, header=header, mode='a', sep=self.sep, lineterminator=self.lineterminator, date_format=self.date_format, encoding=self.encoding)
-        elif self.type == "parquet":
-            data.to_parquet(self.file_path, index=False, mode='a')
-        elif self.type == "arrow":
-            data.to_feather(self.file_path)
         elif self.type == "ndjson":
-            data.to_json(self.file_path, orient='records', lines=True, date_format=self.date_format, mode='a')
+            data.to_json(self.file_path, orient='records', lines=True, date_format='iso', mode='a')
         else:
             raise ValueError(f"Unknown file type: {self.type}")
         
+    def _partition_keys(self, df: pd.DataFrame) -> tuple[list[pd.Series], list[str]]:
+        # one key Series per partition column, plus the real columns that are moved into the directory names
+        keys, moved = [], []
+        for col in self.partition_cols:
+            if col in df.columns:
+                values = df[col]
+                if pd.api.types.is_datetime64_any_dtype(values):
+                    # the column is moved into the directory names, so its time of day would be lost
+                    raise ValueError(f"Partition column {col} is a datetime column. Use partition_cols=['date'] or ['hour'] with partition_time_col='{col}' instead.")
+                key = values.astype(str)
+                moved.append(col)
+            elif col in ("date", "hour"):
+                values = df[self.partition_time_col]
+                key = values.dt.strftime("%Y-%m-%d" if col == "date" else "%H")
+            else:
+                raise ValueError(f"Unknown partition column: {col}")
+            # rows with a missing value (None, NaN, NaT) go to Hive's default partition instead of being dropped
+            keys.append(key.astype(object).where(values.notna().to_numpy(), HIVE_DEFAULT_PARTITION))
+        return keys, moved
+
+    def _write_partitioned(self, data: DataBatch) -> None:
+        if not self.partition_cols:
+            self._sink_for("").write(data)
+            return
+        df = to_dataframe(data)
+        keys, moved = self._partition_keys(df)
+        groups = df.groupby(keys, sort=False, dropna=False).indices
+        for values, rows in groups.items():
+            values = values if isinstance(values, tuple) else (values,)
+            partition = os.path.join(*(f"{col}={_hive_escape(str(value))}" for col, value in zip(self.partition_cols, values)))
+            # the partition values live in the directory names, like Hive does
+            self._sink_for(partition).write(df.iloc[rows].drop(columns=moved))
+
+    def _sink_for(self, partition: str) -> '_ParquetSink | _ArrowSink | _TextSink':
+        window = int(time.time() // self.roll_interval) if self.roll_interval else None
+        entry = self._sinks.get(partition)
+        if entry is not None:
+            sink, sink_window = entry
+            if sink_window == window and (not self.roll_size or sink.size < self.roll_size):
+                self._sinks.move_to_end(partition)
+                return sink
+            # roll over to a new file
+            del self._sinks[partition]
+            sink.close()
+        sink = self._new_sink(self._next_file_path(partition, window), "w")
+        self._sinks[partition] = (sink, window)
+        if len(self._sinks) > self.max_open_files:
+            # close the least recently used file. The partition starts a new file if it shows up again
+            _, (evicted, _) = self._sinks.popitem(last=False)
+            evicted.close()
+        return sink
+
+    def _next_file_path(self, partition: str, window: int) -> str:
+        directory, name = os.path.split(self.file_path)
+        stem, ext = os.path.splitext(name)
+        if window is not None:
+            stem = f"{stem}-{datetime.fromtimestamp(window * self.roll_interval).strftime('%Y%m%dT%H%M%S')}"
+        directory = os.path.join(directory, partition)
+        os.makedirs(directory or ".", exist_ok=True)
+        prefix = os.path.join(directory, stem)
+        while True:
+            sequence = self._sequence.get(prefix, 0)
+            self._sequence[prefix] = sequence + 1
+            file_path = f"{prefix}-{sequence:05d}{ext}"
+            # append mode never touches files of earlier runs
+            if self.mode != "a" or not os.path.exists(file_path):
+                break
+        self.files_written.append(file_path)
+        return file_path
+
     def close(self) -> None:
-        pass
+        for sink, _ in self._sinks.values():
+            sink.close()
+        self._sinks.clear()
+        if self._sink is not None:
+            self._sink.close()
+        if self._sink is not None or self.rolling:
+            logger.info(f"FileWriter::WriterClosed: file={self.file_path}, type={self.type}, files={len(self.files_written) or 1}")
 
     @staticmethod
     def required_parameters() -> dict[str, str]:
@@ -1,8 +1,10 @@
 from influxdb_client import InfluxDBClient, Point, WritePrecision, WriteOptions
 import pandas as pd
 from .base import DataWriter
-from utils.logger import logger
-from datetime import datetime
+from .line_protocol import to_line_protocol
+from .timestamps import NAIVE_TIMEZONE, TimestampNormalizer
+from ..columnar import DataBatch, to_dataframe
+from ..utils import logger
 import timeit
 
 
@@ -16,6 +18,8 @@ class InfluxdbWriter(DataWriter):
                  timestamp_col: str,
                  tag_cols: list[str],
                  field_cols: list[str],
+                 serializer: str = "line_protocol",            # serializer: How batches are encoded. 'line_protocol' (vectorized, default) or 'point' (one Point per row).
+                 naive_timezone: str = NAIVE_TIMEZONE,          # naive_timezone: The timezone of naive datetimes: 'UTC', 'local' or a timezone name.
                  **kwargs
                  ) -> None:
         super().__init__(**kwargs)
@@ -27,12 +31,17 @@ class InfluxdbWriter(DataWriter):
         self.timestamp_col = timestamp_col
         self.tag_cols = tag_cols
         self.field_cols = field_cols
+        if serializer not in ["line_protocol", "point"]:
+            raise ValueError(f"Invalid serializer: {serializer}. Valid values are 'line_protocol' or 'point'.")
+        self.serializer = serializer
         # fine-tune the influxdb writer for better performance
         # fine-tune the batch size and flush interval
         self.client = InfluxDBClient(url=self.url, token=self.token, org=self.org)
         flush_interval = kwargs.get("flush_interval", 1000)
         batch_size = kwargs.get("batch_size", 1000)
-        self.write_persion = kwargs.get("write_precision", WritePrecision.NS)
+        self.write_precision = kwargs.get("write_precision", WritePrecision.NS)
+        self.naive_timezone = naive_timezone
+        self.normalizer = TimestampNormalizer(precision=self.write_precision, naive_timezone=naive_timezone, columns=[self.timestamp_col])
         self.write_api = self.client.write_api(write_options=WriteOptions(batch_size=batch_size, flush_interval=flush_interval))
         # setting the influxdb bucket and organization
         self.setup_influxdb_org_bucket(org_name=org, bucket_name=bucket)
@@ -68,33 +77,33 @@ class InfluxdbWriter(DataWriter):
             self.bucket = bucket
             self.bucket_id = bucket.id
 
-    def write(self, data: pd.DataFrame) -> None:
+    def write(self, data: DataBatch) -> None:
         start_time = timeit.default_timer()
-        df = data
-        # df = data.copy(deep=True)
+        df = to_dataframe(data)
         # Ensure the timestamp column is of integer or datetime type
         if not pd.api.types.is_integer_dtype(df[self.timestamp_col]) and not pd.api.types.is_datetime64_any_dtype(df[self.timestamp_col]):
             logger.debug(f"InfluxdbWriter::InvalidTimestampColumn: Timestamp column {self.timestamp_col} is not integer or datetime. Setting it to now.")
-            df[self.timestamp_col] = pd.Timestamp.now()
-        # Convert datetime to int epoch time if necessary
-        if pd.api.types.is_datetime64_any_dtype(df[self.timestamp_col]):
-            if df[self.timestamp_col].dt.tz is None:
-                local_offset = -1 * datetime.now().astimezone().utcoffset()
-                df[self.timestamp_col] = df[self.timestamp_col].map(lambda x: x + local_offset)
-                df[self.timestamp_col].dt.tz_localize('UTC')
-            df[self.timestamp_col] = df[self.timestamp_col].astype('int64')
-        # convert the dataframe to a list of InfluxDB points
-        points = [Point.from_dict({
-            "measurement": self.measurement,
-            "tags": {col: row[col] for col in self.tag_cols},
-            "fields": {col: row[col] for col in self.field_cols},
-            "time": row[self.timestamp_col]
-        }, self.write_persion) for _, row in df.iterrows()]
-        # write the points to InfluxDB
-        self.write_api.write(bucket=self.bucket.name, org=self.org.name, record=points)
+            df = df.assign(**{self.timestamp_col: pd.Timestamp.now()})
+        # Convert the timestamps to UTC epochs in the write precision (without touching the caller's frame)
+        df = self.normalizer.normalize(df)
+        if self.serializer == "line_protocol":
+            # serialize the whole batch column-wise into a single line protocol payload
+            record = to_line_protocol(df, self.measurement, self.tag_cols, self.field_cols, self.timestamp_col, precision=self.write_precision)
+            num_rows = len(df)
+        else:
+            # convert the dataframe to a list of InfluxDB points
+            record = [Point.from_dict({
+                "measurement": self.measurement,
+                "tags": {col: row[col] for col in self.tag_cols},
+                "fields": {col: row[col] for col in self.field_cols},
+                "time": row[self.timestamp_col]
+            }, self.write_precision) for _, row in df.iterrows()]
+            num_rows = len(record)
+        # write the records to InfluxDB
+        self.write_api.write(bucket=self.bucket.name, org=self.org.name, record=record, write_precision=self.write_precision)
         end_time = timeit.default_timer()
         duration_ms = (end_time - start_time) * 1000
-        logger.debug(f"InfluxdbWriter::WriteBatch: rows={len(points)}, time={duration_ms:.3f} ms")
+        logger.debug(f"InfluxdbWriter::WriteBatch: rows={num_rows}, serializer={self.serializer}, time={duration_ms:.3f} ms")
     
     def close(self) -> None:
         logger.info("InfluxdbWriter::WriterClosed: Closing InfluxDB client")
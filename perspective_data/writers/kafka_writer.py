@@ -1,9 +1,27 @@
 from confluent_kafka import Producer
+import numpy as np
 import pandas as pd
-import json
+import timeit
 from .base import DataWriter
+from ..columnar import DataBatch, to_dataframe
+from .timestamps import NAIVE_TIMEZONE, TimestampNormalizer
+from .kafka_serializers import CONTENT_TYPE_HEADER, KafkaSerializer, get_serializer
 from confluent_kafka.admin import AdminClient, NewTopic
-from utils.logger import logger
+from ..utils import logger
+
+
+def partition_ids(df: pd.DataFrame, key_cols: list[str], num_partitions: int) -> np.ndarray:
+    """Hash the key columns of every row to a partition. The hash is stable, so a key always maps to the same partition."""
+    hashes = pd.util.hash_pandas_object(df[key_cols], index=False).to_numpy()
+    return (hashes % np.uint64(num_partitions)).astype(np.int32)
+
+
+def message_keys(df: pd.DataFrame, key_cols: list[str]) -> list[str]:
+    """Join the key columns of every row into a message key, e.g. 'Times Sq-42 St' or 'AAPL.N|Homer'."""
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + "|" + df[col].astype(str)
+    return keys.tolist()
 
 
 class KafkaWriter(DataWriter):
@@ -15,6 +33,15 @@ class KafkaWriter(DataWriter):
                  sasl_mechanism: str = None,
                  sasl_username: str = None,
                  sasl_password: str = None,
+                 timestamp_precision: str = None,
+                 naive_timezone: str = NAIVE_TIMEZONE,
+                 async_delivery: bool = False,
+                 producer_options: dict = None,
+                 serializer: str | KafkaSerializer = "json",
+                 schema: dict = None,
+                 num_partitions: int = 1,
+                 replication_factor: int = 1,
+                 key_cols: list[str] = None,
                  **kwargs
                  ) -> None:
         """
@@ -28,6 +55,15 @@ class KafkaWriter(DataWriter):
             sasl_mechanism (str, optional): SASL mechanism to use for authentication. Defaults to None.
             sasl_username (str, optional): Username for SASL authentication. Defaults to None.
             sasl_password (str, optional): Password for SASL authentication. Defaults to None.
+            timestamp_precision (str, optional): Send datetimes as UTC epochs in this precision ('s', 'ms', 'us' or 'ns') instead of ISO strings. Defaults to None.
+            naive_timezone (str, optional): The timezone of naive datetimes sent as epochs: 'UTC', 'local' or a timezone name. Defaults to NAIVE_TIMEZONE ('local'), like every writer.
+            async_delivery (bool, optional): Don't wait for the broker at the end of every batch. Deliveries are tracked by callbacks and only close() flushes. Defaults to False.
+            producer_options (dict, optional): Extra librdkafka producer settings, e.g. {'linger.ms': 5, 'compression.type': 'lz4'}. Defaults to None.
+            serializer (str | KafkaSerializer, optional): Message encoding: 'json' (one message per row), 'arrow', 'msgpack' or 'avro' (one message per batch). Defaults to 'json'.
+            schema (dict, optional): The Generator.schema of the batches, used by the typed encodings (Arrow, Avro). Defaults to None.
+            num_partitions (int, optional): Partition count of the topic if it is created. When the topic exists, this is replaced by the topic's actual partition count. Defaults to 1.
+            replication_factor (int, optional): Replication factor of the topic if it is created. Defaults to 1.
+            key_cols (list[str], optional): Columns keying every row, e.g. ['station_name']. Rows are hashed to a partition by their key, so one key keeps its order on one partition. Defaults to None (the producer picks the partitions).
             **kwargs: Additional keyword arguments to pass to the superclass initializer.
 
         Returns:
@@ -41,6 +77,20 @@ class KafkaWriter(DataWriter):
         self.sasl_mechanism = sasl_mechanism
         self.sasl_username = sasl_username
         self.sasl_password = sasl_password
+        self.timestamp_precision = timestamp_precision
+        self.naive_timezone = naive_timezone
+        self.normalizer = TimestampNormalizer(precision=timestamp_precision, naive_timezone=naive_timezone) if timestamp_precision else None
+        self.async_delivery = async_delivery
+        self.serializer = get_serializer(serializer, schema=schema)
+        self.headers = [(CONTENT_TYPE_HEADER, self.serializer.content_type.encode('utf-8'))]
+        self.num_partitions = num_partitions
+        self.replication_factor = replication_factor
+        self.key_cols = key_cols
+        # delivery statistics, updated by the delivery callbacks
+        self.produced = 0
+        self.delivered = 0
+        self.failed = 0
+        self.buffer_full = 0
 
         # setup the Kafka producer
         # Kafka producer configuration
@@ -55,6 +105,8 @@ class KafkaWriter(DataWriter):
                 'sasl.username': self.sasl_username,
                 'sasl.password': self.sasl_password,
             })
+        if producer_options:
+            self.producer_config.update(producer_options)
         self.producer = Producer(self.producer_config)
         logger.info("KafkaWriter::init - Kafka producer initialized")
 
@@ -62,26 +114,94 @@ class KafkaWriter(DataWriter):
         admin_client = AdminClient({'bootstrap.servers': self.bootstrap_servers})
         topic_metadata = admin_client.list_topics(timeout=10)
         if self.topic not in topic_metadata.topics:
-            new_topic = NewTopic(self.topic, num_partitions=1, replication_factor=1)
-            admin_client.create_topics([new_topic])
-            logger.info(f"KafkaWriter::init - Created new topic {self.topic}")
+            new_topic = NewTopic(self.topic, num_partitions=self.num_partitions, replication_factor=self.replication_factor)
+            # wait for the topic, so the first batch is produced with the new partition count
+            try:
+                admin_client.create_topics([new_topic])[self.topic].result()
+                logger.info(f"KafkaWriter::init - Created new topic {self.topic} with {self.num_partitions} partitions")
+            except Exception as e:
+                logger.warning(f"KafkaWriter::init - Could not create topic {self.topic}: {e}")
+            # the topic may exist anyway, e.g. created concurrently (TopicExistsError) with another partition count
+            topic_metadata = admin_client.list_topics(topic=self.topic, timeout=10)
+        topic_info = topic_metadata.topics.get(self.topic)
+        if topic_info is not None and topic_info.partitions:
+            # rows are hashed over the partitions the topic actually has
+            self.num_partitions = len(topic_info.partitions)
+
+    def write(self, data: DataBatch) -> None:
+        start_time = timeit.default_timer()
+        if self.normalizer is not None:
+            data = self.normalizer.normalize(to_dataframe(data))
+        if self.key_cols:
+            num_messages = self._write_keyed(to_dataframe(data))
+        else:
+            # Encode the whole batch at once: one message per row or per batch depending on the serializer
+            messages = self.serializer.serialize(data)
+            # Produce messages to Kafka
+            for message in messages:
+                self._produce(message)
+            num_messages = len(messages)
+        # serve the delivery callbacks of earlier messages once per batch
+        self.producer.poll(0)
 
-    def write(self, data: pd.DataFrame) -> None:
-        # Convert DataFrame to JSON records
-        records = data.to_json(orient='records', date_format='iso')
-        records = json.loads(records)
+        if not self.async_delivery:
+            # Ensure all messages are delivered
+            self.producer.flush()
+        duration_ms = (timeit.default_timer() - start_time) * 1000
+        logger.debug(f"KafkaWriter::WriteBatch: rows={len(data)}, messages={num_messages}, topic={self.topic}, in_flight={len(self.producer)}, time={duration_ms:.3f} ms")
 
-        # Produce messages to Kafka
-        for record in records:
-            self.producer.produce(self.topic, json.dumps(record).encode('utf-8'))
-            self.producer.poll(0)
+    def _write_keyed(self, df: pd.DataFrame) -> int:
+        partitions = partition_ids(df, self.key_cols, self.num_partitions)
+        if not self.serializer.batched:
+            # one message per row, keyed and sent to the partition of its key
+            messages = self.serializer.serialize(df)
+            for message, key, partition in zip(messages, message_keys(df, self.key_cols), partitions.tolist()):
+                self._produce(message, key=key, partition=partition)
+            return len(messages)
+        # one message per partition, holding the rows of that partition in their original order
+        order = np.argsort(partitions, kind="stable")
+        bounds = np.flatnonzero(np.diff(partitions[order])) + 1
+        num_messages = 0
+        for rows in np.split(order, bounds):
+            if len(rows) == 0:
+                continue
+            for message in self.serializer.serialize(df.iloc[rows]):
+                self._produce(message, partition=int(partitions[rows[0]]))
+                num_messages += 1
+        return num_messages
 
-        # Ensure all messages are delivered
-        self.producer.flush()
-        logger.debug(f"KafkaWriter::write - Wrote {len(records)} records to topic {self.topic}")
+    def _produce(self, message: bytes, key: str = None, partition: int = None) -> None:
+        # without an explicit partition, the producer's partitioner picks one
+        options = {} if partition is None else {'key': key, 'partition': partition}
+        while True:
+            try:
+                self.producer.produce(self.topic, message, headers=self.headers, on_delivery=self._on_delivery, **options)
+                self.produced += 1
+                return
+            except BufferError:
+                # the local queue is full: wait for deliveries to make room, then retry
+                self.buffer_full += 1
+                self.producer.poll(0.1)
+
+    def _on_delivery(self, err, msg) -> None:
+        if err is not None:
+            self.failed += 1
+            logger.error(f"KafkaWriter::DeliveryFailed: topic={self.topic}, error={err}")
+        else:
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "produced": self.produced,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "in_flight": len(self.producer),
+            "buffer_full": self.buffer_full,
+        }
 
     def close(self) -> None:
-        self.producer.flush()
+        remaining = self.producer.flush()
+        logger.info(f"KafkaWriter::WriterClosed: topic={self.topic}, produced={self.produced}, delivered={self.delivered}, failed={self.failed}, undelivered={remaining}")
 
     @staticmethod
     def required_parameters() -> dict[str, str]:
@@ -0,0 +1,180 @@
+import threading
+import time
+import timeit
+import pyarrow as pa
+from .base import DataWriter
+from ..columnar import DataBatch, to_record_batch
+from ..utils import logger
+
+
+# Generator.schema type names mapped to Perspective column types
+PERSPECTIVE_TYPES: dict[str, str] = {
+    "float": "float",
+    "float32": "float",
+    "int": "integer",
+    "integer": "integer",
+    "bool": "boolean",
+    "boolean": "boolean",
+    "str": "string",
+    "string": "string",
+    "datetime": "datetime",
+    "datetime64[ns]": "datetime",
+    "date": "date",
+}
+
+
+def perspective_schema(schema: dict) -> dict[str, str]:
+    """Map a Generator.schema dict to a Perspective table schema."""
+    for type_name in schema.values():
+        if type_name not in PERSPECTIVE_TYPES:
+            raise ValueError(f"Unknown schema type: {type_name}")
+    return {col: PERSPECTIVE_TYPES[type_name] for col, type_name in schema.items()}
+
+
+class PerspectiveTableWriter(DataWriter):
+    def __init__(self,
+                 server: object,                                # server: A perspective.Server (a local client is created) or a perspective Client.
+                 table_name: str,                               # table_name: The hosted table name. An existing table with this name is updated instead of created.
+                 schema: dict = None,                           # schema: The Generator.schema of the batches, used to create the table and cast every batch to its types. Without it, the table is created from the first batch.
+                 index: str = None,                             # index: Primary key column. Updates replace the rows with the same key.
+                 limit: int = None,                             # limit: Maximum number of rows kept. The oldest rows are replaced first.
+                 coalesce_rows: int = 0,                        # coalesce_rows: Buffer batches and update the table once this many rows are buffered. 0 updates every batch.
+                 coalesce_interval: float = None,               # coalesce_interval: Update the table at the latest this many seconds after the first buffered batch. A timer thread flushes while the producer is idle. Default is None (coalesce_rows only).
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        if index is not None and limit is not None:
+            raise ValueError("A Perspective table takes either an index or a limit, not both.")
+        self.client = server.new_local_client() if hasattr(server, "new_local_client") else server
+        self.table_name = table_name
+        self.schema = schema
+        self.index = index
+        self.limit = limit
+        self.coalesce_rows = coalesce_rows
+        self.coalesce_interval = coalesce_interval
+        # the lock serializes the updates of write() and the coalescing timer
+        self._cond = threading.Condition()
+        self._closing = False
+        self._buffer: list[pa.RecordBatch] = []
+        self._buffered_rows = 0
+        self._buffer_start = None
+        # update statistics
+        self.updates = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.update_time = 0.0
+
+        self.table = None
+        if table_name in self.client.get_hosted_table_names():
+            self.table = self.client.open_table(table_name)
+            logger.info(f"PerspectiveTableWriter::WriterInitiated: Opened existing table {table_name}")
+        elif schema is not None:
+            self.table = self.client.table(perspective_schema(schema), **self._table_options())
+            logger.info(f"PerspectiveTableWriter::WriterInitiated: Created table {table_name}, index={index}, limit={limit}")
+        self._timer = None
+        if self.coalesce_interval:
+            self._timer = threading.Thread(target=self._timer_runner, name=f"PerspectiveTableWriter-{table_name}")
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _table_options(self) -> dict:
+        options = {"name": self.table_name}
+        if self.index is not None:
+            options["index"] = self.index
+        if self.limit is not None:
+            options["limit"] = self.limit
+        return options
+
+    def write(self, data: DataBatch) -> None:
+        if len(data) == 0:
+            return
+        batch = to_record_batch(data, schema=self.schema)
+        with self._cond:
+            if self._buffer and not batch.schema.equals(self._buffer[0].schema):
+                # one IPC stream holds a single schema
+                batch = batch.cast(self._buffer[0].schema)
+            self._buffer.append(batch)
+            self._buffered_rows += batch.num_rows
+            if self._buffer_start is None:
+                self._buffer_start = time.monotonic()
+                # wake the timer up for the new deadline
+                self._cond.notify_all()
+            if self._buffered_rows >= self.coalesce_rows:
+                self._flush()
+
+    def flush(self) -> None:
+        """Send the buffered batches to the table as a single Arrow IPC update."""
+        with self._cond:
+            self._flush()
+
+    def _timer_runner(self) -> None:
+        with self._cond:
+            while not self._closing:
+                if self._buffer_start is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._buffer_start + self.coalesce_interval - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                try:
+                    self._flush()
+                except Exception as e:
+                    logger.error(f"PerspectiveTableWriter::UpdateFailed: table={self.table_name}, error={e}")
+
+    def _flush(self) -> None:
+        # called with the lock held
+        if not self._buffer:
+            return
+        # the buffer is handed over before the update, so a failed update loses its rows once, like a failed write()
+        buffer, rows = self._buffer, self._buffered_rows
+        self._buffer, self._buffered_rows, self._buffer_start = [], 0, None
+        start_time = timeit.default_timer()
+        # Perspective reads the Arrow stream directly, no per-value inference or conversion
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, buffer[0].schema.remove_metadata()) as stream:
+            for batch in buffer:
+                stream.write_batch(batch)
+        payload = sink.getvalue().to_pybytes()
+        if self.table is None:
+            # no schema given: the first batch defines the table
+            self.table = self.client.table(payload, **self._table_options())
+            logger.info(f"PerspectiveTableWriter::TableCreated: Created table {self.table_name} from the first batch, schema={self.table.schema()}")
+        else:
+            self.table.update(payload)
+        duration = timeit.default_timer() - start_time
+        self.updates += 1
+        self.rows_written += rows
+        self.bytes_written += len(payload)
+        self.update_time += duration
+        logger.debug(f"PerspectiveTableWriter::WriteBatch: rows={rows}, batches={len(buffer)}, bytes={len(payload)}, table={self.table_name}, time={duration * 1000:.3f} ms")
+
+    def stats(self) -> dict:
+        return {
+            "updates": self.updates,
+            "rows": self.rows_written,
+            "bytes": self.bytes_written,
+            "buffered_rows": self._buffered_rows,
+            "update_time": self.update_time,
+        }
+
+    def close(self) -> None:
+        # the table stays hosted on the server, only the buffered rows are sent
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            self._flush()
+        if self._timer is not None:
+            self._timer.join()
+        logger.info(f"PerspectiveTableWriter::WriterClosed: table={self.table_name}, updates={self.updates}, rows={self.rows_written}")
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "server": "perspective.Server",
+            "table_name": "str",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return PerspectiveTableWriter(**config)
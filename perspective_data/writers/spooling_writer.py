@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+from collections import deque
+import pyarrow as pa
+from .base import DataWriter
+from ..columnar import DataBatch, to_record_batch
+from ..utils import logger
+
+
+class _Segment:
+    """A spool segment: one Arrow IPC stream file holding the batches of a time and size window."""
+    __slots__ = ("path", "rows", "size", "created")
+
+    def __init__(self, path: str, rows: int = 0, size: int = 0, created: float = None) -> None:
+        self.path = path
+        self.rows = rows
+        self.size = size
+        self.created = time.time() if created is None else created
+
+
+def _read_segment(path: str) -> list[pa.RecordBatch]:
+    """Read the batches of a segment. A segment cut short by a crash yields its complete batches."""
+    batches = []
+    with pa.memory_map(path) as source:
+        try:
+            reader = pa.ipc.open_stream(source)
+            while True:
+                batches.append(reader.read_next_batch())
+        except StopIteration:
+            pass
+        except (pa.ArrowInvalid, OSError) as e:
+            logger.warning(f"SpoolingWriter::TruncatedSegment: segment={path}, batches={len(batches)}, error={e}")
+    return batches
+
+
+class SpoolingWriter(DataWriter):
+    def __init__(self,
+                 writer: DataWriter,                            # writer: The writer the spooled batches are drained to, e.g. an InfluxdbWriter or KafkaWriter.
+                 spool_dir: str,                                # spool_dir: Directory of the spool segments. Segments left by an earlier run are drained first.
+                 segment_bytes: int = 16 << 20,                 # segment_bytes: Seal the current segment once it holds this many bytes.
+                 segment_interval: float = 1.0,                 # segment_interval: Seal the current segment once it is this many seconds old, so the drain lag stays bounded.
+                 drain_batch_rows: int = 50_000,                # drain_batch_rows: Maximum number of rows handed to the writer in one write() call.
+                 retry_interval: float = 0.5,                   # retry_interval: Seconds to wait before retrying a failed write. Doubled after every failure.
+                 max_retry_interval: float = 30.0,              # max_retry_interval: Upper bound of the retry wait.
+                 max_spool_bytes: int = None,                   # max_spool_bytes: Delete the oldest sealed segments once the spool holds more than this many bytes. Default is None (unbounded).
+                 close_timeout: float = None,                   # close_timeout: Seconds close() waits for the spool to drain. Undrained segments stay on disk for the next run. Default is None (wait forever).
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.spool_dir = spool_dir
+        self.segment_bytes = segment_bytes
+        self.segment_interval = segment_interval
+        self.drain_batch_rows = drain_batch_rows
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.max_spool_bytes = max_spool_bytes
+        self.close_timeout = close_timeout
+        self._cond = threading.Condition()
+        self._sealed: deque[_Segment] = deque()
+        self._current: _Segment = None
+        self._file: pa.OSFile = None
+        self._stream: pa.ipc.RecordBatchStreamWriter = None
+        self._schema: pa.Schema = None
+        self._sequence = 0
+        self._closing = False
+        self._abort = False
+        self._draining = False
+        # spool statistics
+        self.spooled_rows = 0
+        self.drained_rows = 0
+        self.dropped_rows = 0
+        self.retries = 0
+        self.segments_drained = 0
+
+        os.makedirs(spool_dir, exist_ok=True)
+        self._recover()
+        self._drainer = threading.Thread(target=self._drain_runner, name=f"SpoolingWriter-{type(writer).__name__}")
+        self._drainer.daemon = True
+        self._drainer.start()
+        logger.info(f"SpoolingWriter::WriterInitiated: writer={type(writer).__name__}, spool_dir={spool_dir}, recovered_segments={len(self._sealed)}")
+
+    def _recover(self) -> None:
+        # segments are named by sequence number, so the listing order is the write order
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if name.endswith(".arrows.part"):
+                # a segment that was still open when the previous run stopped
+                sealed_path = path[:-len(".part")]
+                os.replace(path, sealed_path)
+                path, name = sealed_path, name[:-len(".part")]
+            if not name.endswith(".arrows"):
+                continue
+            rows = sum(batch.num_rows for batch in _read_segment(path))
+            self._sealed.append(_Segment(path, rows, os.path.getsize(path), os.path.getmtime(path)))
+            self.spooled_rows += rows
+            self._sequence = max(self._sequence, int(name.split(".")[0]) + 1)
+
+    def write(self, data: DataBatch) -> None:
+        if len(data) == 0:
+            return
+        batch = to_record_batch(data)
+        with self._cond:
+            if self._closing:
+                raise ValueError("SpoolingWriter is closed")
+            if self._current is not None and not batch.schema.equals(self._schema):
+                # an IPC stream holds a single schema
+                self._seal()
+            if self._current is None:
+                self._open_segment(batch.schema)
+            self._stream.write_batch(batch)
+            self._current.rows += batch.num_rows
+            self._current.size = self._file.tell()
+            self.spooled_rows += batch.num_rows
+            if self._current.size >= self.segment_bytes or time.time() - self._current.created >= self.segment_interval:
+                self._seal()
+
+    def _open_segment(self, schema: pa.Schema) -> None:
+        path = os.path.join(self.spool_dir, f"{self._sequence:012d}.arrows.part")
+        self._sequence += 1
+        self._schema = schema
+        self._file = pa.OSFile(path, "wb")
+        self._stream = pa.ipc.new_stream(self._file, schema)
+        self._current = _Segment(path)
+
+    def _seal(self) -> None:
+        # called with the lock held. The rename makes the finished segment visible to the drainer
+        self._stream.close()
+        self._file.close()
+        segment = self._current
+        segment.size = os.path.getsize(segment.path)
+        sealed_path = segment.path[:-len(".part")]
+        os.replace(segment.path, sealed_path)
+        segment.path = sealed_path
+        self._sealed.append(segment)
+        self._current, self._stream, self._file = None, None, None
+        self._enforce_max_size()
+        self._cond.notify_all()
+
+    def _enforce_max_size(self) -> None:
+        if self.max_spool_bytes is None:
+            return
+        # the oldest segment may be the one being drained; it is kept and the next ones are dropped instead
+        while sum(segment.size for segment in self._sealed) > self.max_spool_bytes and len(self._sealed) > 1:
+            segment = self._sealed[1] if self._draining else self._sealed[0]
+            self._sealed.remove(segment)
+            os.remove(segment.path)
+            self.dropped_rows += segment.rows
+            logger.warning(f"SpoolingWriter::SegmentDropped: segment={segment.path}, rows={segment.rows}, reason=max_spool_bytes")
+
+    def _drain_runner(self) -> None:
+        while True:
+            with self._cond:
+                while not self._sealed:
+                    if self._current is not None and (self._closing or time.time() - self._current.created >= self.segment_interval):
+                        # the producer went quiet: seal the open segment so its rows don't wait for the next write
+                        self._seal()
+                        continue
+                    if self._closing or self._abort:
+                        return
+                    self._cond.wait(self.segment_interval)
+                if self._abort:
+                    return
+                segment = self._sealed[0]
+                self._draining = True
+            drained = False
+            try:
+                # a segment is removed only once all of its rows were written, so delivery is at-least-once: a
+                # segment cut short by close_timeout is written again from its start by the next run
+                drained = self._drain_segment(segment)
+            finally:
+                # one locked section: the head segment stays protected from _enforce_max_size until it is gone
+                with self._cond:
+                    self._draining = False
+                    if drained:
+                        self._sealed.remove(segment)
+                        os.remove(segment.path)
+                        self.segments_drained += 1
+                        self._cond.notify_all()
+            if not drained:
+                return
+
+    def _drain_segment(self, segment: _Segment) -> bool:
+        batches = _read_segment(segment.path)
+        start = 0
+        while start < len(batches):
+            # hand the writer up to drain_batch_rows rows at once
+            end, rows = start, 0
+            while end < len(batches) and (end == start or rows + batches[end].num_rows <= self.drain_batch_rows):
+                rows += batches[end].num_rows
+                end += 1
+            chunk = batches[start] if end == start + 1 else pa.Table.from_batches(batches[start:end]).combine_chunks().to_batches()[0]
+            if not self._write_with_retry(chunk):
+                return False
+            with self._cond:
+                self.drained_rows += rows
+            start = end
+        return True
+
+    def _write_with_retry(self, batch: pa.RecordBatch) -> bool:
+        wait = self.retry_interval
+        while True:
+            try:
+                self.writer.write(batch)
+                return True
+            except Exception as e:
+                self.retries += 1
+                logger.warning(f"SpoolingWriter::WriteFailed: writer={type(self.writer).__name__}, rows={batch.num_rows}, retry_in={wait:.1f}s, error={e}")
+            with self._cond:
+                if self._cond.wait_for(lambda: self._abort, wait):
+                    return False
+            wait = min(wait * 2, self.max_retry_interval)
+
+    def stats(self) -> dict:
+        with self._cond:
+            segments = list(self._sealed) + ([self._current] if self._current is not None else [])
+            return {
+                "spooled_rows": self.spooled_rows,
+                "drained_rows": self.drained_rows,
+                "dropped_rows": self.dropped_rows,
+                "lag_rows": self.spooled_rows - self.drained_rows - self.dropped_rows,
+                "lag_seconds": time.time() - segments[0].created if segments else 0.0,
+                "spool_bytes": sum(segment.size for segment in segments),
+                "segments": len(segments),
+                "segments_drained": self.segments_drained,
+                "retries": self.retries,
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            if self._current is not None:
+                self._seal()
+            self._cond.notify_all()
+        self._drainer.join(self.close_timeout)
+        if self._drainer.is_alive():
+            # give up on the sink: the remaining segments are drained by the next run
+            with self._cond:
+                self._abort = True
+                self._cond.notify_all()
+            self._drainer.join()
+        stats = self.stats()
+        logger.info(f"SpoolingWriter::WriterClosed: writer={type(self.writer).__name__}, drained_rows={stats['drained_rows']}, lag_rows={stats['lag_rows']}, segments_left={stats['segments']}, retries={stats['retries']}")
+        self.writer.close()
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "writer": "DataWriter",
+            "spool_dir": "str",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return SpoolingWriter(**config)
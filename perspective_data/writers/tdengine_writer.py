@@ -0,0 +1,235 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+import taosws
+import timeit
+from .base import DataWriter
+from ..columnar import DataBatch, to_dataframe
+from .timestamps import NAIVE_TIMEZONE, to_epochs
+from ..utils import logger
+
+
+# Generator.schema type names mapped to TDengine column types. Strings are NCHAR(nchar_length)
+TDENGINE_TYPES: dict[str, str] = {
+    "float": "DOUBLE",
+    "float32": "FLOAT",
+    "int": "BIGINT",
+    "integer": "BIGINT",
+    "bool": "BOOL",
+    "boolean": "BOOL",
+    "str": "NCHAR",
+    "string": "NCHAR",
+    "datetime": "TIMESTAMP",
+    "datetime64[ns]": "TIMESTAMP",
+    "date": "TIMESTAMP",
+}
+
+# epoch precision mapped to the taosws timestamp column builder
+_TIMESTAMP_COLUMNS = {
+    "ms": taosws.millis_timestamps_to_column,
+    "us": taosws.micros_timestamps_to_column,
+    "ns": taosws.nanos_timestamps_to_column,
+}
+
+# epoch precision mapped to the taosws precision of timestamp tags
+_TAG_PRECISIONS = {
+    "ms": taosws.PyPrecision.Milliseconds,
+    "us": taosws.PyPrecision.Microseconds,
+    "ns": taosws.PyPrecision.Nanoseconds,
+}
+
+
+def subtable_name(stable: str, values: tuple) -> str:
+    """
+    Name the subtable of a tag key, e.g. ('AAPL.N',) -> 'stocks_aapl_n_1c2e6b3a'. Characters TDengine doesn't allow in
+    table names are replaced, and a checksum of the original key keeps keys like 'AAPL.N' and 'AAPL_N' apart.
+    """
+    key = "|".join(map(str, values))
+    name = re.sub(r"[^0-9a-zA-Z_]", "_", f"{stable}_{key}").lower()
+    if name != f"{stable}_{key}":
+        name += f"_{zlib.crc32(key.encode('utf-8')):08x}"
+    return name
+
+
+def _column_type(type_name: str, nchar_length: int) -> str:
+    if type_name not in TDENGINE_TYPES:
+        raise ValueError(f"Unknown schema type: {type_name}")
+    column_type = TDENGINE_TYPES[type_name]
+    return f"NCHAR({nchar_length})" if column_type == "NCHAR" else column_type
+
+
+class TDengineWriter(DataWriter):
+    def __init__(self,
+                 database: str,
+                 table: str,
+                 schema: dict,
+                 host: str = "localhost",
+                 port: int = 6041,
+                 user: str = "root",
+                 password: str = "taosdata",
+                 timestamp_col: str = "timestamp",             # timestamp_col: The primary timestamp column. It is always the first column of the table.
+                 tag_cols: list[str] = None,                    # tag_cols: Write into a supertable named `table`, with one subtable per distinct tag key, e.g. ['ticker'] or ['station_name'].
+                 precision: str = "ms",                         # precision: The database timestamp precision: 'ms', 'us' or 'ns'.
+                 naive_timezone: str = NAIVE_TIMEZONE,          # naive_timezone: The timezone of naive datetimes: 'UTC', 'local' or a timezone name.
+                 nchar_length: int = 64,                        # nchar_length: Length of the NCHAR columns and tags of the created table.
+                 create_table: bool = True,                     # create_table: Create the database and (super)table if they don't exist.
+                 drop_table: bool = False,                      # drop_table: Drop the (super)table before creating it.
+                 batch_rows: int = 0,                           # batch_rows: Bind batches into the prepared statement and only execute it once this many rows are bound. 0 executes every batch.
+                 **kwargs
+                 ) -> None:
+        super().__init__(**kwargs)
+        if precision not in _TIMESTAMP_COLUMNS:
+            raise ValueError(f"Invalid precision: {precision}. Valid values are: {list(_TIMESTAMP_COLUMNS)}")
+        if timestamp_col not in schema:
+            raise ValueError(f"Timestamp column {timestamp_col} is not in the schema")
+        self.database = database
+        self.table = table
+        self.schema = schema
+        self.timestamp_col = timestamp_col
+        self.tag_cols = tag_cols or []
+        self.precision = precision
+        self.naive_timezone = naive_timezone
+        self.batch_rows = batch_rows
+        # the timestamp goes first, tags are not part of the value columns
+        self.value_cols = [timestamp_col] + [col for col in schema if col != timestamp_col and col not in self.tag_cols]
+        self._pending_rows = 0
+        # insert statistics
+        self.executes = 0
+        self.rows_inserted = 0
+        self.insert_time = 0.0
+
+        self.conn = taosws.connect(host=host, port=port, user=user, password=password)
+        if create_table:
+            self.conn.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` PRECISION '{precision}'")
+        self.conn.execute(f"USE `{database}`")
+        if create_table:
+            if drop_table:
+                self.conn.execute(f"DROP {'STABLE' if self.tag_cols else 'TABLE'} IF EXISTS `{table}`")
+            columns = ", ".join(f"`{col}` {_column_type(schema[col], nchar_length)}" for col in self.value_cols)
+            if self.tag_cols:
+                tags = ", ".join(f"`{col}` {_column_type(schema[col], nchar_length)}" for col in self.tag_cols)
+                self.conn.execute(f"CREATE STABLE IF NOT EXISTS `{table}` ({columns}) TAGS ({tags})")
+            else:
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS `{table}` ({columns})")
+
+        # the insert is prepared once. With tags, the subtable name and tags are bound per key and the subtable is
+        # created on its first insert
+        placeholders = ", ".join("?" * len(self.value_cols))
+        if self.tag_cols:
+            sql = f"INSERT INTO ? USING `{table}` TAGS ({', '.join('?' * len(self.tag_cols))}) VALUES ({placeholders})"
+        else:
+            sql = f"INSERT INTO `{table}` VALUES ({placeholders})"
+        self.stmt = self.conn.statement()
+        self.stmt.prepare(sql)
+        logger.info(f"TDengineWriter::WriterInitiated: host={host}, port={port}, table={database}.{table}, tags={self.tag_cols}, precision={precision}")
+
+    def _column_values(self, column: pd.Series, type_name: str) -> np.ndarray:
+        # whole NumPy columns are bound as they are. Missing values become None (NULL)
+        if pd.api.types.is_datetime64_any_dtype(column):
+            values = to_epochs(column, self.precision, self.naive_timezone)
+            return np.where(column.isna().to_numpy(), None, values) if column.hasnans else values
+        if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            if not column.hasnans:
+                return column.to_numpy()
+            if TDENGINE_TYPES[type_name] in ("BIGINT", "BOOL"):
+                # integer and boolean columns with missing values may arrive as float columns with NaN
+                column = column.astype("Int64" if TDENGINE_TYPES[type_name] == "BIGINT" else "boolean")
+            return column.to_numpy(dtype=object, na_value=None)
+        return column.astype(object).where(column.notna(), None).to_numpy()
+
+    def _bind_column(self, type_name: str, values: np.ndarray) -> 'taosws.PyColumnView':
+        column_type = TDENGINE_TYPES[type_name]
+        # one C-level pass to Python scalars: taosws extracts them faster than NumPy scalars and rejects NumPy booleans
+        values = values.tolist()
+        if column_type == "TIMESTAMP":
+            return _TIMESTAMP_COLUMNS[self.precision](values)
+        if column_type == "DOUBLE":
+            return taosws.doubles_to_column(values)
+        if column_type == "FLOAT":
+            return taosws.floats_to_column(values)
+        if column_type == "BIGINT":
+            return taosws.big_ints_to_column(values)
+        if column_type == "BOOL":
+            return taosws.bools_to_column(values)
+        return taosws.nchar_to_column(values)
+
+    def _bind_tag(self, type_name: str, value: object) -> 'taosws.PyTagView':
+        # tags are bound as single scalars. NumPy scalars are turned into Python ones, which taosws requires
+        column_type = TDENGINE_TYPES[type_name]
+        value = value.item() if isinstance(value, np.generic) else value
+        if column_type == "TIMESTAMP":
+            return taosws.timestamp_to_tag(value, _TAG_PRECISIONS[self.precision])
+        if column_type == "DOUBLE":
+            return taosws.double_to_tag(value)
+        if column_type == "FLOAT":
+            return taosws.float_to_tag(value)
+        if column_type == "BIGINT":
+            return taosws.big_int_to_tag(value)
+        if column_type == "BOOL":
+            return taosws.bool_to_tag(value)
+        return taosws.nchar_to_tag(value)
+
+    def write(self, data: DataBatch) -> None:
+        df = to_dataframe(data)
+        if len(df) == 0:
+            return
+        start_time = timeit.default_timer()
+        columns = {col: self._column_values(df[col], self.schema[col]) for col in self.value_cols + self.tag_cols}
+        if self.tag_cols:
+            # one bind and add_batch per subtable, all executed together
+            groups = df.groupby(self.tag_cols, sort=False).indices
+            for key, rows in groups.items():
+                key = key if isinstance(key, tuple) else (key,)
+                tags = [self._bind_tag(self.schema[col], columns[col][rows[0]]) for col in self.tag_cols]
+                self.stmt.set_tbname_tags(subtable_name(self.table, key), tags)
+                self.stmt.bind_param([self._bind_column(self.schema[col], columns[col][rows]) for col in self.value_cols])
+                self.stmt.add_batch()
+        else:
+            self.stmt.bind_param([self._bind_column(self.schema[col], columns[col]) for col in self.value_cols])
+            self.stmt.add_batch()
+        self._pending_rows += len(df)
+        if self._pending_rows >= self.batch_rows:
+            self.flush()
+        self.insert_time += timeit.default_timer() - start_time
+
+    def flush(self) -> None:
+        """Execute the bound batches."""
+        if not self._pending_rows:
+            return
+        start_time = timeit.default_timer()
+        self.stmt.execute()
+        self.executes += 1
+        self.rows_inserted += self._pending_rows
+        logger.debug(f"TDengineWriter::WriteBatch: rows={self._pending_rows}, table={self.database}.{self.table}, time={(timeit.default_timer() - start_time) * 1000:.3f} ms")
+        self._pending_rows = 0
+
+    def stats(self) -> dict:
+        return {
+            "executes": self.executes,
+            "rows": self.rows_inserted,
+            "pending_rows": self._pending_rows,
+            "insert_time": self.insert_time,
+            "rows_per_second": self.rows_inserted / self.insert_time if self.insert_time else 0.0,
+        }
+
+    def close(self) -> None:
+        start_time = timeit.default_timer()
+        self.flush()
+        self.insert_time += timeit.default_timer() - start_time
+        stats = self.stats()
+        logger.info(f"TDengineWriter::WriterClosed: table={self.database}.{self.table}, executes={stats['executes']}, rows={stats['rows']}, rows_per_second={stats['rows_per_second']:.0f}")
+        self.stmt.close()
+        self.conn.close()
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {
+            "database": "str",
+            "table": "str",
+            "schema": "dict",
+        }
+
+    @staticmethod
+    def from_config(config: dict) -> 'DataWriter':
+        return TDengineWriter(**config)
@@ -0,0 +1,117 @@
+"""
+timestamps.py
+
+This module converts the datetime columns of a batch to UTC epochs, shared by the writers whose sinks expect integer
+timestamps. Every conversion is a single vectorized NumPy pass over the column: tz-aware columns are already stored
+as UTC instants, naive columns are shifted from their assumed timezone, and the result is cast to the target unit.
+The input frame is never modified.
+
+Functions:
+    to_epochs(column: pd.Series, precision: str = "ns", naive_timezone: str = "UTC") -> np.ndarray:
+        Convert a datetime (or integer epoch) column to int64 UTC epochs in the given precision.
+
+Classes:
+    TimestampNormalizer:
+        Convert the datetime columns of every batch of a stream, planning the conversion once per schema.
+"""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+__all__ = [
+    "PRECISIONS",
+    "NAIVE_TIMEZONE",
+    "to_epochs",
+    "TimestampNormalizer",
+    ]
+
+
+# supported epoch precisions
+PRECISIONS: tuple[str, ...] = ("s", "ms", "us", "ns")
+
+# the default naive_timezone of every writer, so a batch of naive datetimes lands at the same instants in every sink
+NAIVE_TIMEZONE: str = "local"
+
+
+def _check_precision(precision: str) -> str:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Invalid precision: {precision}. Valid values are: {list(PRECISIONS)}")
+    return precision
+
+
+def _local_offset() -> np.timedelta64:
+    return np.timedelta64(int(datetime.now().astimezone().utcoffset().total_seconds() * 1e6), "us")
+
+
+def to_epochs(column: pd.Series, precision: str = "ns", naive_timezone: str = "UTC") -> np.ndarray:
+    """
+    Convert a datetime column to int64 UTC epochs in the given precision.
+
+    Args:
+        column (pd.Series): A datetime column, tz-aware or naive. Integer columns are taken as epochs in `precision` and returned as is.
+        precision (str): The epoch unit: 's', 'ms', 'us' or 'ns'. Default is 'ns'.
+        naive_timezone (str): The timezone naive datetimes are in: 'UTC', 'local' (the machine's current UTC offset) or a timezone name. Default is 'UTC'.
+
+    Returns:
+        np.ndarray: The int64 epochs. Missing values are the int64 minimum (NaT).
+    """
+    _check_precision(precision)
+    if pd.api.types.is_integer_dtype(column):
+        return column.to_numpy(dtype=np.int64)
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        raise ValueError(f"Column {column.name} must be a datetime or integer column. Got: {column.dtype}")
+    if column.dt.tz is not None:
+        # tz-aware values are stored as UTC instants; dropping the timezone doesn't touch the data
+        values = column.dt.tz_convert(None).to_numpy()
+    elif naive_timezone == "UTC":
+        values = column.to_numpy()
+    elif naive_timezone == "local":
+        values = column.to_numpy() - _local_offset()
+    else:
+        # named timezones follow their DST rules. Ambiguous times resolve to standard time
+        localized = column.dt.tz_localize(naive_timezone, ambiguous=np.zeros(len(column), dtype=bool), nonexistent="shift_forward")
+        values = localized.dt.tz_convert(None).to_numpy()
+    return values.astype(f"datetime64[{precision}]").view(np.int64)
+
+
+class TimestampNormalizer:
+    """
+    Convert the datetime columns of a batch to UTC epochs.
+
+    The columns to convert and how (naive or tz-aware) are planned from the batch schema, i.e. the column names and
+    dtypes, and the plan is cached, so a stream of batches with the same schema only pays for the conversions.
+
+    Args:
+        precision (str): The epoch unit: 's', 'ms', 'us' or 'ns'. Default is 'ns'.
+        naive_timezone (str): The timezone naive datetimes are in: 'UTC', 'local' or a timezone name. Default is 'UTC'.
+        columns (list[str]): The columns to convert. Default is None (every datetime column).
+    """
+
+    def __init__(self,
+                 precision: str = "ns",
+                 naive_timezone: str = "UTC",
+                 columns: list[str] = None,
+                 ) -> None:
+        self.precision: str = _check_precision(precision)
+        self.naive_timezone: str = naive_timezone
+        self.columns: list[str] = columns
+        self._plans: dict[tuple, list[str]] = {}
+
+    def plan(self, df: pd.DataFrame) -> list[str]:
+        """Return the datetime columns of the frame to convert, cached per schema."""
+        key = tuple(zip(df.columns, map(str, df.dtypes)))
+        plan = self._plans.get(key)
+        if plan is None:
+            candidates = df.columns if self.columns is None else [col for col in self.columns if col in df.columns]
+            plan = [col for col in candidates if pd.api.types.is_datetime64_any_dtype(df[col])]
+            self._plans[key] = plan
+        return plan
+
+    def normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return a new frame with the planned datetime columns replaced by int64 epochs. The input is not modified."""
+        plan = self.plan(df)
+        if not plan:
+            return df
+        return df.assign(**{col: to_epochs(df[col], self.precision, self.naive_timezone) for col in plan})
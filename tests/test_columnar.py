@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from perspective_data.columnar import ColumnarBatch, arrow_schema, to_dataframe, to_columnar, to_record_batch, concat_batches
+from perspective_data.generators.smart_grid import NewYorkSmartGridStreamGenerator
+
+
+SCHEMA = {"timestamp": "datetime64[ns]", "name": "string", "value": "float", "count": "int"}
+
+
+@pytest.fixture
+def batch():
+    return ColumnarBatch({
+        "timestamp": np.array(["2024-01-01T00:00:00", "2024-01-01T00:00:01"], dtype="datetime64[ns]"),
+        "name": np.array(["a", "b"], dtype=object),
+        "value": np.array([1.5, 2.5]),
+        "count": np.array([1, 2]),
+    }, schema=SCHEMA)
+
+
+def test_batch_roundtrip(batch):
+    record_batch = to_record_batch(batch)
+    assert record_batch.schema == arrow_schema(SCHEMA)
+    df = to_dataframe(record_batch)
+    assert df["name"].tolist() == ["a", "b"]
+    assert to_columnar(df)["value"].tolist() == [1.5, 2.5]
+
+
+def test_batch_to_arrow_is_zero_copy(batch):
+    record_batch = batch.to_arrow()
+    values = record_batch.column("value")
+    assert values.buffers()[1].address == batch["value"].ctypes.data
+    assert ColumnarBatch.from_arrow(record_batch)["value"].ctypes.data == batch["value"].ctypes.data
+
+
+def test_batch_rejects_ragged_columns():
+    with pytest.raises(ValueError):
+        ColumnarBatch({"a": np.arange(2), "b": np.arange(3)})
+
+
+def test_concat_batches(batch):
+    merged = concat_batches([batch, ColumnarBatch({}), batch])
+    assert isinstance(merged, ColumnarBatch)
+    assert len(merged) == 4
+    assert len(concat_batches([to_record_batch(batch), to_record_batch(batch)])) == 4
+    # empty input keeps its batch type and schema
+    empty = to_record_batch(batch).slice(0, 0)
+    merged = concat_batches([empty, empty])
+    assert isinstance(merged, pa.RecordBatch) and merged.schema == arrow_schema(SCHEMA)
+    assert isinstance(concat_batches([ColumnarBatch({}, schema=SCHEMA)]), ColumnarBatch)
+
+
+def test_to_record_batch_applies_the_schema(batch):
+    df = pd.DataFrame({
+        "extra": [1, 2],
+        "count": pd.array([1, None], dtype="Int64"),
+        "value": [1.5, 2.5],
+        "name": ["a", "b"],
+        "timestamp": pd.to_datetime(["2024-01-01 10:00", "2024-01-02 00:00"]),
+    })
+    for data in (df, pa.RecordBatch.from_pandas(df, preserve_index=False), to_columnar(df)):
+        record_batch = to_record_batch(data, schema=SCHEMA)
+        assert record_batch.schema == arrow_schema(SCHEMA)
+        assert record_batch.column("count").to_pylist() == [1, None]
+    dates = to_record_batch(df, schema={"timestamp": "date"})
+    assert dates.column("timestamp").to_pylist() == [datetime(2024, 1, 1).date(), datetime(2024, 1, 2).date()]
+
+
+@pytest.mark.parametrize("output_format, batch_type", [
+    ("pandas", pd.DataFrame),
+    ("columnar", ColumnarBatch),
+    ("arrow", pa.RecordBatch),
+])
+def test_generator_output_format(output_format, batch_type):
+    generator = NewYorkSmartGridStreamGenerator(interval=1, nrows=10, num_stations=4, start_time=datetime(2024, 1, 1), output_format=output_format)
+    published = []
+    generator.add_subscriber(published.append)
+    generator.end_time = datetime(2024, 1, 1, 0, 0, 3)
+    generator.backfill()
+    assert all(isinstance(b, batch_type) for b in published)
+    assert sum(len(b) for b in published) == 12
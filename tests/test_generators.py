@@ -1,7 +1,16 @@
 import pytest
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
+import time
+import asyncio
 from perspective_data.generators.smart_grid import NewYorkSmartGridStreamGenerator
+from perspective_data.generators.scheduler import DeadlineScheduler
+from perspective_data.generators.fanout import SubscriberQueue
+from perspective_data.generators.stations import procedural_stations, NEW_YORK_BBOX
+from perspective_data.generators.utils import RandomWaveGenerator as rwg
+from perspective_data.generators.base import AsyncStreamGenerator
+from perspective_data.writers.base import AsyncDataWriter
 
 @pytest.fixture
 def generator():
@@ -54,3 +63,295 @@ def test_end_time(generator):
     for _ in range(2):
         df = generator.get_data()
     assert df.empty
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("burst", [(1, 0), (1, 0), (1, 0)]),
+    ("skip", [(1, 0), (1, 1)]),
+    ("coalesce", [(1, 0), (2, 0)]),
+])
+def test_deadline_scheduler_catchup(policy, expected):
+    clock = FakeClock()
+    scheduler = DeadlineScheduler(interval=1.0, catchup_policy=policy, clock=clock)
+    scheduler.reset()
+    ticks = [scheduler.tick()]
+    # the first batch took 2.5 intervals to generate and publish
+    clock.now = 2.5
+    while scheduler.wait_time() == 0:
+        ticks.append(scheduler.tick())
+    assert [(t.count, t.skipped) for t in ticks] == expected
+    assert scheduler.next_deadline == 3.0
+    assert scheduler.max_lag == pytest.approx(ticks[1].lag)
+
+
+def test_stream_does_not_drift(generator):
+    generator.interval = 0.05
+    calls = []
+    generator.add_subscriber(lambda df: (calls.append(time.monotonic()), time.sleep(0.02)))
+    generator.start()
+    time.sleep(0.5)
+    generator.stop()
+    # with a sleep-after-work loop the period would be ~70ms and only ~7 ticks would fit
+    assert len(calls) >= 9
+    assert generator.scheduler_stats()["ticks"] == len(calls)
+
+
+@pytest.mark.parametrize("policy, expected_rows, dropped, merged", [
+    ("drop_oldest", [[2], [3]], 2, 0),
+    ("drop_newest", [[0], [1]], 2, 0),
+    ("merge", [[0, 1, 2], [3]], 0, 2),
+])
+def test_subscriber_queue_overflow(policy, expected_rows, dropped, merged):
+    received = []
+    queue = SubscriberQueue(lambda df: received.append(df["x"].tolist()), max_size=2, overflow_policy=policy)
+    # enqueue before the worker is started so the queue overflows deterministically
+    for i in range(4):
+        queue.put(pd.DataFrame({"x": [i]}))
+    queue.start()
+    assert queue.join(timeout=5)
+    queue.stop()
+    assert received == expected_rows
+    assert queue.stats()["dropped"] == dropped
+    assert queue.stats()["merged"] == merged
+
+
+def test_slow_subscriber_does_not_stall_fast_one(generator):
+    generator.interval = 0.02
+    fast, slow = [], []
+    generator.add_subscriber(lambda df: fast.append(len(df)), queue_size=4)
+    generator.add_subscriber(lambda df: (time.sleep(0.2), slow.append(len(df))), queue_size=1, overflow_policy="drop_oldest")
+    generator.start()
+    time.sleep(0.5)
+    generator.stop()
+    stats = {s["name"]: s for s in generator.subscriber_stats()}
+    assert len(fast) >= 15
+    assert len(slow) <= 5
+    assert sum(s["dropped"] for s in stats.values()) > 0
+
+
+class CounterAsyncStreamGenerator(AsyncStreamGenerator):
+    async def get_data(self) -> pd.DataFrame:
+        return pd.DataFrame({"timestamp": [self.current_time]})
+
+    @property
+    def schema(self) -> dict:
+        return {"timestamp": "datetime64[ns]"}
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {}
+
+    @staticmethod
+    def from_config(config: dict) -> 'CounterAsyncStreamGenerator':
+        return CounterAsyncStreamGenerator(**config)
+
+
+class SlowAsyncWriter(AsyncDataWriter):
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+    async def write(self, data: pd.DataFrame) -> None:
+        SlowAsyncWriter.in_flight += 1
+        SlowAsyncWriter.max_in_flight = max(SlowAsyncWriter.max_in_flight, SlowAsyncWriter.in_flight)
+        await asyncio.sleep(0.01)
+        SlowAsyncWriter.in_flight -= 1
+        self.rows += len(data)
+
+    async def close(self) -> None:
+        pass
+
+    @staticmethod
+    def required_parameters() -> dict[str, str]:
+        return {}
+
+    @staticmethod
+    def from_config(config: dict) -> 'SlowAsyncWriter':
+        return SlowAsyncWriter()
+
+
+def test_async_stream_generator():
+    start_time = datetime(2024, 1, 1)
+    generator = CounterAsyncStreamGenerator(interval=0.02, start_time=start_time, end_time=start_time + timedelta(seconds=0.2))
+    writers = [SlowAsyncWriter(), SlowAsyncWriter()]
+    for writer in writers:
+        generator.add_subscriber(writer)
+    asyncio.run(asyncio.wait_for(generator.run(), timeout=5))
+    assert [writer.rows for writer in writers] == [10, 10]
+    # both writers were awaited concurrently on the same loop
+    assert SlowAsyncWriter.max_in_flight == 2
+    assert not generator.is_running()
+
+
+def test_async_stream_generator_rejects_subscriber_queues():
+    generator = CounterAsyncStreamGenerator(interval=1.0)
+    with pytest.raises(ValueError):
+        generator.add_subscriber(SlowAsyncWriter(), queue_size=4)
+    with pytest.raises(ValueError):
+        generator.add_subscriber(print, overflow_policy="drop_oldest")
+    with pytest.raises(ValueError):
+        CounterAsyncStreamGenerator(interval=1.0, subscriber_queue_size=4)
+
+
+def test_backfill(generator):
+    generator.interval = 1.0
+    generator.end_time = generator.start_time + timedelta(seconds=200)
+    rows = []
+    generator.add_subscriber(lambda df: rows.append(len(df)))
+    started = time.monotonic()
+    stats = generator.backfill()
+    assert time.monotonic() - started < 5
+    assert stats["batches"] == len(rows) == 200
+    assert stats["rows"] == sum(rows) == 200 * generator.num_stations
+    assert stats["rows_per_sec"] > 0
+    assert generator.current_time == generator.end_time
+
+
+def test_backfill_speed(generator):
+    generator.interval = 1.0
+    generator.end_time = generator.start_time + timedelta(seconds=10)
+    stats = generator.backfill(speed=50)
+    # 10 simulated seconds at 50x take ~0.2s of wall-clock time
+    assert 0.15 < stats["elapsed"] < 1.0
+    assert stats["batches"] == 10
+
+
+def test_start_after_backfill_keeps_the_configured_speed(generator):
+    generator.interval = 0.05
+    generator.end_time = generator.start_time + timedelta(seconds=1)
+    generator.backfill()
+    assert generator.speed == 1.0
+    # a live run after the backfill is paced by the wall clock again, not replayed as fast as possible
+    generator.end_time = None
+    generator.start()
+    time.sleep(0.3)
+    generator.stop()
+    assert generator.throughput_stats()["batches"] <= 10
+
+
+def test_async_backfill():
+    start_time = datetime(2024, 1, 1)
+    generator = CounterAsyncStreamGenerator(interval=1.0, start_time=start_time, end_time=start_time + timedelta(seconds=100))
+
+    async def main():
+        stats = await generator.backfill()
+        assert stats["batches"] == 100
+        assert generator.speed == 1.0
+        generator.current_time = start_time
+        generator.start()
+        # a second run can't be started while the first one is running
+        with pytest.raises(RuntimeError):
+            await generator.backfill()
+        generator.stop()
+        await generator.wait_closed()
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+
+def test_get_batch_vectorized(generator):
+    generator._cache["fault"][:4] = 5
+    batch = generator.get_batch()
+    assert len(batch) == generator.num_stations
+    assert list(batch.column_names) == list(generator.schema.keys())
+    # timestamps are staggered evenly across the interval
+    steps = np.diff(batch["timestamp"]).astype("timedelta64[ns]").astype(np.int64)
+    assert np.allclose(steps, generator.interval / generator.num_stations * 1e9, atol=1)
+    # stations in fault mode report zero power and count down their fault duration
+    assert (batch["voltage"][:4] == 0).all() and (batch["voltage"][4:] > 0).all()
+    assert (batch["status"][:4] == "fault").all()
+    assert (generator._cache["fault"][:4] == 4).all()
+
+
+def test_procedural_stations_are_deterministic():
+    a = procedural_stations(1000, seed=7)
+    b = procedural_stations(1000, seed=7)
+    assert (a["name"] == b["name"]).all() and (a["lat"] == b["lat"]).all()
+    assert len(set(a["name"])) == 1000
+    assert a["lat"].dtype == np.float32
+    min_lat, min_lon, max_lat, max_lon = NEW_YORK_BBOX
+    assert ((a["lat"] >= min_lat) & (a["lat"] <= max_lat)).all()
+    assert ((a["lon"] >= min_lon) & (a["lon"] <= max_lon)).all()
+
+
+def test_procedural_topology_scales_past_subway_stations():
+    generator = NewYorkSmartGridStreamGenerator(interval=1, nrows=10, num_stations=500, start_time=datetime(2024, 1, 1))
+    assert generator.topology == "procedural"
+    df = generator.get_data()
+    assert len(df) == 500
+    assert df["station_name"].nunique() == 500
+
+
+@pytest.mark.parametrize("wave_mode, smooth", [("full", None), ("half", None), ("half", 5)])
+def test_wave_bank_matches_materialized_wave(wave_mode, smooth):
+    bank = rwg.sinusoidal_wave_bank(1, num_points=200, periods=4, amplitude=3.0, wave_mode=wave_mode, varying_mode="fixed", phase=0.7, smooth=smooth)
+    expected = rwg.sinusoidal_wave(num_points=200, periods=4, amplitude=3.0, wave_mode=wave_mode, varying_mode="fixed", phase=0.7, smooth=smooth).to_numpy()
+    assert np.allclose(bank.evaluate(np.arange(200))[0], expected)
+    # single frame lookups agree with the vectorized evaluation and wrap around after num_points
+    assert bank.at(37)[0] == pytest.approx(expected[37])
+    assert bank.at(237)[0] == pytest.approx(expected[37])
+
+
+def test_wave_bank_memory_is_independent_of_num_points():
+    bank = rwg.sinusoidal_wave_bank(1000, num_points=10**12, periods=np.full(1000, 5), amplitude=(1.0, 10.0))
+    assert bank.starts.nbytes + bank.lengths.nbytes + bank.amplitudes.nbytes == 1000 * 5 * (8 + 8 + 4)
+    assert (bank.lengths.sum(axis=1) == 10**12).all()
+    assert bank.at(10**11).shape == (1000,)
+    # waves that fit in int32 store their segments in half the memory
+    bank = rwg.sinusoidal_wave_bank(1000, num_points=10**6, periods=np.full(1000, 5), amplitude=(1.0, 10.0))
+    assert bank.starts.nbytes + bank.lengths.nbytes + bank.amplitudes.nbytes == 1000 * 5 * (4 + 4 + 4)
+    small = rwg.sinusoidal_wave_bank(8, num_points=5000, periods=np.full(8, 5), amplitude=(1.0, 10.0), wave_mode="half")
+    assert small.starts.dtype == np.int32
+    assert np.allclose(small.evaluate(np.arange(5000)), small.materialize())
+
+
+def test_sinusoidal_waves_batched():
+    periods = np.array([1, 3, 5, 7])
+    phase = np.array([0.0, 0.5, 1.0, 1.5])
+    bank = rwg.sinusoidal_wave_bank(4, num_points=250, periods=periods, amplitude=(1.0, 5.0), wave_mode="half", phase=phase, smooth=3)
+    assert np.allclose(bank.materialize(), bank.evaluate(np.arange(250)))
+    # per-row fixed amplitudes written into a caller-provided float32 buffer
+    out = np.empty((4, 100), dtype=np.float32)
+    waves = rwg.sinusoidal_waves(4, num_points=100, periods=1, amplitude=np.array([1.0, 2.0, 3.0, 4.0]), varying_mode="fixed", out=out)
+    assert waves is out
+    assert np.allclose(np.abs(out).max(axis=1), [1.0, 2.0, 3.0, 4.0], atol=1e-2)
+    with pytest.raises(ValueError):
+        rwg.sinusoidal_waves(4, num_points=10, out=np.empty((4, 11)))
+
+
+def test_sinusoidal_waves_amplitude_of_two_waves():
+    # with two waves an array holds per-wave amplitudes and a tuple is one (low, high) range
+    waves = rwg.sinusoidal_waves(2, num_points=100, amplitude=np.array([1.0, 4.0]), varying_mode="fixed")
+    assert np.allclose(np.abs(waves).max(axis=1), [1.0, 4.0], atol=1e-2)
+    ranges = rwg.sinusoidal_wave_bank(2, num_points=100, periods=5, amplitude=np.array([[1.0, 2.0], [8.0, 9.0]]), varying_mode="amp")
+    assert ((ranges.amplitudes[0] >= 1.0) & (ranges.amplitudes[0] <= 2.0)).all()
+    assert ((ranges.amplitudes[1] >= 8.0) & (ranges.amplitudes[1] <= 9.0)).all()
+    bank = rwg.sinusoidal_wave_bank(2, num_points=100, periods=5, amplitude=(1.0, 4.0), varying_mode="amp")
+    assert ((bank.amplitudes >= 1.0) & (bank.amplitudes <= 4.0)).all()
+    with pytest.raises(ValueError):
+        rwg.sinusoidal_waves(3, num_points=10, amplitude=np.array([1.0, 4.0]))
+
+
+@pytest.mark.parametrize("wave_mode", ["full", "half"])
+def test_wave_stream_chunks_are_seamless(wave_mode):
+    params = dict(num_waves=8, period_length=(5, 40), amplitude=(1.0, 5.0), wave_mode=wave_mode, phase=np.linspace(0, 3, 8),
+                  envelope_period=300, smooth=4, noise=0.1, seed=11)
+    expected = rwg.sinusoidal_wave_stream(**params).next(500)
+    stream = rwg.sinusoidal_wave_stream(**params)
+    chunks = [stream.next(n) for n in (1, 2, 3, 7, 37, 50, 400)]
+    assert stream.position == 500
+    assert np.allclose(np.concatenate(chunks, axis=1), expected)
+    stream.reset()
+    assert np.allclose(stream.next(500), expected)
+    # the first smooth-1 samples of the stream have an incomplete window
+    stream = rwg.sinusoidal_wave_stream(**{**params, "noise": None})
+    assert (stream.next(2) == 0).all() and (stream.next(2)[:, 0] == 0).all()
@@ -0,0 +1,735 @@
+import json
+from datetime import datetime
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from perspective_data.columnar import to_columnar
+from perspective_data.writers.file_writer import FileWriter
+from perspective_data.writers.kafka_serializers import CONTENT_TYPE_HEADER, decode_message, get_serializer, message_content_type
+from perspective_data.writers.line_protocol import to_line_protocol
+from perspective_data.writers.timestamps import NAIVE_TIMEZONE, TimestampNormalizer, to_epochs
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 00:00:01", "2024-01-01 00:00:02"]),
+        "station": ["Times Sq", "a,b=c", None],
+        "status": ["active", "", "fault"],
+        "power": [1.5, np.nan, np.inf],
+        "count": pd.array([1, None, 3], dtype="Int64"),
+        "online": [True, False, True],
+        "note": ['say "hi"', "c:\\x", None],
+    })
+
+
+def test_line_protocol(frame):
+    payload = to_line_protocol(frame, "smart grid", ["status", "station"], ["power", "count", "online", "note"], "timestamp", precision="s")
+    assert payload.decode().split("\n") == [
+        'smart\\ grid,station=Times\\ Sq,status=active power=1.5,count=1i,online=true,note="say \\"hi\\"" 1704067200',
+        'smart\\ grid,station=a\\,b\\=c online=false,note="c:\\\\x" 1704067201',
+        'smart\\ grid,status=fault count=3i,online=true 1704067202',
+    ]
+
+
+def test_line_protocol_skips_rows_without_fields(frame):
+    assert to_line_protocol(frame, "m", [], ["power"]) == b"m power=1.5"
+    assert to_line_protocol(frame.iloc[1:], "m", [], ["power"]) == b""
+    with pytest.raises(ValueError):
+        to_line_protocol(frame, "m", [], [])
+
+
+def test_to_epochs(frame):
+    epochs = to_epochs(frame["timestamp"], precision="ms")
+    assert epochs.tolist() == [1704067200000, 1704067201000, 1704067202000]
+    aware = frame["timestamp"].dt.tz_localize("America/New_York")
+    assert to_epochs(aware, precision="s")[0] == 1704067200 + 5 * 3600
+    assert to_epochs(frame["timestamp"], precision="s", naive_timezone="America/New_York")[0] == 1704067200 + 5 * 3600
+
+
+def test_timestamp_normalizer_does_not_mutate_input(frame):
+    normalizer = TimestampNormalizer(precision="ms")
+    original = frame.copy()
+    normalized = normalizer.normalize(frame)
+    assert normalized["timestamp"].tolist() == [1704067200000, 1704067201000, 1704067202000]
+    pd.testing.assert_frame_equal(frame, original)
+    # the plan is computed once per schema
+    normalizer.normalize(frame.iloc[:1])
+    assert list(normalizer._plans.values()) == [["timestamp"]]
+
+
+def test_kafka_json_row_serializer(frame):
+    serializer = get_serializer("json")
+    messages = serializer.serialize(frame.assign(note=["multi\nline", "x", None]))
+    assert len(messages) == len(frame)
+    assert decode_message(messages[0], serializer.content_type)["note"] == "multi\nline"
+    assert json.loads(messages[1])["power"] is None
+    assert serializer.serialize(frame.iloc[:0]) == []
+
+
+@pytest.mark.parametrize("name", ["arrow", "msgpack", "avro"])
+def test_kafka_batch_serializers(frame, name):
+    if name in ("msgpack", "avro"):
+        pytest.importorskip({"msgpack": "msgpack", "avro": "fastavro"}[name])
+    schema = {"timestamp": "datetime", "station": "string", "power": "float", "online": "bool"}
+    batch = frame[list(schema)]
+    serializer = get_serializer(name, schema=schema)
+    messages = serializer.serialize(batch)
+    # one message per batch, decodable from its content type header alone
+    assert len(messages) == 1
+    payload = decode_message(messages[0], message_content_type([(CONTENT_TYPE_HEADER, serializer.content_type.encode())]))
+    if name == "arrow":
+        decoded = pa.ipc.open_stream(payload).read_pandas()
+    elif name == "msgpack":
+        decoded = pd.DataFrame(payload).assign(timestamp=lambda df: pd.to_datetime(df["timestamp"], unit="ms"))
+    else:
+        decoded = pd.DataFrame(payload).assign(timestamp=lambda df: df["timestamp"].dt.tz_localize(None))
+    assert decoded["station"].tolist()[:2] == ["Times Sq", "a,b=c"] and pd.isna(decoded["station"].iloc[2])
+    assert decoded["power"].tolist()[0] == 1.5 and np.isnan(decoded["power"].tolist()[1])
+    assert decoded["online"].tolist() == [True, False, True]
+    assert (decoded["timestamp"].to_numpy(dtype="datetime64[ns]") == batch["timestamp"].to_numpy(dtype="datetime64[ns]")).all()
+
+
+class FakeProducer:
+    def __init__(self, config=None):
+        self.messages = []
+
+    def produce(self, topic, value, headers=None, on_delivery=None, key=None, partition=None):
+        self.messages.append((key, partition, value))
+
+    def poll(self, timeout):
+        return 0
+
+    def flush(self, timeout=None):
+        return 0
+
+    def __len__(self):
+        return 0
+
+
+class FakeTopicFuture:
+    def __init__(self, error=None):
+        self.error = error
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+
+
+class FakeAdminClient:
+    """A broker holding `topics` (name -> partition count). Topics in `concurrent_topics` are created by another client
+    while create_topics() runs, so it fails like a TopicExistsError."""
+    topics: dict = {}
+    concurrent_topics: dict = {}
+
+    def __init__(self, config):
+        pass
+
+    def list_topics(self, topic=None, timeout=None):
+        topics = {name: type("TopicMetadata", (), {"partitions": dict.fromkeys(range(count))})()
+                  for name, count in FakeAdminClient.topics.items()}
+        return type("ClusterMetadata", (), {"topics": topics})()
+
+    def create_topics(self, new_topics):
+        futures = {}
+        for new_topic in new_topics:
+            if new_topic.topic in FakeAdminClient.concurrent_topics:
+                FakeAdminClient.topics[new_topic.topic] = FakeAdminClient.concurrent_topics[new_topic.topic]
+                futures[new_topic.topic] = FakeTopicFuture(RuntimeError(f"TopicExistsError: {new_topic.topic}"))
+            else:
+                FakeAdminClient.topics[new_topic.topic] = new_topic.num_partitions
+                futures[new_topic.topic] = FakeTopicFuture()
+        return futures
+
+
+@pytest.fixture
+def fake_kafka(monkeypatch):
+    kafka_writer = pytest.importorskip("perspective_data.writers.kafka_writer", exc_type=ImportError)
+    monkeypatch.setattr(kafka_writer, "Producer", FakeProducer)
+    monkeypatch.setattr(kafka_writer, "AdminClient", FakeAdminClient)
+    monkeypatch.setattr(FakeAdminClient, "topics", {})
+    monkeypatch.setattr(FakeAdminClient, "concurrent_topics", {})
+    return kafka_writer
+
+
+@pytest.mark.parametrize("serializer", ["json", "arrow"])
+def test_kafka_keyed_partitions(fake_kafka, serializer):
+    kafka_writer = fake_kafka
+    df = pd.DataFrame({"station": ["a", "b", "c", "a", "b", "a"], "value": np.arange(6.0)})
+    partitions = kafka_writer.partition_ids(df, ["station"], 4)
+    # the same key always lands on the same partition
+    assert partitions[0] == partitions[3] == partitions[5] and partitions[1] == partitions[4]
+    assert (kafka_writer.partition_ids(df, ["station"], 4) == partitions).all()
+    writer = kafka_writer.KafkaWriter("t", "localhost:9092", serializer=serializer, key_cols=["station"], num_partitions=4)
+    assert writer.num_partitions == 4
+    writer.write(df)
+    received = {}
+    for key, partition, value in writer.producer.messages:
+        rows = [json.loads(value)] if serializer == "json" else pa.ipc.open_stream(value).read_pandas().to_dict("records")
+        assert all(partitions[int(row["value"])] == partition for row in rows)
+        received.setdefault(partition, []).extend(row["value"] for row in rows)
+    # rows keep their order within each partition
+    assert all(values == sorted(values) for values in received.values())
+    assert sorted(sum(received.values(), [])) == list(range(6))
+    assert len(writer.producer.messages) == (6 if serializer == "json" else len(set(partitions)))
+
+
+def test_kafka_writer_naive_timezone(fake_kafka, frame):
+    # every writer assumes the same timezone for naive datetimes unless told otherwise
+    import inspect
+    writers = [fake_kafka.KafkaWriter]
+    for module, name in [("clickhouse_writer", "ClickHouseWriter"), ("tdengine_writer", "TDengineWriter"), ("influxdb_writer", "InfluxdbWriter")]:
+        try:
+            writers.append(getattr(__import__(f"perspective_data.writers.{module}", fromlist=[name]), name))
+        except ImportError:
+            pass
+    assert {inspect.signature(writer).parameters["naive_timezone"].default for writer in writers} == {NAIVE_TIMEZONE}
+    df = frame[["timestamp", "power"]]
+    writer = fake_kafka.KafkaWriter("t", "localhost:9092", timestamp_precision="s")
+    writer.write(df)
+    assert json.loads(writer.producer.messages[0][2])["timestamp"] == to_epochs(df["timestamp"], "s", NAIVE_TIMEZONE)[0]
+    writer = fake_kafka.KafkaWriter("t", "localhost:9092", timestamp_precision="s", naive_timezone="America/New_York")
+    writer.write(df)
+    assert json.loads(writer.producer.messages[0][2])["timestamp"] == 1704067200 + 5 * 3600
+
+
+def test_kafka_writer_uses_the_partition_count_of_the_topic(fake_kafka):
+    FakeAdminClient.topics["existing"] = 3
+    assert fake_kafka.KafkaWriter("existing", "localhost:9092", num_partitions=4).num_partitions == 3
+    # the create attempt fails because another client created the topic with 6 partitions meanwhile
+    FakeAdminClient.concurrent_topics["raced"] = 6
+    assert fake_kafka.KafkaWriter("raced", "localhost:9092", num_partitions=4).num_partitions == 6
+
+
+def test_file_writer_streams_parquet_row_groups(tmp_path):
+    path = str(tmp_path / "out.parquet")
+    writer = FileWriter(path, row_group_size=25, compression="zstd")
+    for i in range(7):
+        writer.write(pd.DataFrame({"station": [f"s{j % 3}" for j in range(10)], "value": np.arange(10.0) + 10 * i}))
+    writer.close()
+    parquet = pq.ParquetFile(path)
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [25, 25, 20]
+    assert parquet.metadata.row_group(0).column(0).compression == "ZSTD"
+    assert parquet.read()["value"].to_pylist() == list(np.arange(70.0))
+
+
+@pytest.mark.parametrize("ipc_format", ["file", "stream"])
+def test_file_writer_appends_arrow_batches(tmp_path, ipc_format):
+    path = str(tmp_path / "out.arrow")
+    writer = FileWriter(path, ipc_format=ipc_format)
+    for i in range(3):
+        writer.write(pd.DataFrame({"value": np.arange(4.0) + 4 * i}))
+    writer.close()
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source) if ipc_format == "file" else pa.ipc.open_stream(source)
+        table = reader.read_all()
+    assert table["value"].to_pylist() == list(np.arange(12.0))
+    assert table.num_rows == 12 and len(table["value"].chunks) == 3
+
+
+def test_file_writer_arrows_extension_writes_a_stream(tmp_path):
+    path = str(tmp_path / "out.arrows")
+    writer = FileWriter(path)
+    writer.write(pd.DataFrame({"value": np.arange(4.0)}))
+    writer.close()
+    assert writer.ipc_format == "stream"
+    with pa.memory_map(path) as source:
+        assert pa.ipc.open_stream(source).read_all()["value"].to_pylist() == list(np.arange(4.0))
+    assert FileWriter(str(tmp_path / "out.arrow")).ipc_format == "file"
+
+
+@pytest.mark.parametrize("type", ["csv", "ndjson"])
+def test_file_writer_buffered_text(tmp_path, type):
+    df = pd.DataFrame({"timestamp": pd.to_datetime(["2024-01-01 10:00:05.123456", "2024-01-02 00:00:00.000000"]), "station": ["a,b", 'q"x'], "value": [1.5, np.nan]})
+    path = str(tmp_path / f"out.{type}")
+    writer = FileWriter(path, buffered=True, flush_bytes=1 << 30, flush_interval=3600)
+    writer.write(df)
+    writer.write(to_columnar(df))
+    # nothing reaches the file before the thresholds or close()
+    assert os.path.getsize(path) == 0
+    writer.close()
+    expected = pd.concat([df, df], ignore_index=True)
+    if type == "csv":
+        result = pd.read_csv(path, parse_dates=["timestamp"])
+        assert result.columns.tolist() == ["timestamp", "station", "value"]
+        assert (result["timestamp"] == expected["timestamp"]).all()
+    else:
+        result = pd.read_json(path, lines=True)
+    assert result["station"].tolist() == expected["station"].tolist()
+    assert result["value"].isna().tolist() == [False, True, False, True]
+
+
+def test_file_writer_buffered_text_flushes_an_idle_stream(tmp_path):
+    path = str(tmp_path / "out.csv")
+    writer = FileWriter(path, buffered=True, flush_bytes=1 << 30, flush_interval=0.05)
+    writer.write(pd.DataFrame({"value": [1.0, 2.0]}))
+    # the timer writes the buffered rows without another write() or close()
+    deadline = time.monotonic() + 5
+    while os.path.getsize(path) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pd.read_csv(path)["value"].tolist() == [1.0, 2.0]
+    writer.close()
+
+
+def read_partitioned(root, files: list[str], type: str) -> pd.DataFrame:
+    """Read the files of a partitioned FileWriter back, with the partition values taken from the directory names."""
+    from urllib.parse import unquote
+    frames = []
+    for file_path in files:
+        if type == "csv":
+            df = pd.read_csv(file_path)
+        elif type == "ndjson":
+            df = pd.read_json(file_path, lines=True)
+        elif type == "parquet":
+            df = pq.read_table(file_path).to_pandas()
+        else:
+            df = pa.ipc.open_file(file_path).read_pandas()
+        for part in os.path.relpath(os.path.dirname(file_path), root).split(os.sep):
+            col, value = part.split("=", 1)
+            df[col] = unquote(value)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).sort_values("value", ignore_index=True)
+
+
+@pytest.mark.parametrize("type", ["parquet", "arrow", "csv", "ndjson"])
+def test_file_writer_hive_partitions(tmp_path, type):
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-01-01 10:00", "2024-01-01 11:00", "2024-01-02 10:00", "2024-01-02 11:00"]),
+        "station_name": ["Times Sq", "Canal/St", "Times Sq", "Canal/St"],
+        "value": [1.0, 2.0, 3.0, 4.0],
+    })
+    writer = FileWriter(str(tmp_path / f"part.{type}"), partition_cols=["station_name", "date"], max_open_files=2)
+    writer.write(df.iloc[:2])
+    writer.write(df.iloc[2:])
+    writer.close()
+    # 4 partitions, never more than 2 files open at once
+    assert len(writer.files_written) == 4
+    assert os.path.isdir(tmp_path / "station_name=Canal%2FSt" / "date=2024-01-02")
+    written = read_partitioned(tmp_path, writer.files_written, type)
+    assert written["value"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert written["station_name"].tolist() == ["Times Sq", "Canal/St", "Times Sq", "Canal/St"]
+    assert written["date"].tolist() == ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-02"]
+    assert pd.to_datetime(written["timestamp"]).tolist() == df["timestamp"].tolist()
+    if type in ("parquet", "arrow"):
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(str(tmp_path), format="parquet" if type == "parquet" else "ipc", partitioning="hive")
+        assert dataset.to_table().sort_by("value")["station_name"].to_pylist() == ["Times Sq", "Canal/St", "Times Sq", "Canal/St"]
+
+
+@pytest.mark.parametrize("type", ["parquet", "csv"])
+def test_file_writer_hive_partitions_keep_null_keys(tmp_path, type):
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-01-01 10:00", None, "2024-01-02 10:00"]),
+        "station_name": ["Times Sq", "Times Sq", None],
+        "value": [1.0, 2.0, 3.0],
+    })
+    writer = FileWriter(str(tmp_path / f"part.{type}"), partition_cols=["station_name", "date"])
+    writer.write(df)
+    writer.close()
+    # no row is dropped: missing keys go to Hive's default partition
+    written = read_partitioned(tmp_path, writer.files_written, type)
+    assert written["value"].tolist() == [1.0, 2.0, 3.0]
+    assert written["station_name"].tolist() == ["Times Sq", "Times Sq", "__HIVE_DEFAULT_PARTITION__"]
+    assert written["date"].tolist() == ["2024-01-01", "__HIVE_DEFAULT_PARTITION__", "2024-01-02"]
+    # a datetime column itself would lose its time of day in the directory name
+    with pytest.raises(ValueError):
+        FileWriter(str(tmp_path / f"time.{type}"), partition_cols=["timestamp"]).write(df)
+
+
+def test_file_writer_rolls_by_size(tmp_path):
+    writer = FileWriter(str(tmp_path / "roll.arrow"), roll_size=1)
+    for i in range(3):
+        writer.write(pd.DataFrame({"value": [float(i)]}))
+    writer.close()
+    assert [os.path.basename(path) for path in writer.files_written] == ["roll-00000.arrow", "roll-00001.arrow", "roll-00002.arrow"]
+    assert pa.ipc.open_file(writer.files_written[2]).read_all()["value"].to_pylist() == [2.0]
+
+
+def test_file_writer_rolls_by_time_window(tmp_path, monkeypatch):
+    from perspective_data.writers import file_writer
+    now = [7200.0]
+    monkeypatch.setattr(file_writer.time, "time", lambda: now[0])
+    writer = FileWriter(str(tmp_path / "hourly.csv"), roll_interval=3600)
+    for now[0] in (7200.0, 9000.0, 10800.0):
+        writer.write(pd.DataFrame({"value": [now[0]]}))
+    writer.close()
+    # two hourly windows: the first two batches share a file
+    assert len(writer.files_written) == 2
+    assert pd.read_csv(writer.files_written[0])["value"].tolist() == [7200.0, 9000.0]
+
+
+class FakeClickHouseClient:
+    def __init__(self, **kwargs):
+        self.commands = []
+        self.inserts = []
+        self.failures = 0
+        self.closed = False
+
+    def command(self, sql):
+        self.commands.append(sql)
+
+    def insert_arrow(self, table, arrow_table, database=None, settings=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("server unavailable")
+        self.inserts.append((table, arrow_table, settings))
+        return type("QuerySummary", (), {"written_rows": arrow_table.num_rows})()
+
+    def close(self):
+        self.closed = True
+
+
+def test_clickhouse_writer_batches_columnar_inserts(monkeypatch):
+    clickhouse_writer = pytest.importorskip("perspective_data.writers.clickhouse_writer", exc_type=ImportError)
+    monkeypatch.setattr(clickhouse_writer.clickhouse_connect, "get_client", FakeClickHouseClient)
+    schema = {"timestamp": "datetime64[ns]", "ticker": "str", "close": "float", "volume": "int"}
+    writer = clickhouse_writer.ClickHouseWriter("stocks", database="test", schema=schema, low_cardinality_cols=["ticker"],
+                                                async_insert=True, batch_rows=5)
+    assert writer.client.commands[-1] == (
+        "CREATE TABLE IF NOT EXISTS `test`.`stocks` (`timestamp` DateTime64(9), `ticker` LowCardinality(String), "
+        "`close` Float64, `volume` Int64) ENGINE = MergeTree() ORDER BY (`timestamp`)")
+    frame = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 00:00:01"]),
+        "ticker": ["AAPL.N", "MSFT.N"], "close": [1.0, 2.0], "volume": [10, 20],
+    })
+    for _ in range(3):
+        writer.write(frame)
+    # the first two batches are buffered, the third one crosses batch_rows
+    assert len(writer.client.inserts) == 1
+    table, inserted, settings = writer.client.inserts[0]
+    assert table == "stocks" and inserted.num_rows == 6 and settings["async_insert"] == 1
+    assert inserted.schema.field("timestamp").type == pa.timestamp("ns")
+    writer.write(to_columnar(frame))
+    writer.close()
+    assert [inserted.num_rows for _, inserted, _ in writer.client.inserts] == [6, 2]
+    assert writer.stats()["rows"] == 8
+
+
+def test_clickhouse_writer_keeps_the_buffer_when_an_insert_fails(monkeypatch):
+    clickhouse_writer = pytest.importorskip("perspective_data.writers.clickhouse_writer", exc_type=ImportError)
+    monkeypatch.setattr(clickhouse_writer.clickhouse_connect, "get_client", FakeClickHouseClient)
+    writer = clickhouse_writer.ClickHouseWriter("stocks", schema={"ticker": "str", "close": "float"}, batch_rows=100)
+    writer.write(pd.DataFrame({"ticker": ["AAPL.N", "MSFT.N"], "close": [1.0, 2.0]}))
+    writer.client.failures = 1
+    with pytest.raises(ConnectionError):
+        writer.flush()
+    assert writer.stats()["buffered_rows"] == 2
+    writer.flush()
+    assert [inserted.num_rows for _, inserted, _ in writer.client.inserts] == [2]
+    # the client is closed even when the last flush fails
+    writer.write(pd.DataFrame({"ticker": ["IBM.N"], "close": [3.0]}))
+    writer.client.failures = 1
+    with pytest.raises(ConnectionError):
+        writer.close()
+    assert writer.client.closed
+
+
+def test_clickhouse_writer_inserts_naive_datetimes_as_utc_instants(monkeypatch):
+    clickhouse_writer = pytest.importorskip("perspective_data.writers.clickhouse_writer", exc_type=ImportError)
+    monkeypatch.setattr(clickhouse_writer.clickhouse_connect, "get_client", FakeClickHouseClient)
+    frame = pd.DataFrame({"timestamp": pd.to_datetime(["2024-01-01 00:00:00", None]), "close": [1.0, 2.0]})
+    writer = clickhouse_writer.ClickHouseWriter("stocks", schema={"timestamp": "datetime", "close": "float"}, naive_timezone="America/New_York")
+    writer.write(frame)
+    _, inserted, _ = writer.client.inserts[0]
+    # the same instants as to_epochs() gives the InfluxDB and TDengine writers
+    assert inserted.column("timestamp").to_pylist() == [datetime(2024, 1, 1, 5), None]
+class FakeTaosStatement:
+    def __init__(self):
+        self.prepared, self.tables, self.binds, self.batches, self.executed = [], [], [], 0, 0
+
+    def prepare(self, sql):
+        self.prepared.append(sql)
+
+    def set_tbname_tags(self, name, tags):
+        # the real statement only takes tag views for tags and column views for values
+        import taosws
+        assert all(isinstance(tag, taosws.PyTagView) for tag in tags)
+        self.tables.append((name, tags))
+
+    def bind_param(self, columns):
+        import taosws
+        assert all(isinstance(column, taosws.PyColumnView) for column in columns)
+        self.binds.append(columns)
+
+    def add_batch(self):
+        self.batches += 1
+
+    def execute(self):
+        self.executed += 1
+
+    def close(self):
+        pass
+
+
+class FakeTaosConnection:
+    def __init__(self, **kwargs):
+        self.sql = []
+        self.stmt = FakeTaosStatement()
+
+    def execute(self, sql):
+        self.sql.append(sql)
+
+    def statement(self):
+        return self.stmt
+
+    def close(self):
+        pass
+
+
+def test_tdengine_writer_binds_subtables_on_one_prepared_statement(frame, monkeypatch):
+    tdengine_writer = pytest.importorskip("perspective_data.writers.tdengine_writer", exc_type=ImportError)
+    taosws = tdengine_writer.taosws
+    monkeypatch.setattr(taosws, "connect", FakeTaosConnection)
+    # tag views are opaque: remember the value each one was built from
+    tag_values = {}
+
+    def recording(to_tag):
+        def build(value, *args):
+            tag = to_tag(value, *args)
+            tag_values[id(tag)] = value
+            return tag
+        return build
+
+    for name in ("nchar_to_tag", "double_to_tag", "big_int_to_tag", "bool_to_tag", "timestamp_to_tag"):
+        monkeypatch.setattr(taosws, name, recording(getattr(taosws, name)))
+    assert tdengine_writer.subtable_name("grid", ("Times Sq",)).startswith("grid_times_sq_")
+    assert tdengine_writer.subtable_name("grid", ("a",)) == "grid_a"
+    schema = {"timestamp": "datetime", "station": "string", "status": "string", "power": "float", "count": "int", "online": "bool"}
+    df = frame[list(schema)].assign(station=["a", "b", "a"])
+    writer = tdengine_writer.TDengineWriter("grid", "meters", schema, tag_cols=["station"], batch_rows=5)
+    assert writer.conn.sql[-1] == ("CREATE STABLE IF NOT EXISTS `meters` (`timestamp` TIMESTAMP, `status` NCHAR(64), `power` DOUBLE, "
+                                   "`count` BIGINT, `online` BOOL) TAGS (`station` NCHAR(64))")
+    writer.write(df)
+    writer.write(to_columnar(df))
+    stmt = writer.conn.stmt
+    # prepared once, one bind per subtable and batch, executed once batch_rows are bound
+    assert stmt.prepared == ["INSERT INTO ? USING `meters` TAGS (?) VALUES (?, ?, ?, ?, ?)"]
+    assert [name for name, _ in stmt.tables] == ["meters_a", "meters_b", "meters_a", "meters_b"] and stmt.batches == 4 and stmt.executed == 1
+    assert [[tag_values[id(tag)] for tag in tags] for _, tags in stmt.tables] == [["a"], ["b"], ["a"], ["b"]]
+    writer.write(df)
+    writer.close()
+    assert stmt.executed == 2 and writer.stats()["rows"] == 9
+    # typed tags are built from the first row of every subtable
+    typed = tdengine_writer.TDengineWriter("grid", "typed", schema, tag_cols=["station", "count", "online"])
+    typed.write(df.iloc[[0, 2]])
+    assert [[tag_values[id(tag)] for tag in tags] for _, tags in typed.conn.stmt.tables] == [["a", 1, True], ["a", 3, True]]
+
+
+def test_perspective_table_writer_coalesces_arrow_updates():
+    perspective = pytest.importorskip("perspective")
+    from perspective_data.writers.perspective_writer import PerspectiveTableWriter
+    server = perspective.Server()
+    schema = {"timestamp": "datetime64[ns]", "ticker": "str", "close": "float", "day": "date"}
+    frame = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 00:00:01"]),
+        "ticker": ["AAPL.N", "MSFT.N"], "close": [1.0, 2.0], "day": pd.to_datetime(["2024-01-01", "2024-01-01"]),
+    })
+    writer = PerspectiveTableWriter(server, "stocks", schema=schema, index="ticker", coalesce_rows=4, coalesce_interval=60)
+    assert writer.table.schema() == {"timestamp": "datetime", "ticker": "string", "close": "float", "day": "date"}
+    writer.write(frame)
+    assert writer.table.size() == 0 and writer.stats()["buffered_rows"] == 2
+    writer.write(to_columnar(frame.assign(close=[3.0, 4.0])))
+    assert writer.updates == 1
+    # the index keeps the latest row per ticker
+    assert writer.table.view().to_columns()["close"] == [3.0, 4.0]
+    # a second writer on the same hosted table and a table created from the first batch
+    writer.close()
+    other = PerspectiveTableWriter(server, "stocks", schema=schema)
+    other.write(frame.assign(ticker=["TSLA.N", "AAPL.N"]))
+    assert other.table.size() == 3
+    inferred = PerspectiveTableWriter(server, "inferred", limit=3)
+    inferred.write(frame[["ticker", "close"]])
+    inferred.write(frame[["ticker", "close"]])
+    assert inferred.table.size() == 3
+
+
+def test_perspective_table_writer_coalesce_thresholds():
+    perspective = pytest.importorskip("perspective")
+    from perspective_data.writers.perspective_writer import PerspectiveTableWriter
+    server = perspective.Server()
+    row = pd.DataFrame({"ticker": ["AAPL.N"], "close": [1.0]})
+    # coalesce_rows alone: nothing is sent before the threshold or close()
+    writer = PerspectiveTableWriter(server, "by_rows", schema={"ticker": "str", "close": "float"}, coalesce_rows=100)
+    for _ in range(5):
+        writer.write(row)
+    assert writer.updates == 0
+    writer.close()
+    assert writer.updates == 1 and writer.table.size() == 5
+    # coalesce_interval: the timer sends the buffered rows while the producer is idle
+    writer = PerspectiveTableWriter(server, "by_interval", schema={"ticker": "str", "close": "float"}, coalesce_rows=100, coalesce_interval=0.05)
+    writer.write(row)
+    writer.write(row)
+    deadline = time.monotonic() + 5
+    while writer.updates == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.updates == 1 and writer.table.size() == 2
+    writer.close()
+
+
+@pytest.mark.parametrize("engine", ["sqlite", "duckdb"])
+def test_embedded_database_writer(frame, tmp_path, engine):
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    from perspective_data.writers.duckdb_writer import DuckDBWriter
+    schema = {"timestamp": "datetime", "station": "string", "power": "float", "online": "bool"}
+    df = frame[list(schema)]
+    database = str(tmp_path / f"grid.{engine}")
+    writer = DuckDBWriter(database, "grid", schema=schema, engine=engine, checkpoint_interval=60)
+    writer.write(df)
+    writer.write(to_columnar(df))
+    rows = writer.conn.execute('SELECT "timestamp", station, power, online FROM grid ORDER BY "timestamp", station NULLS LAST').fetchall()
+    writer.close()
+    assert len(rows) == 6 and writer.stats()["rows"] == 6 and writer.checkpoints == 1
+    assert rows[0][1:] == ("Times Sq", 1.5, True) and rows[-1][1] is None
+    if engine == "sqlite":
+        assert rows[0][0] == "2024-01-01T00:00:00.000000000"
+    # without a schema the table is created from the first batch
+    inferred = DuckDBWriter(database, "inferred", engine=engine)
+    inferred.write(df)
+    assert inferred.conn.execute("SELECT COUNT(*) FROM inferred").fetchone()[0] == 3
+    inferred.close()
+
+
+class FlakyWriter:
+    """A sink that fails its first writes, like a database that is down."""
+    def __init__(self, failures):
+        self.failures = failures
+        self.batches = []
+        self.closed = False
+
+    def write(self, data):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("sink is down")
+        self.batches.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+def test_spooling_writer_drains_through_sink_failures(frame, tmp_path):
+    from perspective_data.writers.spooling_writer import SpoolingWriter
+    sink = FlakyWriter(failures=2)
+    writer = SpoolingWriter(sink, str(tmp_path / "spool"), segment_interval=0.05, retry_interval=0.01, drain_batch_rows=4)
+    df = frame[["timestamp", "station", "power"]]
+    for _ in range(5):
+        writer.write(df)
+    writer.close()
+    stats = writer.stats()
+    assert sink.closed and stats["retries"] == 2
+    assert stats["drained_rows"] == 15 and stats["lag_rows"] == 0 and stats["segments"] == 0
+    # batches are coalesced up to drain_batch_rows, in order
+    assert all(batch.num_rows <= 4 for batch in sink.batches)
+    drained = pa.Table.from_batches(sink.batches).to_pandas()
+    assert drained["timestamp"].tolist() == df["timestamp"].tolist() * 5
+    assert os.listdir(tmp_path / "spool") == []
+
+
+def test_spooling_writer_keeps_undrained_segments_for_the_next_run(frame, tmp_path):
+    from perspective_data.writers.spooling_writer import SpoolingWriter
+    spool_dir = str(tmp_path / "spool")
+    writer = SpoolingWriter(FlakyWriter(failures=10**9), spool_dir, retry_interval=0.01, close_timeout=0.1)
+    writer.write(frame[["timestamp", "power"]])
+    writer.write(frame[["timestamp", "power"]])
+    writer.close()
+    assert writer.stats()["lag_rows"] == 6 and len(os.listdir(spool_dir)) == 1
+    sink = FlakyWriter(failures=0)
+    recovered = SpoolingWriter(sink, spool_dir)
+    recovered.close()
+    assert sum(batch.num_rows for batch in sink.batches) == 6 and os.listdir(spool_dir) == []
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def write(self, data):
+        self.batches.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+def test_coalescing_writer_thresholds(frame):
+    from perspective_data.writers.coalescing_writer import CoalescingWriter, Histogram
+    sink = RecordingWriter()
+    writer = CoalescingWriter(sink, max_rows=7, max_latency=None)
+    df = frame[["timestamp", "station", "power"]]
+    for _ in range(3):
+        writer.write(df)
+    # the third frame crosses max_rows: one concatenated batch of 9 rows
+    assert [len(batch) for batch in sink.batches] == [9]
+    assert sink.batches[0]["timestamp"].tolist() == df["timestamp"].tolist() * 3
+    writer.write(to_columnar(df))
+    writer.close()
+    stats = writer.stats()
+    assert [len(batch) for batch in sink.batches] == [9, 3] and sink.closed
+    assert stats["flush_reasons"]["rows"] == 1 and stats["flush_reasons"]["close"] == 1
+    assert stats["frames_per_batch"]["buckets"] == {"<=1": 1, "<=4": 1} and stats["added_latency_ms"]["count"] == 4
+    histogram = Histogram((1, 10, 100))
+    for value in (0.5, 5, 5, 50, 500):
+        histogram.add(value)
+    assert histogram.percentile(50) == 10 and histogram.percentile(100) == 500
+    assert histogram.to_dict()["buckets"] == {"<=1": 1, "<=10": 2, "<=100": 1, ">100": 1}
+
+
+def test_coalescing_writer_flushes_on_latency_and_bytes(frame):
+    from perspective_data.writers.coalescing_writer import CoalescingWriter, batch_nbytes
+    sink = RecordingWriter()
+    writer = CoalescingWriter(sink, max_rows=None, max_latency=0.05)
+    writer.write(frame)
+    deadline = time.monotonic() + 5
+    while not sink.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(sink.batches) == 1 and writer.stats()["flush_reasons"]["latency"] == 1
+    assert writer.added_latency_ms.min >= 50
+    writer.close()
+    sink = RecordingWriter()
+    writer = CoalescingWriter(sink, max_rows=None, max_bytes=2 * batch_nbytes(frame), max_latency=None)
+    writer.write(frame)
+    writer.write(frame)
+    assert len(sink.batches) == 1 and writer.flush_reasons["bytes"] == 1
+    writer.close()
+
+
+class BlockingWriter(RecordingWriter):
+    """A sink whose first write blocks until released."""
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        super().write(data)
+
+
+def test_spooling_writer_seals_while_the_sink_is_blocked(frame, tmp_path):
+    from perspective_data.writers.spooling_writer import SpoolingWriter
+    sink = BlockingWriter()
+    df = frame[["timestamp", "power"]]
+    writer = SpoolingWriter(sink, str(tmp_path / "spool"), segment_interval=0, retry_interval=0.01)
+    writer.write(df)
+    assert sink.entered.wait(5)
+    # every write seals a segment while the head segment is being drained; the spool only has room for about two
+    segment_size = writer.stats()["spool_bytes"]
+    writer.max_spool_bytes = int(segment_size * 2.5)
+    for _ in range(5):
+        writer.write(df)
+    sink.release.set()
+    writer.close()
+    stats = writer.stats()
+    assert writer._drainer.is_alive() is False and stats["segments"] == 0 and stats["lag_rows"] == 0
+    # the head segment is delivered once and never dropped; the segments dropped for space are counted once
+    assert stats["drained_rows"] + stats["dropped_rows"] == stats["spooled_rows"] == 18
+    assert stats["dropped_rows"] > 0 and sum(len(batch) for batch in sink.batches) == stats["drained_rows"]
+    assert sink.batches[0].num_rows == 3 and os.listdir(tmp_path / "spool") == []